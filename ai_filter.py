@@ -1,26 +1,61 @@
+import numpy as np
 import pandas as pd
 import openai
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 import json
 import logging
+import time
+from bm25_index import BM25Index, BM25_FIELD_WEIGHTS, SCIPY_AVAILABLE, tokenize
 from config import Config
+from criteria_prefilter import CriteriaPrefilter
+from data_processor import NUMERIC_COLUMNS
+from dataset_cache import DATASET_KEY_ATTR, DatasetCache
+from json_stream import parse_json_objects
+from keyword_index import KeywordIndex
+from run_report import RunReport
 from vc_expert_agent import VCExpertAgent
 
+# Keyword fallback: points added per keyword found in each field (in scoring order)
+FALLBACK_FIELD_WEIGHTS = [
+    ('industry', 25),
+    ('revenue', 20),
+    ('stage', 15),
+    ('description', 15),
+    ('location', 10),
+    ('name', 20)
+]
+
+# Order in which matched fields are explained in the fallback reason
+FALLBACK_REASON_ORDER = ['industry', 'revenue', 'stage', 'description', 'location', 'name']
+
+# Search indexes kept in memory across Streamlit reruns (most recent last)
+MAX_IN_MEMORY_INDEXES = 4
+_SEARCH_INDEXES = {}
+
 class AIFilter:
     """AI-powered firm filtering using heuristics"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, cache: Optional[DatasetCache] = None):
         self.config = config
+        self.cache = cache
         self.logger = logging.getLogger(__name__)
         self._setup_openai()
         # Initialize VC expert agent
         self.vc_expert = VCExpertAgent(config)
+        self.prefilter = CriteriaPrefilter()
+        # Constraints and shortlist diagnostics of the last filter_firms call (shown in the UI)
+        self.last_prefilter = None
+        self.last_cascade = None
+        # Stage timings and per-batch tokens, latency and cost of the last run
+        self.last_report = RunReport()
     
     def _setup_openai(self):
         """Initialize OpenAI client"""
         openai.api_key = self.config.get_openai_key()
     
-    def filter_firms(self, df: pd.DataFrame, heuristics: str, top_n: int = 10) -> List[Dict[str, Any]]:
+    def filter_firms(self, df: pd.DataFrame, heuristics: str, top_n: int = 10,
+                     ranker: Optional[str] = None, shortlist_size: Optional[int] = None,
+                     return_report: bool = False):
         """
         Filter firms based on heuristics using AI
         
@@ -28,31 +63,73 @@ class AIFilter:
             df: DataFrame with firm data
             heuristics: User-defined filtering criteria
             top_n: Number of top firms to return
+            ranker: Local ranking mode ('keyword' or 'bm25', default from config), used offline
+                and to shortlist firms for the VC Expert
+            shortlist_size: Firms sent to the VC Expert after local ranking (0 = all, default from config)
+            return_report: Also return the run's RunReport (tokens, latency, retries, cost per batch)
             
         Returns:
-            List of filtered firm results with scores and reasons
+            List of filtered firm results with scores and reasons, or (results, report)
+            when return_report is set
         """
+        results = []
+        for update in self.iter_filter_firms(df, heuristics, top_n, ranker, shortlist_size):
+            results = update['ranking']
+        return (results, self.last_report) if return_report else results
+    
+    def iter_filter_firms(self, df: pd.DataFrame, heuristics: str, top_n: int = 10, ranker: Optional[str] = None,
+                          shortlist_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Same as filter_firms, yielding partial rankings while the VC Expert works
+        
+        Updates look like {'stage', 'done', 'total', 'ranking'} (see
+        VCExpertAgent.iter_analyze_firms); keyword fallback results arrive as a
+        single 'fallback' update. The last update holds the final results and the
+        finished run report under 'report' (also kept as last_report).
+        """
+        self.last_report = RunReport()
         api_key = self.config.get_openai_key()
         
         if not api_key:
             self.logger.info("No API key available, using fallback filter")
-            return self._fallback_filter(df, heuristics, top_n)
+            yield self._fallback_update(df, heuristics, top_n, ranker)
+            return
         
         try:
+            report = self.last_report
+            
+            # Drop firms that cannot satisfy the hard constraints before any API call
+            started = time.perf_counter()
+            candidates = self._apply_prefilter(df, heuristics)
+            report.add_stage_time('prefilter', time.perf_counter() - started)
+            
+            # Only the local ranker's top K reach the expert, so API cost doesn't grow with the upload
+            started = time.perf_counter()
+            candidates = self._apply_cascade(candidates, heuristics, ranker, shortlist_size)
+            report.add_stage_time('shortlist', time.perf_counter() - started)
+            
             # Prepare firm data for VC expert analysis
-            firm_data = self._prepare_firm_data(df)
+            started = time.perf_counter()
+            firm_data = self._prepare_firm_data(candidates)
+            report.add_stage_time('prepare', time.perf_counter() - started)
             
             # Check if VC Expert is available
             if not self.vc_expert.is_available():
                 self.logger.warning("VC Expert Agent not available - using fallback")
-                return self._fallback_filter(df, heuristics, top_n)
+                yield self._fallback_update(df, heuristics, top_n, ranker)
+                return
             
             # Use VC Expert Agent for professional analysis
             self.logger.info("Using VC Expert Agent for analysis")
-            expert_results = self.vc_expert.analyze_firms(firm_data, heuristics, top_n)
-            self.logger.info(f"VC Expert analysis complete - {len(expert_results)} results")
-            
-            return expert_results
+            started = time.perf_counter()
+            for update in self.vc_expert.iter_analyze_firms(firm_data, heuristics, top_n, report):
+                if update['stage'] == 'done':
+                    self.logger.info(f"VC Expert analysis complete - {len(update['ranking'])} results")
+                    self._record_finalist_ranks(candidates, update['ranking'])
+                    report.add_stage_time('vc_expert', time.perf_counter() - started)
+                    self._finish_report(report)
+                    update = dict(update, report=report)
+                yield update
             
         except ImportError as e:
             self.logger.error(f"VC Expert Agent missing dependency: {str(e)}")
@@ -61,14 +138,14 @@ class AIFilter:
             # Store error for UI display
             import streamlit as st
             st.session_state['vc_expert_error'] = f"Import Error: {str(e)}"
-            return self._fallback_filter(df, heuristics, top_n)
+            yield self._fallback_update(df, heuristics, top_n, ranker)
         except ValueError as e:
             self.logger.error(f"VC Expert Agent configuration issue: {str(e)}")
             self.logger.info("Falling back to keyword matching")
             print(f"❌ VC EXPERT ERROR (Config): {str(e)}")  # Console output
             import streamlit as st
             st.session_state['vc_expert_error'] = f"Configuration Error: {str(e)}"
-            return self._fallback_filter(df, heuristics, top_n)
+            yield self._fallback_update(df, heuristics, top_n, ranker)
         except Exception as e:
             self.logger.error(f"Error in VC Expert analysis: {str(e)}")
             self.logger.info("Falling back to keyword matching")
@@ -80,7 +157,122 @@ class AIFilter:
             import streamlit as st
             st.session_state['vc_expert_error'] = error_msg
             # Return fallback with error info
-            return self._fallback_filter(df, heuristics, top_n)
+            yield self._fallback_update(df, heuristics, top_n, ranker)
+    
+    def _fallback_update(self, df: pd.DataFrame, heuristics: str, top_n: int, ranker: Optional[str]) -> Dict[str, Any]:
+        """Fallback results as a final progress update"""
+        report = self.last_report
+        report.mode = 'fallback'
+        started = time.perf_counter()
+        ranking = self._fallback_filter(df, heuristics, top_n, ranker)
+        report.add_stage_time('fallback', time.perf_counter() - started)
+        self._finish_report(report)
+        return {'stage': 'fallback', 'done': 1, 'total': 1, 'ranking': ranking, 'report': report}
+    
+    def _finish_report(self, report: RunReport) -> None:
+        """Close the run report and export it when RUN_REPORT_DIR is set"""
+        report.finish()
+        directory = self.config.get_run_report_dir()
+        if directory:
+            try:
+                self.logger.info(f"Run report written to {report.save(directory)}")
+            except OSError as e:
+                self.logger.warning(f"Could not write run report: {e}")
+    
+    def rank_chunks(self, chunks: Iterable[pd.DataFrame], heuristics: str, top_n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Keyword-rank a stream of DataFrame chunks (see ExcelProcessor.iter_chunks)
+        
+        Only the running top N is kept between chunks, so memory stays bounded
+        by the chunk size. Ties keep upload order, matching a single-frame run.
+        Always keyword mode: BM25 scores depend on corpus statistics and are not
+        comparable across chunks.
+        """
+        best = []
+        for chunk in chunks:
+            best.extend(self._fallback_filter(chunk, heuristics, top_n, ranker='keyword'))
+            best.sort(key=lambda x: x['score'], reverse=True)
+            best = best[:top_n]
+        
+        return best
+    
+    def _apply_prefilter(self, df: pd.DataFrame, heuristics: str) -> pd.DataFrame:
+        """Apply hard constraints compiled from the heuristics (numeric ranges, stage, industry, location)"""
+        self.last_prefilter = {'constraints': [], 'rows_before': len(df), 'rows_after': len(df), 'relaxed': False}
+        
+        if not self.config.is_prefilter_enabled():
+            return df
+        
+        constraints = self.prefilter.compile(heuristics)
+        if not constraints:
+            return df
+        
+        filtered, applied = self.prefilter.apply(df, constraints)
+        self.last_prefilter['constraints'] = applied
+        
+        if len(filtered) == 0:
+            # Better to pay for a full run than to silently return nothing on a misread criterion
+            self.logger.warning("No firm satisfies every hard constraint - analyzing all firms")
+            self.last_prefilter['relaxed'] = True
+            return df
+        
+        self.last_prefilter['rows_after'] = len(filtered)
+        return filtered
+    
+    def _apply_cascade(self, df: pd.DataFrame, heuristics: str, ranker: Optional[str],
+                       shortlist_size: Optional[int]) -> pd.DataFrame:
+        """Shortlist the top K firms by local score, best first (K <= 0 keeps every firm)"""
+        self.last_cascade = None
+        if shortlist_size is None:
+            shortlist_size = self.config.get_cascade_shortlist_size()
+        if shortlist_size <= 0 or len(df) <= shortlist_size:
+            return df
+        
+        ranker = ranker or self.config.get_fallback_ranker()
+        if ranker == 'bm25' and not SCIPY_AVAILABLE:
+            ranker = 'keyword'
+        scores, matched = self._local_scores(df, heuristics, ranker)
+        top_rows = self._top_rows(scores, shortlist_size)
+        cutoff = scores[top_rows[-1]]
+        
+        # Recall diagnostics: how many locally matching (or cutoff-tied) firms the shortlist left out
+        self.last_cascade = {
+            'ranker': ranker,
+            'rows_before': len(df),
+            'shortlist_size': len(top_rows),
+            'matched_rows': int(matched.sum()),
+            'matched_in_shortlist': int(matched[top_rows].sum()),
+            'tied_left_out': int((scores == cutoff).sum() - (scores[top_rows] == cutoff).sum()),
+            'finalist_ranks': []
+        }
+        self.logger.info(
+            f"Cascade shortlisted {len(top_rows)}/{len(df)} firms by {ranker} score "
+            f"({self.last_cascade['matched_in_shortlist']}/{self.last_cascade['matched_rows']} local matches kept)"
+        )
+        return df.iloc[top_rows]
+    
+    def _local_scores(self, df: pd.DataFrame, heuristics: str, ranker: str):
+        """Local score for every row, plus a mask of rows the local ranker actually matched"""
+        if ranker == 'bm25':
+            index = self._get_search_index(df, 'bm25_index', list(BM25_FIELD_WEIGHTS), BM25Index)
+            scores, _ = index.score(heuristics)
+            return scores, scores > 0
+        
+        keywords = [word for word in heuristics.lower().split() if len(word) > 2]
+        scores = self._score_keyword_hits(self._match_keywords(df, keywords), len(df))
+        # Rows without any keyword hit score exactly 1
+        return scores, scores > 1
+    
+    def _record_finalist_ranks(self, shortlist: pd.DataFrame, results: List[Dict]) -> None:
+        """Note each finalist's position in the local shortlist (None if the name isn't found)"""
+        if self.last_cascade is None:
+            return
+        
+        names = shortlist['name'].astype(str).tolist() if 'name' in shortlist.columns else []
+        ranks = {}
+        for position, name in enumerate(names, 1):
+            ranks.setdefault(name, position)
+        self.last_cascade['finalist_ranks'] = [ranks.get(str(result.get('name'))) for result in results]
     
     def _prepare_firm_data(self, df: pd.DataFrame) -> List[Dict[str, str]]:
         """Convert DataFrame to list of firm dictionaries with ALL available columns"""
@@ -89,8 +281,10 @@ class AIFilter:
         for _, row in df.iterrows():
             firm = {}
             
-            # Add ALL columns from the dataframe
+            # Add ALL columns from the dataframe, except the typed copies derived from the text fields
             for col in df.columns:
+                if col in NUMERIC_COLUMNS:
+                    continue
                 value = str(row.get(col, ''))
                 # Only include if not empty and not just whitespace
                 if value and value.strip() and value != 'nan':
@@ -159,20 +353,12 @@ class AIFilter:
     
     def _parse_ai_response(self, response_text: str) -> List[Dict]:
         """Parse AI response into structured data"""
-        try:
-            # Extract JSON from response
-            start_idx = response_text.find('[')
-            end_idx = response_text.rfind(']') + 1
-            
-            if start_idx != -1 and end_idx != -1:
-                json_text = response_text[start_idx:end_idx]
-                return json.loads(json_text)
-            else:
-                raise ValueError("No valid JSON found in response")
-                
-        except Exception as e:
-            self.logger.error(f"Error parsing AI response: {str(e)}")
-            raise
+        # Tolerant of fences, stray brackets and truncation: every complete object is kept
+        results = parse_json_objects(response_text)
+        if not results:
+            self.logger.error("Error parsing AI response: No valid JSON found in response")
+            raise ValueError("No valid JSON found in response")
+        return results
     
     def _rank_firms(self, ai_results: List[Dict], top_n: int) -> List[Dict]:
         """Rank firms by score and return top N"""
@@ -189,103 +375,188 @@ class AIFilter:
             for firm in ranked[:top_n]
         ]
     
-    def _fallback_filter(self, df: pd.DataFrame, heuristics: str, top_n: int) -> List[Dict]:
+    def _fallback_filter(self, df: pd.DataFrame, heuristics: str, top_n: int,
+                         ranker: Optional[str] = None) -> List[Dict]:
         """Fallback filtering when AI is unavailable"""
         self.logger.warning("Using fallback filtering")
         
+        if (ranker or self.config.get_fallback_ranker()) == 'bm25':
+            if SCIPY_AVAILABLE:
+                return self._bm25_filter(df, heuristics, top_n)
+            self.logger.warning("BM25 ranking needs scipy - using keyword matching")
+        
         # Simple keyword matching
         heuristics_lower = heuristics.lower()
         keywords = [word for word in heuristics_lower.split() if len(word) > 2]  # Filter out short words
-        matches = []
         
-        for _, row in df.iterrows():
-            score = 0
-            reason_details = []
-            matched_keywords = set()
-            
-            # Get all text fields
-            name = str(row.get('name', '')).lower()
-            description = str(row.get('description', '')).lower()
-            industry = str(row.get('industry', '')).lower()
-            stage = str(row.get('stage', '')).lower()
-            location = str(row.get('location', '')).lower()
-            revenue = str(row.get('revenue', '')).lower()
-            
-            # Track which keywords matched in which fields
+        # Matching row ids per field and keyword, added into one score per row
+        hits = self._match_keywords(df, keywords)
+        scores = self._score_keyword_hits(hits, len(df))
+        top_rows = self._top_rows(scores, top_n)
+        
+        # Which keywords each top row matched, per field (only the top rows are looked up)
+        top_hits = {
+            field: [np.isin(top_rows, rows) for rows in hits[field]]
+            for field in FALLBACK_REASON_ORDER
+        }
+        
+        matches = []
+        for position, row_id in enumerate(top_rows):
             field_matches = {
-                'industry': [],
-                'revenue': [],
-                'stage': [],
-                'description': [],
-                'location': [],
-                'name': []
+                field: [keywords[j] for j, in_top in enumerate(top_hits[field]) if in_top[position]]
+                for field in FALLBACK_REASON_ORDER
             }
             
-            # Check each keyword across all fields
-            for keyword in keywords:
-                if keyword in industry:
-                    score += 25
-                    field_matches['industry'].append(keyword)
-                    matched_keywords.add(keyword)
-                
-                if keyword in revenue:
-                    score += 20
-                    field_matches['revenue'].append(keyword)
-                    matched_keywords.add(keyword)
-                
-                if keyword in stage:
-                    score += 15
-                    field_matches['stage'].append(keyword)
-                    matched_keywords.add(keyword)
-                
-                if keyword in description:
-                    score += 15
-                    field_matches['description'].append(keyword)
-                    matched_keywords.add(keyword)
-                
-                if keyword in location:
-                    score += 10
-                    field_matches['location'].append(keyword)
-                    matched_keywords.add(keyword)
-                
-                if keyword in name:
-                    score += 20
-                    field_matches['name'].append(keyword)
-                    matched_keywords.add(keyword)
-            
-            # Build detailed reason
-            if matched_keywords:
-                for field, kws in field_matches.items():
-                    if kws:
-                        actual_value = str(row.get(field, '')).strip()
-                        if actual_value and actual_value != 'nan' and len(actual_value) > 0:
-                            kw_str = "', '".join(kws[:2])  # Show up to 2 keywords
-                            if field == 'industry':
-                                reason_details.append(f"{field.capitalize()}: '{actual_value}' (matches '{kw_str}')")
-                            elif field == 'revenue':
-                                reason_details.append(f"Revenue: {actual_value}")
-                            elif field == 'stage':
-                                reason_details.append(f"Stage: {actual_value}")
-                            elif field == 'description' and len(reason_details) < 3:
-                                # Include a snippet of description
-                                snippet = actual_value[:80] + '...' if len(actual_value) > 80 else actual_value
-                                reason_details.append(f"Description mentions '{kw_str}'")
-                
-                if not reason_details:
-                    reason_details = ["Matches search keywords"]
+            row = df.iloc[row_id]
+            matches.append({
+                'name': row.get('name', 'Unknown'),
+                'score': int(scores[row_id]),
+                'reason': self._build_fallback_reason(row, field_matches)
+            })
+        
+        return matches
+    
+    def _match_keywords(self, df: pd.DataFrame, keywords: List[str]) -> Dict[str, List[np.ndarray]]:
+        """Per field, the sorted row ids containing each keyword (one array per keyword)"""
+        engine = self.config.get_fallback_engine()
+        index = self._get_keyword_index(df) if engine == 'index' else None
+        
+        hits = {}
+        for field, _ in FALLBACK_FIELD_WEIGHTS:
+            if index is not None:
+                # Only rows in the matching postings are touched
+                hits[field] = [index.rows_containing(field, keyword) for keyword in keywords]
+            elif field in df.columns:
+                # Same text as str(value).lower() in the row-by-row scorer
+                text = df[field].astype(str).fillna('nan').str.lower()
+                hits[field] = [np.flatnonzero(text.str.contains(keyword, regex=False).to_numpy(dtype=bool))
+                               for keyword in keywords]
             else:
-                reason_details = ["No strong keyword matches found"]
-                score = 1  # Minimal score
-            
-            # Combine reason parts
-            reason = '; '.join(reason_details[:4])  # Show up to 4 details
-            
+                hits[field] = [np.empty(0, dtype=np.int64) for _ in keywords]
+        
+        return hits
+    
+    def _score_keyword_hits(self, hits: Dict[str, List[np.ndarray]], num_rows: int) -> np.ndarray:
+        """Weighted keyword hits per row, capped at 100 (1 for rows without any hit)"""
+        scores = np.zeros(num_rows, dtype=np.int64)
+        for field, weight in FALLBACK_FIELD_WEIGHTS:
+            # Repeated keywords count once per occurrence, as in the row-by-row scorer
+            for rows in hits[field]:
+                scores[rows] += weight
+        
+        return np.where(scores > 0, np.minimum(scores, 100), 1)
+    
+    def _top_rows(self, scores: np.ndarray, top_n: int) -> np.ndarray:
+        """Row ids of the top N scores, ties in upload order (same as a stable descending sort)"""
+        if top_n <= 0 or len(scores) == 0:
+            return np.empty(0, dtype=np.int64)
+        
+        if top_n < len(scores):
+            # Every row tied with the N-th best score stays a candidate so ties resolve by position
+            threshold = np.partition(scores, len(scores) - top_n)[len(scores) - top_n]
+            candidates = np.flatnonzero(scores >= threshold)
+        else:
+            candidates = np.arange(len(scores))
+        
+        # Higher score first, then lower row id
+        order = np.lexsort((candidates, -scores[candidates]))
+        return candidates[order[:top_n]]
+    
+    def _bm25_filter(self, df: pd.DataFrame, heuristics: str, top_n: int) -> List[Dict]:
+        """Rank firms by BM25 relevance of the heuristics over the text fields"""
+        index = self._get_search_index(df, 'bm25_index', list(BM25_FIELD_WEIGHTS), BM25Index)
+        scores, terms = index.score(heuristics)
+        top_rows = self._top_rows(scores, top_n)
+        
+        # Scores are relative to the best match so they read like the other modes' percentages
+        best_score = float(scores.max()) if len(scores) else 0.0
+        query_terms = set(terms)
+        
+        matches = []
+        for row_id in top_rows:
+            row = df.iloc[row_id]
+            field_matches = {
+                field: [term for term in dict.fromkeys(tokenize(row.get(field, ''))) if term in query_terms]
+                for field in BM25_FIELD_WEIGHTS
+            }
             matches.append({
                 'name': row.get('name', 'Unknown'),
-                'score': min(score, 100),  # Cap at 100
-                'reason': reason if reason else "General match"
+                'score': round(100.0 * float(scores[row_id]) / best_score, 1) if best_score > 0 else 0.0,
+                'reason': self._build_bm25_reason(row, field_matches)
             })
         
-        # Sort by score and return top N
-        matches.sort(key=lambda x: x['score'], reverse=True)
-        return matches[:top_n]
+        return matches
+    
+    def _build_bm25_reason(self, row: pd.Series, field_matches: Dict[str, List[str]]) -> str:
+        """Explain a BM25 match from the query terms found in each field"""
+        reason_details = []
+        for field, terms in field_matches.items():
+            if not terms:
+                continue
+            term_str = "', '".join(terms[:3])
+            if field in ('industry', 'stage', 'location'):
+                reason_details.append(f"{field.capitalize()}: '{str(row.get(field, '')).strip()}' (matches '{term_str}')")
+            else:
+                reason_details.append(f"{field.capitalize()} mentions '{term_str}'")
+        
+        return '; '.join(reason_details[:4]) if reason_details else "No query terms matched"
+    
+    def _build_fallback_reason(self, row: pd.Series, field_matches: Dict[str, List[str]]) -> str:
+        """Explain a keyword match from the keywords that hit each field"""
+        reason_details = []
+        
+        # Build detailed reason
+        if any(field_matches.values()):
+            for field, kws in field_matches.items():
+                if kws:
+                    actual_value = str(row.get(field, '')).strip()
+                    if actual_value and actual_value != 'nan' and len(actual_value) > 0:
+                        kw_str = "', '".join(kws[:2])  # Show up to 2 keywords
+                        if field == 'industry':
+                            reason_details.append(f"{field.capitalize()}: '{actual_value}' (matches '{kw_str}')")
+                        elif field == 'revenue':
+                            reason_details.append(f"Revenue: {actual_value}")
+                        elif field == 'stage':
+                            reason_details.append(f"Stage: {actual_value}")
+                        elif field == 'description' and len(reason_details) < 3:
+                            reason_details.append(f"Description mentions '{kw_str}'")
+            
+            if not reason_details:
+                reason_details = ["Matches search keywords"]
+        else:
+            reason_details = ["No strong keyword matches found"]
+        
+        # Combine reason parts
+        reason = '; '.join(reason_details[:4])  # Show up to 4 details
+        return reason if reason else "General match"
+    
+    def _get_keyword_index(self, df: pd.DataFrame) -> KeywordIndex:
+        """Return the keyword index for this dataset, building it once and caching it"""
+        fields = [field for field, _ in FALLBACK_FIELD_WEIGHTS]
+        return self._get_search_index(df, 'keyword_index', fields, KeywordIndex)
+    
+    def _get_search_index(self, df: pd.DataFrame, name: str, fields: List[str], index_class: type):
+        """Return a search index over the given fields, building it once per dataset and caching it"""
+        # Only the frame process_excel loaded carries its dataset key; row subsets get a fresh index
+        dataset = df.attrs.get(DATASET_KEY_ATTR)
+        if not dataset or dataset['rows'] != len(df) or not df.index.equals(pd.RangeIndex(len(df))):
+            return index_class.build(df, fields)
+        key = dataset['key']
+        
+        index = _SEARCH_INDEXES.get((name, key))
+        if index is None and self.cache is not None:
+            stored = self.cache.get_artifact(key, name)
+            if stored is not None:
+                index = index_class.from_arrays(*stored)
+        if index is None:
+            index = index_class.build(df, fields)
+            if self.cache is not None:
+                self.cache.put_artifact(key, name, *index.to_arrays())
+        
+        # Small in-process cache so Streamlit reruns skip even the disk read
+        _SEARCH_INDEXES.pop((name, key), None)
+        _SEARCH_INDEXES[(name, key)] = index
+        while len(_SEARCH_INDEXES) > MAX_IN_MEMORY_INDEXES:
+            _SEARCH_INDEXES.pop(next(iter(_SEARCH_INDEXES)))
+        
+        return index
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline benchmark on synthetic PitchBook exports
+Times and memory-profiles each stage per dataset size and writes comparable JSON results
+Usage: python benchmark.py [--sizes 1000 10000 100000] [--format csv|xlsx] [--llm] [--compare baseline.json]
+"""
+import argparse
+import gc
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Optional
+
+# Benchmarks must not read or fill the persistent caches
+os.environ.setdefault('LLM_CACHE_MAX_ENTRIES', '0')
+os.environ.setdefault('DATASET_CACHE_MAX_MB', '0')
+
+import numpy as np
+import pandas as pd
+
+from ai_filter import AIFilter
+from config import Config
+from data_processor import ExcelProcessor
+from firm_dedup import FirmDeduplicator
+from generate_pitchbook_data import generate_firms, write_export
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_HEURISTICS = "B2B AI SaaS companies with revenue over $5M, Series A or B, based in the United States"
+DATASET_DIR = os.path.join('.cache', 'bench')
+RESULTS_DIR = os.path.join('.cache', 'benchmarks')
+
+# A stage this much slower than the baseline is reported as a regression
+DEFAULT_REGRESSION_RATIO = 1.25
+
+# Stages faster than this in the baseline are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.05
+
+
+def max_rss_mb() -> Optional[float]:
+    """Peak resident set size of the process so far (None where unsupported)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def row_count(value: Any) -> Optional[int]:
+    if isinstance(value, (pd.DataFrame, list)):
+        return len(value)
+    return None
+
+
+class StageTimer:
+    """Runs pipeline stages, recording wall time, traced peak memory, peak RSS and output rows"""
+
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.stages = {}
+
+    def run(self, name: str, func: Callable[[], Any]) -> Any:
+        gc.collect()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        value = func()
+        seconds = time.perf_counter() - started
+        self.stages[name] = {
+            'seconds': round(seconds, 4),
+            'peak_traced_mb': round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1) if self.trace_memory else None,
+            'max_rss_mb': max_rss_mb(),
+            'rows': row_count(value)
+        }
+        logging.getLogger(__name__).info(f"{name}: {seconds:.3f}s")
+        return value
+
+
+def dataset_path(rows: int, seed: int, file_format: str) -> str:
+    """Generate the synthetic export once per (rows, seed, format) and reuse it"""
+    path = os.path.join(DATASET_DIR, f"pitchbook_{rows}_{seed}.{file_format}")
+    if not os.path.exists(path):
+        os.makedirs(DATASET_DIR, exist_ok=True)
+        # Generation is not measured, and tracing it would slow it down many times over
+        tracing = tracemalloc.is_tracing()
+        tracemalloc.stop()
+        started = time.perf_counter()
+        write_export(generate_firms(rows, seed=seed), path + '.tmp', file_format)
+        os.replace(path + '.tmp', path)
+        if tracing:
+            tracemalloc.start()
+        print(f"Generated {path} in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def benchmark_size(rows: int, args: argparse.Namespace, llm_base_url: Optional[str]) -> Dict[str, Any]:
+    """Run every stage on one dataset size"""
+    path = dataset_path(rows, args.seed, args.format)
+    with open(path, 'rb') as f:
+        upload = io.BytesIO(f.read())
+
+    config = Config()
+    processor = ExcelProcessor()
+    ai_filter = AIFilter(config)
+    timer = StageTimer(trace_memory=not args.no_memory)
+
+    # process_excel's steps, timed one by one
+    raw = timer.run('read', lambda: processor._read_input(upload, 0))
+    df = timer.run('clean', lambda: processor._remove_metadata_rows(processor._clean_data(raw)))
+    del raw
+    df = timer.run('map_columns', lambda: processor._add_numeric_columns(processor._add_missing_columns(df)))
+    df = timer.run('clean_empty_names', lambda: processor.clean_empty_names(df))
+    df = timer.run('dedup', lambda: FirmDeduplicator(config.get_dedup_similarity()).deduplicate(df)[0])
+
+    heuristics = args.heuristics
+    timer.run('prefilter', lambda: ai_filter._apply_prefilter(df, heuristics))
+    timer.run('shortlist', lambda: ai_filter._apply_cascade(df, heuristics, 'keyword', args.shortlist))
+    timer.run('fallback_keyword', lambda: ai_filter._fallback_filter(df, heuristics, 10, 'keyword'))
+    timer.run('fallback_keyword_warm', lambda: ai_filter._fallback_filter(df, heuristics, 10, 'keyword'))
+    timer.run('fallback_bm25', lambda: ai_filter._fallback_filter(df, heuristics, 10, 'bm25'))
+    firms = timer.run('prepare_firm_data', lambda: ai_filter._prepare_firm_data(df))
+
+    agent = ai_filter.vc_expert
+    model = config.get_ai_model()
+    batches = timer.run('pack_batches', lambda: agent._pack_batches(firms, heuristics, model))
+    prompts = timer.run('build_expert_prompt', lambda: [agent._build_expert_prompt(batch, heuristics)
+                                                         for batch in batches])
+
+    result = {
+        'rows': rows,
+        'file_format': args.format,
+        'file_bytes': os.path.getsize(path),
+        'rows_after_cleaning': len(df),
+        'columns': len(df.columns),
+        'batches': len(batches),
+        'prompt_chars': sum(len(prompt) for prompt in prompts),
+        'stages': timer.stages
+    }
+    del firms, batches, prompts
+
+    if llm_base_url:
+        # Full filter run (prefilter -> shortlist -> VC Expert) against the fake server
+        os.environ['OPENAI_BASE_URL'] = llm_base_url
+        llm_filter = AIFilter(Config())
+        _, report = timer.run('vc_expert_fake', lambda: llm_filter.filter_firms(df, heuristics, return_report=True))
+        result['stages'] = timer.stages
+        result['llm_report'] = report.summary()
+
+    return result
+
+
+def environment() -> Dict[str, Any]:
+    """Versions and machine details needed to compare result files"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except ImportError:
+        pyarrow_version = None
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'pyarrow': pyarrow_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> int:
+    """Print per-stage time ratios against a baseline result file; returns the number of regressions"""
+    previous = {run['rows']: run for run in baseline.get('runs', [])}
+    regressions = 0
+    print(f"\nComparison with baseline ({baseline.get('environment', {}).get('git_commit')}):")
+    if baseline.get('options', {}).get('trace_memory') != results['options']['trace_memory']:
+        print("Warning: only one of the runs traced memory, which slows every stage; times are not comparable")
+    print(f"{'rows':>9}  {'stage':<24}{'baseline':>10}{'now':>10}{'ratio':>8}")
+    for run in results['runs']:
+        before = previous.get(run['rows'])
+        if before is None:
+            continue
+        for stage, stats in run['stages'].items():
+            old = before['stages'].get(stage)
+            if old is None or old['seconds'] < MIN_COMPARABLE_SECONDS:
+                continue
+            ratio = stats['seconds'] / old['seconds']
+            flag = '  REGRESSION' if ratio > threshold else ''
+            regressions += bool(flag)
+            print(f"{run['rows']:>9}  {stage:<24}{old['seconds']:>10.3f}{stats['seconds']:>10.3f}{ratio:>7.2f}x{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="Dataset sizes in rows (e.g. 1000 10000 100000 1000000)")
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv', help="Synthetic export format")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--heuristics', default=DEFAULT_HEURISTICS)
+    parser.add_argument('--shortlist', type=int, default=50, help="Shortlist size for the cascade stage")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc (its overhead inflates times)")
+    parser.add_argument('--llm', action='store_true', help="Also run the VC Expert against fake_openai_server")
+    parser.add_argument('--llm-latency', type=float, default=0.2, help="Median fake server latency (seconds)")
+    parser.add_argument('--output', help=f"Result file (default: {RESULTS_DIR}/benchmark_<time>.json)")
+    parser.add_argument('--compare', help="Baseline result file to compare stage times against")
+    parser.add_argument('--regression-ratio', type=float, default=DEFAULT_REGRESSION_RATIO)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = None
+    if args.llm:
+        from fake_openai_server import FakeServerOptions, start_server
+        server = start_server(FakeServerOptions(latency=args.llm_latency, jitter=0.3, seed=args.seed))
+        os.environ.setdefault('OPENAI_API_KEY', 'sk-fake')
+
+    if not args.no_memory:
+        tracemalloc.start()
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'options': {'format': args.format, 'seed': args.seed, 'heuristics': args.heuristics,
+                    'shortlist': args.shortlist, 'trace_memory': not args.no_memory, 'llm': args.llm},
+        'runs': []
+    }
+    try:
+        for rows in args.sizes:
+            run = benchmark_size(rows, args, server.base_url if server else None)
+            results['runs'].append(run)
+            total = sum(stage['seconds'] for stage in run['stages'].values())
+            print(f"{rows:>9,} rows: {total:.2f}s over {len(run['stages'])} stages")
+            for stage, stats in run['stages'].items():
+                memory = f"{stats['peak_traced_mb']:>9.1f} MB" if stats['peak_traced_mb'] is not None else ''
+                print(f"           {stage:<24}{stats['seconds']:>9.3f}s{memory}")
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.regression_ratio)
+        if regressions:
+            print(f"{regressions} stage(s) slower than {args.regression_ratio}x the baseline")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
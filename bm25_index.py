@@ -0,0 +1,127 @@
+"""
+BM25 Index - Sparse-matrix BM25F ranking for offline triage
+Built once per dataset; each query is one sparse mat-vec over the query's term columns
+"""
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    from scipy import sparse
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+    logging.warning("scipy not available - BM25 ranking disabled. Install with: pip install scipy")
+
+# Per-field boosts (same emphasis as the keyword fallback weights, scaled to 1.0 = location)
+BM25_FIELD_WEIGHTS = {
+    'industry': 2.5,
+    'name': 2.0,
+    'stage': 1.5,
+    'description': 1.5,
+    'location': 1.0
+}
+
+# Standard BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'have', 'in', 'into', 'is', 'it',
+    'its', 'looking', 'of', 'on', 'or', 'our', 'that', 'the', 'their', 'to', 'we', 'with', 'want', 'companies',
+    'company', 'startups', 'startup', 'firms', 'firm'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric tokens without stopwords"""
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """Documents x terms matrix of precomputed BM25F weights (CSC, so query columns slice cheaply)"""
+
+    def __init__(self, vocabulary: Dict[str, int], weights, num_rows: int):
+        self.vocabulary = vocabulary
+        self.weights = weights
+        self.num_rows = num_rows
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, fields: List[str] = None) -> 'BM25Index':
+        """Tokenize the fields once and precompute every document/term BM25F weight"""
+        if not SCIPY_AVAILABLE:
+            raise ImportError("scipy is required for BM25 ranking. Install with: pip install scipy")
+
+        field_weights = {field: BM25_FIELD_WEIGHTS.get(field, 1.0) for field in (fields or BM25_FIELD_WEIGHTS)}
+        num_rows = len(df)
+        vocabulary = {}
+        rows, cols, values = [], [], []
+        doc_lengths = np.zeros(num_rows, dtype=np.float64)
+
+        for field, boost in field_weights.items():
+            if field not in df.columns:
+                continue
+            for row_id, value in enumerate(df[field].tolist()):
+                tokens = tokenize(value)
+                doc_lengths[row_id] += boost * len(tokens)
+                for token in tokens:
+                    rows.append(row_id)
+                    cols.append(vocabulary.setdefault(token, len(vocabulary)))
+                    values.append(boost)
+
+        # Field-weighted term frequencies (duplicates are summed)
+        tf = sparse.csr_matrix(
+            (np.array(values, dtype=np.float64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(num_rows, len(vocabulary))
+        )
+        tf.sum_duplicates()
+
+        # idf from document frequencies (BM25 "plus one" variant keeps weights positive)
+        doc_freq = np.bincount(tf.indices, minlength=len(vocabulary))
+        idf = np.log(1.0 + (num_rows - doc_freq + 0.5) / (doc_freq + 0.5))
+
+        avg_length = doc_lengths.mean() if num_rows and doc_lengths.mean() > 0 else 1.0
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * doc_lengths / avg_length)
+        row_norm = np.repeat(norm, np.diff(tf.indptr))
+        tf.data = idf[tf.indices] * tf.data * (BM25_K1 + 1.0) / (tf.data + row_norm)
+
+        logging.getLogger(__name__).info(f"Built BM25 index over {num_rows} rows ({len(vocabulary)} terms)")
+        return cls(vocabulary, tf.tocsc().astype(np.float32), num_rows)
+
+    def score(self, query: str) -> Tuple[np.ndarray, List[str]]:
+        """BM25 score of every row for the query, plus the query terms found in the index"""
+        counts = {}
+        for token in tokenize(query):
+            if token in self.vocabulary:
+                counts[token] = counts.get(token, 0) + 1
+
+        if not counts:
+            return np.zeros(self.num_rows, dtype=np.float32), []
+
+        terms = list(counts)
+        term_ids = [self.vocabulary[term] for term in terms]
+        query_vector = np.array([counts[term] for term in terms], dtype=np.float32)
+        scores = self.weights[:, term_ids] @ query_vector
+        return np.asarray(scores).ravel(), terms
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """CSC arrays and JSON metadata for the dataset cache (see from_arrays)"""
+        arrays = {
+            'data': self.weights.data,
+            'indices': self.weights.indices,
+            'indptr': self.weights.indptr
+        }
+        meta = {'terms': sorted(self.vocabulary, key=self.vocabulary.get), 'num_rows': self.num_rows}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> 'BM25Index':
+        """Rebuild an index stored with to_arrays"""
+        terms = meta['terms']
+        weights = sparse.csc_matrix((arrays['data'], arrays['indices'], arrays['indptr']),
+                                    shape=(meta['num_rows'], len(terms)))
+        return cls({term: column for column, term in enumerate(terms)}, weights, meta['num_rows'])
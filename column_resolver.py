@@ -0,0 +1,189 @@
+"""
+Column Resolver - Maps export headers onto the required firm columns
+Computes fill counts once per column and remembers known layouts as schema profiles
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+# Required columns with alternative header names to look for (in priority order)
+COLUMN_MAPPINGS = {
+    'name': ['name', 'company', 'companies', 'company name', 'firm', 'organization', 'business name', 'company_name', 'firm name', 'portfolio company'],
+    'description': ['description', 'desc', 'about', 'summary', 'overview', 'business description', 'company description'],
+    'stage': ['stage', 'funding stage', 'round', 'series', 'funding round', 'investment stage'],
+    'revenue': ['revenue', 'arr', 'annual revenue', 'sales', 'mrr', 'total revenue'],
+    'industry': ['industry', 'sector', 'vertical', 'category', 'market', 'primary industry'],
+    'location': ['location', 'hq', 'headquarters', 'city', 'region', 'country', 'geography']
+}
+
+# Maximum number of header layouts remembered in the profile store
+MAX_SCHEMA_PROFILES = 200
+
+
+class SchemaProfileStore:
+    """JSON-backed store of resolved column mappings keyed by header fingerprint"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._profiles = None
+
+    def fingerprint(self, columns: List[str]) -> str:
+        """Stable fingerprint of a header layout"""
+        return hashlib.sha1('\x1f'.join(columns).encode('utf-8')).hexdigest()
+
+    def get(self, fingerprint: str) -> Optional[Dict[str, Optional[str]]]:
+        """Return the stored mapping for a header layout, if known"""
+        profile = self._load().get(fingerprint)
+        return dict(profile['mapping']) if profile else None
+
+    def put(self, fingerprint: str, mapping: Dict[str, Optional[str]]) -> None:
+        """Remember the mapping for a header layout"""
+        if not self.path:
+            return
+
+        profiles = self._load()
+        profiles[fingerprint] = {'mapping': mapping, 'updated': time.time()}
+
+        # Keep only the most recently resolved layouts
+        if len(profiles) > MAX_SCHEMA_PROFILES:
+            oldest = sorted(profiles, key=lambda key: profiles[key]['updated'])
+            for key in oldest[:len(profiles) - MAX_SCHEMA_PROFILES]:
+                del profiles[key]
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(profiles, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not save schema profiles: {e}")
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._profiles is None:
+            self._profiles = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path) as f:
+                        self._profiles = json.load(f)
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Could not read schema profiles: {e}")
+        return self._profiles
+
+
+class ColumnResolver:
+    """Resolves a source column for each missing required column"""
+
+    def __init__(self, profile_path: Optional[str] = None):
+        self.logger = logging.getLogger(__name__)
+        self.profiles = SchemaProfileStore(profile_path)
+        # One compiled alternation per target instead of a substring test per alternative
+        self._patterns = {
+            target: re.compile('|'.join(re.escape(alt) for alt in alternatives))
+            for target, alternatives in COLUMN_MAPPINGS.items()
+        }
+
+    def resolve(self, df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """
+        Pick a source column for each missing required column (None when nothing matches)
+
+        Among header matches the column with the most non-empty values wins; ties go
+        to the earlier alternative, then the earlier column. Known header layouts are
+        answered from the schema profile store without scanning any data.
+        """
+        return self._resolve([str(col) for col in df.columns], lambda col: int((df[col] != '').sum()), len(df))
+
+    def resolve_counts(self, columns: List[str], fill_counts: Dict[str, int], rows: int) -> Dict[str, Optional[str]]:
+        """Same as resolve, from non-empty counts per column gathered over a chunked read"""
+        return self._resolve(columns, lambda col: fill_counts.get(col, 0), rows)
+
+    def known_profile(self, columns: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """Saved mapping for this header layout, if every source column still exists"""
+        fingerprint = self.profiles.fingerprint(columns)
+        profile = self.profiles.get(fingerprint)
+        if profile is not None and all(source is None or source in columns for source in profile.values()):
+            self.logger.info(f"Using saved schema profile for this layout ({fingerprint[:12]})")
+            return profile
+        return None
+
+    def _resolve(self, columns: List[str], count_filled: Callable[[str], int], rows: int) -> Dict[str, Optional[str]]:
+        """Resolve missing required columns, counting non-empty values of candidate columns on demand"""
+        profile = self.known_profile(columns)
+        if profile is not None:
+            return profile
+
+        lowered = [col.lower() for col in columns]
+        fill_counts = {}
+        resolved = {}
+
+        for target_col, alternatives in COLUMN_MAPPINGS.items():
+            if target_col in columns:
+                continue
+
+            # Rank matching columns by the first alternative they contain, then by position
+            candidates = []
+            pattern = self._patterns[target_col]
+            for position, col_lower in enumerate(lowered):
+                if pattern.search(col_lower):
+                    rank = next(i for i, alt in enumerate(alternatives) if alt in col_lower)
+                    candidates.append((rank, position))
+
+            best_match = None
+            best_filled_count = 0
+            for _, position in sorted(candidates):
+                col = columns[position]
+                # Each column is scanned at most once per resolve
+                if col not in fill_counts:
+                    fill_counts[col] = count_filled(col)
+                if fill_counts[col] > best_filled_count:
+                    best_filled_count = fill_counts[col]
+                    best_match = col
+
+            if best_match:
+                resolved[target_col] = best_match
+                self.logger.info(f"Mapped '{best_match}' to '{target_col}' ({best_filled_count}/{rows} filled)")
+                continue
+
+            # Try fuzzy matching as fallback
+            similar_col = self._find_similar_column(columns, target_col)
+            if similar_col:
+                resolved[target_col] = similar_col
+                self.logger.info(f"Fuzzy matched '{similar_col}' to '{target_col}'")
+            else:
+                resolved[target_col] = None
+                self.logger.warning(f"No match found for '{target_col}', using empty string")
+
+        self.profiles.put(self.profiles.fingerprint(columns), resolved)
+        return resolved
+
+    def _find_similar_column(self, columns: List[str], target: str) -> Optional[str]:
+        """Find similar column name for mapping"""
+        target_lower = target.lower()
+
+        for col in columns:
+            col_lower = col.lower()
+            if (target_lower in col_lower or
+                    col_lower in target_lower or
+                    self._calculate_similarity(target_lower, col_lower) > 0.7):
+                return col
+
+        return None
+
+    def _calculate_similarity(self, str1: str, str2: str) -> float:
+        """Calculate simple string similarity"""
+        if not str1 or not str2:
+            return 0.0
+
+        # Set membership keeps this linear in the string lengths
+        chars2 = set(str2)
+        common_chars = sum(1 for c in str1 if c in chars2)
+        return common_chars / max(len(str1), len(str2))
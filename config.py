@@ -56,6 +56,10 @@ class Config:
         
         return key
     
+    def get_openai_base_url(self) -> Optional[str]:
+        """Get alternative OpenAI-compatible endpoint (e.g. the local fake_openai_server), None for the real API"""
+        return os.getenv('OPENAI_BASE_URL') or None
+    
     def get_gemini_key(self) -> Optional[str]:
         """Get Gemini API key from environment or secrets"""
         key = os.getenv('GEMINI_API_KEY')
@@ -117,6 +121,117 @@ class Config:
         """Get AI model to use"""
         return os.getenv('AI_MODEL', 'gpt-3.5-turbo')
     
+    def get_screening_model(self) -> str:
+        """Get cheap model that screens every firm before the strong model (empty disables two-tier routing)"""
+        return os.getenv('SCREENING_MODEL', '').strip()
+    
+    def get_promote_count(self) -> int:
+        """Get number of screened firms re-analyzed by the strong model"""
+        return int(os.getenv('PROMOTE_TOP', '20'))
+    
+    def get_promote_min_score(self) -> float:
+        """Get minimum screening score for promotion to the strong model"""
+        return float(os.getenv('PROMOTE_MIN_SCORE', '0'))
+    
+    def get_max_concurrent_batches(self) -> int:
+        """Get maximum number of VC Expert batches in flight at once"""
+        return max(1, int(os.getenv('MAX_CONCURRENT_BATCHES', '4')))
+    
+    def get_rate_limit_rpm(self) -> int:
+        """Get requests-per-minute budget per model (0 = unlimited)"""
+        return int(os.getenv('RATE_LIMIT_RPM', '500'))
+    
+    def get_rate_limit_tpm(self) -> int:
+        """Get tokens-per-minute budget per model, prompt + max completion (0 = unlimited)"""
+        return int(os.getenv('RATE_LIMIT_TPM', '200000'))
+    
+    def get_max_retries(self) -> int:
+        """Get retries per batch for rate limits and transient API errors"""
+        return max(0, int(os.getenv('MAX_RETRIES', '5')))
+    
+    def get_retry_base_delay(self) -> float:
+        """Get base delay in seconds for jittered exponential backoff"""
+        return float(os.getenv('RETRY_BASE_DELAY', '1.0'))
+    
+    def get_request_timeout(self) -> float:
+        """Get timeout in seconds for one chat completion request"""
+        return float(os.getenv('REQUEST_TIMEOUT', '120'))
+    
+    def get_prompt_format(self) -> str:
+        """Get firm encoding in VC Expert prompts: 'compact' (delimited rows) or 'verbose' (labelled blocks)"""
+        prompt_format = os.getenv('PROMPT_FORMAT', 'verbose').lower()
+        return prompt_format if prompt_format in ('compact', 'verbose') else 'verbose'
+    
+    def is_json_mode_enabled(self) -> bool:
+        """Whether VC Expert requests ask for JSON output (response_format=json_object)"""
+        return os.getenv('JSON_MODE', 'true').lower() in ('1', 'true', 'yes')
+    
+    def is_streaming_enabled(self) -> bool:
+        """Whether VC Expert completions are streamed (partial responses keep their complete results)"""
+        return os.getenv('STREAM_COMPLETIONS', 'false').lower() in ('1', 'true', 'yes')
+    
+    def get_max_completion_tokens(self) -> int:
+        """Get completion token limit per VC Expert request"""
+        return int(os.getenv('MAX_COMPLETION_TOKENS', '2000'))
+    
+    def get_context_share(self) -> float:
+        """Get share of the model's context window a request may fill (prompt + completion)"""
+        return min(1.0, max(0.1, float(os.getenv('PROMPT_CONTEXT_SHARE', '0.75'))))
+    
+    def is_prefilter_enabled(self) -> bool:
+        """Whether hard constraints from the heuristics pre-filter firms before the LLM"""
+        return os.getenv('PREFILTER_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    
+    def get_cascade_shortlist_size(self) -> int:
+        """Get number of locally top-ranked firms sent to the VC Expert (0 sends all)"""
+        return max(0, int(os.getenv('CASCADE_SHORTLIST', '0')))
+    
+    def get_fallback_engine(self) -> str:
+        """Get keyword fallback engine: 'index' (inverted index) or 'scan' (vectorized column scan)"""
+        engine = os.getenv('FALLBACK_ENGINE', 'index').lower()
+        return engine if engine in ('index', 'scan') else 'index'
+    
+    def get_fallback_ranker(self) -> str:
+        """Get default offline ranking mode: 'keyword' (weighted keyword hits) or 'bm25' (BM25 relevance)"""
+        ranker = os.getenv('FALLBACK_RANKER', 'keyword').lower()
+        return ranker if ranker in ('keyword', 'bm25') else 'keyword'
+    
+    def get_run_report_dir(self) -> str:
+        """Get directory receiving a JSON report per filter run (empty = no export)"""
+        return os.getenv('RUN_REPORT_DIR', '')
+    
+    def is_dedup_enabled(self) -> bool:
+        """Whether duplicate company rows are merged into one firm before scoring"""
+        return os.getenv('DEDUP_FIRMS', 'true').lower() in ('1', 'true', 'yes')
+    
+    def get_dedup_similarity(self) -> float:
+        """Get minimum name similarity (0-1) for merging near-duplicate firms"""
+        return float(os.getenv('DEDUP_SIMILARITY', '0.92'))
+    
+    def get_llm_cache_path(self) -> str:
+        """Get SQLite file caching VC Expert results per firm and criteria"""
+        return os.getenv('LLM_CACHE_PATH', os.path.join('.cache', 'llm_results.sqlite'))
+    
+    def get_llm_cache_ttl_seconds(self) -> float:
+        """Get how long cached VC Expert results stay valid"""
+        return float(os.getenv('LLM_CACHE_TTL_HOURS', '168')) * 3600
+    
+    def get_llm_cache_max_entries(self) -> int:
+        """Get maximum number of cached VC Expert results (0 disables the cache)"""
+        return int(os.getenv('LLM_CACHE_MAX_ENTRIES', '100000'))
+    
+    def get_dataset_cache_dir(self) -> str:
+        """Get directory for cached processed datasets"""
+        return os.getenv('DATASET_CACHE_DIR', os.path.join('.cache', 'datasets'))
+    
+    def get_dataset_cache_max_bytes(self) -> int:
+        """Get size budget for the dataset cache (0 disables caching)"""
+        return int(os.getenv('DATASET_CACHE_MAX_MB', '512')) * 1024 * 1024
+    
+    def get_schema_profile_path(self) -> str:
+        """Get file that remembers column mappings for known export layouts"""
+        return os.getenv('SCHEMA_PROFILE_PATH', os.path.join('.cache', 'schema_profiles.json'))
+    
     def validate_config(self) -> Dict[str, bool]:
         """Validate current configuration"""
         return {
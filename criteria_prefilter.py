@@ -0,0 +1,411 @@
+"""
+Criteria Prefilter - Compiles hard constraints out of free-text heuristics
+Evaluates them as vectorized masks so firms that cannot qualify never reach the LLM
+"""
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Numeric criteria: typed column (added by ExcelProcessor) -> header words that refer to it
+NUMERIC_FIELDS = {
+    'revenue_usd': r'revenue|arr|mrr|sales',
+    'valuation_usd': r'valuation|valued',
+    'total_raised_usd': r'raised|funding|capital',
+    'employee_count': r'employees|headcount|staff|team size|people',
+    'year_founded': r'founded|incorporated|established'
+}
+
+# Fields whose amounts are dollars (unit suffixes and the $M convention apply)
+MONEY_FIELDS = {'revenue_usd', 'valuation_usd', 'total_raised_usd'}
+
+# A dollar amount or count; percentages, multiples and durations/counts of other things
+# ("40%", "2x", "2 years", "100 customers") are not amounts
+AMOUNT = (r'\$?\s*(\d+(?:\.\d+)?)\s*(thousand|million|billion|bn|mm|k|m|b)?\b'
+          r'(?!\s*(?:%|x\b|times\b|(?:years?|yrs?|months?|quarters?|weeks?|days?|customers?|clients?|users?|'
+          r'countries|markets?|offices?|locations?|products?|rounds?|investors?|founders?)\b))')
+UNITS = {'thousand': 1e3, 'k': 1e3, 'million': 1e6, 'mm': 1e6, 'm': 1e6, 'billion': 1e9, 'bn': 1e9, 'b': 1e9}
+
+# Unit-less money amounts below this are read as $M (same convention as the data)
+UNITLESS_MILLIONS_BELOW = 1e5
+
+COMPARATORS = {
+    'no less than': '>=', 'not less than': '>=', 'no more than': '<=', 'not more than': '<=',
+    '>=': '>=', '≥': '>=', 'at least': '>=', 'minimum of': '>=', 'minimum': '>=', 'min': '>=', 'since': '>=',
+    '>': '>', 'over': '>', 'above': '>', 'more than': '>', 'greater than': '>', 'exceeding': '>',
+    'exceeds': '>', 'in excess of': '>', 'after': '>',
+    '<=': '<=', '≤': '<=', 'at most': '<=', 'up to': '<=', 'maximum of': '<=', 'maximum': '<=', 'max': '<=',
+    '<': '<', 'under': '<', 'below': '<', 'less than': '<', 'fewer than': '<', 'before': '<'
+}
+
+# "between X and Y" or "X-Y" / "X to Y" ("and" alone is too ambiguous to mean a range)
+RANGE_PATTERNS = [
+    re.compile(rf'\bbetween\s+{AMOUNT}\s*(?:and|-|–|to)\s*{AMOUNT}', re.IGNORECASE),
+    re.compile(rf'{AMOUNT}\s*(?:-|–|to)\s*{AMOUNT}', re.IGNORECASE)
+]
+COMPARE_PATTERN = re.compile(
+    r'(' + '|'.join(rf'\b{re.escape(op)}\b' if op[0].isalpha() else re.escape(op)
+                    for op in sorted(COMPARATORS, key=len, reverse=True)) + r')\s*' + AMOUNT,
+    re.IGNORECASE
+)
+PLUS_PATTERN = re.compile(AMOUNT + r'\s*\+', re.IGNORECASE)
+
+# Comparators written after the amount ("$200M minimum", "$400M or less")
+TRAILING_COMPARATORS = {
+    'minimum': '>=', 'min': '>=', 'or more': '>=', 'or above': '>=', 'or higher': '>=', 'or greater': '>=',
+    'and up': '>=', 'and above': '>=',
+    'maximum': '<=', 'max': '<=', 'or less': '<=', 'or below': '<=', 'or lower': '<=', 'or fewer': '<='
+}
+TRAILING_PATTERN = re.compile(
+    AMOUNT + r'\s*(' + '|'.join(re.escape(op) for op in sorted(TRAILING_COMPARATORS, key=len, reverse=True)) + r')\b',
+    re.IGNORECASE
+)
+
+# Clause boundaries, and thousands separators removed before parsing ("1,000" -> "1000")
+CLAUSE_SPLIT = re.compile(r'[;,\n]')
+THOUSANDS_SEPARATOR = re.compile(r'(?<=\d),(?=\d{3}\b)')
+
+# A term after one of these words in the same sentence is excluded, not required ("no crypto", "not B2C")
+NEGATION = re.compile(r'\b(?:no|not|non|never|without|exclud\w*|except|avoid\w*|outside)\b', re.IGNORECASE)
+# A term in a clause with one of these words is a preference, not a hard constraint ("$10M+ ARR preferred")
+HEDGE = re.compile(r'\b(?:prefer\w*|ideal(?:ly)?|nice to have|bonus|a plus|optional)\b', re.IGNORECASE)
+NEGATED_COMPARATOR = re.compile(r'\b(?:no|not)\s*$', re.IGNORECASE)
+SENTENCE_BOUNDARY = re.compile(r'[;\n()!?]|\.(?=\s|$)')
+CLAUSE_BOUNDARY = re.compile(r'[,;\n()!?]|\.(?=\s|$)')
+
+# Funding stages in order; "Series B-D", "Seed to Series B" and "Series B or later" expand over this list
+STAGE_ORDER = ['pre-seed', 'seed'] + [f"series {letter}" for letter in 'abcdefgh']
+STAGE_NAME = r'(?i:pre-?seed|seed|series\s+[a-h])\b'
+# A bare letter continuing a list ("Series A or B"); lowercase only before punctuation or "stage" so
+# "Series B and a strong team" does not read as Series A
+STAGE_LETTER = r'(?:[A-H]\b|(?i:[a-h])(?=\s*(?:$|[,;.)/]|(?i:stages?|rounds?)\b)))'
+STAGE_CONNECTOR = r'\s*(?:/|,|&|-|–|(?i:or|and|to|through))\s*'
+STAGE_PATTERN = re.compile(
+    rf'\b({STAGE_NAME}(?:{STAGE_CONNECTOR}(?:{STAGE_NAME}|{STAGE_LETTER}))*)'
+    r'(\s*\+|,?\s*(?i:or|and)\s+(?i:later|beyond|above|higher|up)\b'
+    r'|,?\s*(?i:or|and)\s+(?i:earlier|below)\b)?'
+)
+STAGE_TOKEN = re.compile(r'(?i:(pre-?seed)|(seed)|series\s+([a-h]))\b|\b([a-hA-H])\b|(-|–|\b(?i:to|through)\b)')
+
+# Stage labels accepted for each requested stage (exports often use coarse buckets)
+STAGE_ALIASES = {
+    'pre-seed': ['pre-seed', 'preseed', 'angel'],
+    'seed': ['seed', 'angel'],
+    'series a': ['series a', 'early stage'],
+    'series b': ['series b', 'early stage'],
+    'series c': ['series c', 'later stage'],
+    'series d': ['series d', 'later stage'],
+    'series e': ['series e', 'later stage'],
+    'series f': ['series f', 'later stage'],
+    'series g': ['series g', 'later stage'],
+    'series h': ['series h', 'later stage']
+}
+
+# Industry terms: label -> (trigger in the heuristics, pattern matched against firm text)
+INDUSTRY_TERMS = {
+    'AI/ML': (r'\bai\b|\bml\b|artificial intelligence|machine learning',
+              r'\bai\b|artificial intelligence|machine learning|\bml\b|deep learning|\bllm|generative|computer vision|\bnlp\b'),
+    'Fintech': (r'fintech|financial services|payments',
+                r'fintech|financial|payment|banking|lending|insurtech|wealth'),
+    'Healthcare': (r'health ?care|healthtech|medtech|digital health',
+                   r'health|medical|medtech|telemedicine|clinical|hospital|patient'),
+    'Biotech': (r'biotech|life sciences|pharma',
+                r'biotech|pharma|drug|therapeut|life sciences|genomic'),
+    'Cybersecurity': (r'cyber ?security|infosec',
+                      r'cyber|security|threat|identity'),
+    'Climate': (r'climate|clean ?tech|clean energy|renewable',
+                r'climate|clean ?tech|clean energy|renewable|solar|carbon|battery'),
+    'Edtech': (r'edtech|education',
+               r'edtech|education|learning|tutor'),
+    'Crypto': (r'crypto|blockchain|web3',
+               r'crypto|blockchain|web3|defi|token'),
+    'Robotics': (r'robotics|automation',
+                 r'robot|automation|autonomous'),
+    'SaaS': (r'\bsaas\b',
+             r'\bsaas\b|software|platform|cloud')
+}
+
+# Location terms: label -> (trigger in the heuristics, pattern matched against the location)
+# Country abbreviations are matched case-sensitively so "us" and "uk" in prose do not trigger
+US_STATES = r'\b(?:ca|ny|ma|tx|wa|il|co|ga|fl|or|tn|ut|az|dc|nj|pa|va|nc|mn|oh|mi|md)\b'
+LOCATION_TERMS = {
+    'United States': (r'\b(?:US|USA|U\.S\.(?:A\.)?)(?!\w)|(?i:united states|\bamerica\b)',
+                      r'united states|\busa?\b|america|' + US_STATES),
+    'Europe': (r'\beurope(?:an)?\b|\beu\b',
+               r'europe|united kingdom|\buk\b|england|london|germany|berlin|munich|france|paris|netherlands|amsterdam|'
+               r'sweden|stockholm|spain|madrid|barcelona|italy|ireland|dublin|switzerland|zurich|denmark|finland|'
+               r'norway|poland|portugal|lisbon|belgium|austria|estonia'),
+    'United Kingdom': (r'\bUK\b|(?i:united kingdom|\bbritain\b|\blondon\b)', r'united kingdom|\buk\b|england|london|scotland'),
+    'San Francisco Bay Area': (r'san francisco|bay area|silicon valley|\bsf\b',
+                               r'san francisco|bay area|silicon valley|palo alto|san jose|mountain view|menlo park|oakland|\bsf\b'),
+    'New York': (r'new york|\bnyc\b', r'new york|\bnyc?\b|brooklyn'),
+    'Boston': (r'\bboston\b', r'boston|cambridge, ma|\bma\b'),
+    'Los Angeles': (r'los angeles|\bla\b', r'los angeles|santa monica'),
+    'Austin': (r'\baustin\b', r'austin'),
+    'Seattle': (r'\bseattle\b', r'seattle|bellevue'),
+    'Israel': (r'\bisrael\b|tel aviv', r'israel|tel aviv'),
+    'India': (r'\bindia\b|bangalore|bengaluru', r'india|bangalore|bengaluru|mumbai|delhi|hyderabad'),
+    'Canada': (r'\bcanada\b|toronto', r'canada|toronto|vancouver|montreal'),
+    'Asia': (r'\basia\b|\bapac\b', r'asia|singapore|japan|tokyo|china|korea|seoul|india|hong kong|indonesia|vietnam')
+}
+
+CASE_SENSITIVE_LOCATIONS = {'United States', 'United Kingdom'}
+
+# Columns searched for industry terms besides the mapped industry column
+INDUSTRY_TEXT_COLUMNS = ['industry', 'description', 'verticals', 'keywords', 'primary industry sector',
+                         'primary industry group', 'emerging spaces']
+
+
+class CriteriaPrefilter:
+    """Compiles heuristics into hard constraints and applies them as vectorized boolean masks"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def compile(self, heuristics: str) -> List[Dict[str, Any]]:
+        """
+        Extract hard constraints from heuristics text
+
+        Returns a list of constraint dicts with 'kind' ('numeric', 'stage', 'industry'
+        or 'location'), the parameters needed to evaluate it and a readable 'label'.
+        Only unambiguous requirements are compiled: negated ("no crypto") and
+        preferred ("$10M+ ARR preferred") terms produce no constraint.
+        """
+        constraints = self._compile_numeric(heuristics)
+
+        stages = self._compile_stages(heuristics)
+        if stages:
+            constraints.append({'kind': 'stage', 'stages': stages,
+                                'label': f"Stage in {', '.join(s.title() for s in stages)}"})
+
+        industries = [label for label, (trigger, _) in INDUSTRY_TERMS.items()
+                      if self._is_required(heuristics, re.compile(trigger, re.IGNORECASE))]
+        if industries:
+            constraints.append({'kind': 'industry', 'terms': industries,
+                                'label': f"Industry matches {' or '.join(industries)}"})
+
+        locations = [label for label, (trigger, _) in LOCATION_TERMS.items()
+                     if self._is_required(heuristics, re.compile(
+                         trigger, 0 if label in CASE_SENSITIVE_LOCATIONS else re.IGNORECASE))]
+        if locations:
+            constraints.append({'kind': 'location', 'terms': locations,
+                                'label': f"Location in {' or '.join(locations)}"})
+
+        return constraints
+
+    def apply(self, df: pd.DataFrame, constraints: List[Dict[str, Any]]) -> Tuple[pd.DataFrame, List[Dict[str, Any]]]:
+        """
+        Keep rows that can still satisfy every constraint
+
+        Missing values never disqualify a firm: unknown revenue, stage or location
+        passes so the LLM can judge it. Returns the filtered frame and the
+        constraints annotated with how many rows each one let through.
+        """
+        mask = np.ones(len(df), dtype=bool)
+        applied = []
+
+        for constraint in constraints:
+            passed = self._evaluate(df, constraint)
+            if passed is None:
+                # The data has nothing to check this constraint against
+                continue
+            mask &= passed
+            applied.append(dict(constraint, passed=int(passed.sum())))
+
+        self.logger.info(f"Prefilter kept {int(mask.sum())}/{len(df)} firms using {len(applied)} constraints")
+        return df[mask].reset_index(drop=True), applied
+
+    def _is_required(self, text: str, pattern: re.Pattern) -> bool:
+        """True if the pattern occurs at least once neither negated nor hedged"""
+        return any(not self._is_soft(text, m.start(), m.end()) for m in pattern.finditer(text))
+
+    def _is_soft(self, text: str, start: int, end: int) -> bool:
+        """Whether the text at start:end is negated in its sentence or hedged in its clause"""
+        sentence_start = max((m.end() for m in SENTENCE_BOUNDARY.finditer(text, 0, start)), default=0)
+        if NEGATION.search(text, sentence_start, start):
+            return True
+        clause_start = max((m.end() for m in CLAUSE_BOUNDARY.finditer(text, 0, start)), default=0)
+        clause_end = CLAUSE_BOUNDARY.search(text, end)
+        return bool(HEDGE.search(text, clause_start, clause_end.start() if clause_end else len(text)))
+
+    def _compile_numeric(self, heuristics: str) -> List[Dict[str, Any]]:
+        """Find comparisons and ranges and attach each to the nearest numeric field word"""
+        constraints = []
+        heuristics = THOUSANDS_SEPARATOR.sub('', heuristics)
+        for line in heuristics.split('\n'):
+            # A clause without a field word continues the previous one ("Valuation: $200M minimum, $400M maximum")
+            previous_field = None
+            for clause in CLAUSE_SPLIT.split(line):
+                fields = [(m.start(), m.end(), field)
+                          for field, pattern in NUMERIC_FIELDS.items()
+                          for m in re.finditer(pattern, clause, re.IGNORECASE)]
+                if fields:
+                    previous_field = max(fields)[2]
+                elif previous_field:
+                    fields = [(0, 0, previous_field)]
+                else:
+                    continue
+                if not HEDGE.search(clause):
+                    constraints.extend(self._compile_clause(clause, fields))
+        return constraints
+
+    def _compile_clause(self, clause: str, fields: List[Tuple[int, int, str]]) -> List[Dict[str, Any]]:
+        """Numeric constraints of one clause: ranges, then trailing, leading and '+' comparisons"""
+        constraints = []
+        taken = []
+
+        def free(match) -> bool:
+            return not any(match.start() < end and start < match.end() for start, end in taken)
+
+        for match in (m for pattern in RANGE_PATTERNS for m in pattern.finditer(clause)):
+            if not free(match):
+                continue
+            field = self._nearest_field(fields, match)
+            unit = match.group(2) or match.group(4)
+            low = self._amount(match.group(1), match.group(2) or unit, field)
+            high = self._amount(match.group(3), match.group(4), field)
+            constraints.append(self._numeric(field, '>=', low))
+            constraints.append(self._numeric(field, '<=', high))
+            taken.append((match.start(), match.end()))
+
+        for match in TRAILING_PATTERN.finditer(clause):
+            if not free(match):
+                continue
+            field = self._nearest_field(fields, match)
+            op = TRAILING_COMPARATORS[match.group(3).lower()]
+            constraints.append(self._numeric(field, op, self._amount(match.group(1), match.group(2), field)))
+            taken.append((match.start(), match.end()))
+
+        for match in COMPARE_PATTERN.finditer(clause):
+            if not free(match):
+                continue
+            taken.append((match.start(), match.end()))
+            if NEGATED_COMPARATOR.search(clause, 0, match.start()):
+                # "not over $5M": leave it to the LLM rather than guess the inverse
+                continue
+            field = self._nearest_field(fields, match)
+            op = COMPARATORS[match.group(1).lower()]
+            constraints.append(self._numeric(field, op, self._amount(match.group(2), match.group(3), field)))
+
+        for match in PLUS_PATTERN.finditer(clause):
+            if not free(match):
+                continue
+            field = self._nearest_field(fields, match)
+            constraints.append(self._numeric(field, '>=', self._amount(match.group(1), match.group(2), field)))
+
+        return constraints
+
+    def _nearest_field(self, fields: List[Tuple[int, int, str]], match) -> str:
+        """Field word closest to a numeric expression (before or after it)"""
+        def distance(field):
+            start, end, _ = field
+            if end <= match.start():
+                return match.start() - end
+            if start >= match.end():
+                return start - match.end()
+            return 0
+        return min(fields, key=distance)[2]
+
+    def _amount(self, number: str, unit: str, field: str) -> float:
+        """Convert a number and optional unit into the field's scale"""
+        value = float(number)
+        if unit:
+            return value * UNITS[unit.lower()]
+        if field in MONEY_FIELDS and value < UNITLESS_MILLIONS_BELOW:
+            return value * 1e6
+        return value
+
+    def _numeric(self, field: str, op: str, value: float) -> Dict[str, Any]:
+        if field in MONEY_FIELDS:
+            shown = self._format_usd(value)
+        else:
+            shown = f"{value:g}"
+        return {'kind': 'numeric', 'field': field, 'op': op, 'value': value, 'label': f"{field} {op} {shown}"}
+
+    def _format_usd(self, value: float) -> str:
+        for scale, suffix in ((1e9, 'B'), (1e6, 'M'), (1e3, 'K')):
+            if value >= scale:
+                return f"${value / scale:g}{suffix}"
+        return f"${value:g}"
+
+    def _compile_stages(self, heuristics: str) -> List[str]:
+        """Expand 'Series A/B', 'Series B-D', 'Seed to Series B' and 'Series B or later' into stage names"""
+        found = set()
+        for match in STAGE_PATTERN.finditer(heuristics):
+            if self._is_soft(heuristics, match.start(), match.end()):
+                continue
+            positions = []
+            in_range = False
+            for token in STAGE_TOKEN.finditer(match.group(1)):
+                if token.group(5):
+                    in_range = True
+                    continue
+                if token.group(1):
+                    position = 0
+                elif token.group(2):
+                    position = 1
+                else:
+                    position = STAGE_ORDER.index(f"series {(token.group(3) or token.group(4)).lower()}")
+                if in_range and positions and position > positions[-1]:
+                    positions.extend(range(positions[-1] + 1, position))
+                positions.append(position)
+                in_range = False
+
+            suffix = (match.group(2) or '').lower()
+            if '+' in suffix or any(word in suffix for word in ('later', 'beyond', 'above', 'higher', 'up')):
+                positions.extend(range(max(positions), len(STAGE_ORDER)))
+            elif suffix:
+                positions.extend(range(0, min(positions)))
+            found.update(positions)
+        return [STAGE_ORDER[position] for position in sorted(found)]
+
+    def _evaluate(self, df: pd.DataFrame, constraint: Dict[str, Any]):
+        """Boolean numpy mask for one constraint, or None when the data cannot be checked"""
+        kind = constraint['kind']
+
+        if kind == 'numeric':
+            column = constraint['field']
+            if column not in df.columns or df[column].isna().all():
+                return None
+            values = df[column].to_numpy(dtype='float64')
+            with np.errstate(invalid='ignore'):
+                if constraint['op'] == '>':
+                    passed = values > constraint['value']
+                elif constraint['op'] == '>=':
+                    passed = values >= constraint['value']
+                elif constraint['op'] == '<':
+                    passed = values < constraint['value']
+                else:
+                    passed = values <= constraint['value']
+            return passed | np.isnan(values)
+
+        if kind == 'stage':
+            labels = [alias for stage in constraint['stages'] for alias in STAGE_ALIASES[stage]]
+            pattern = '|'.join(re.escape(label) for label in labels)
+            return self._text_mask(df, ['stage'], pattern)
+
+        if kind == 'industry':
+            pattern = '|'.join(INDUSTRY_TERMS[term][1] for term in constraint['terms'])
+            return self._text_mask(df, INDUSTRY_TEXT_COLUMNS, pattern)
+
+        pattern = '|'.join(LOCATION_TERMS[term][1] for term in constraint['terms'])
+        return self._text_mask(df, ['location'], pattern)
+
+    def _text_mask(self, df: pd.DataFrame, columns: List[str], pattern: str):
+        """Rows where any column matches the pattern, or where all those columns are empty"""
+        columns = [col for col in columns if col in df.columns]
+        if not columns:
+            return None
+
+        matched = np.zeros(len(df), dtype=bool)
+        known = np.zeros(len(df), dtype=bool)
+        for col in columns:
+            text = df[col].astype(str).fillna('')
+            matched |= text.str.contains(pattern, case=False, regex=True, na=False).to_numpy(dtype=bool)
+            known |= (text.str.strip() != '').to_numpy(dtype=bool)
+
+        if not known.any():
+            return None
+        return matched | ~known
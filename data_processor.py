@@ -1,43 +1,124 @@
+import csv
+import numpy as np
 import pandas as pd
 import streamlit as st
-from typing import Dict, List, Any
+from itertools import chain, islice
+from openpyxl import load_workbook
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple
 import logging
+from column_resolver import ColumnResolver
+from dataset_cache import DATASET_KEY_ATTR, DatasetCache
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Number of leading rows inspected when auto-detecting the header row
+HEADER_PEEK_ROWS = 30
+
+# String dtype for cleaned columns (Arrow-backed when pyarrow is installed)
+STRING_DTYPE = pd.StringDtype('pyarrow') if PYARROW_AVAILABLE else pd.StringDtype()
+
+# Cell values treated as missing
+NULL_STRINGS = ['nan', 'None', 'NaN', 'NAN']
+
+# Columns with at most this share of distinct values are stored as categoricals
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Typed numeric columns derived from text fields: target -> (source header alternatives, parser)
+NUMERIC_COLUMNS = {
+    'revenue_usd': (['revenue'], 'money'),
+    'total_raised_usd': (['total raised'], 'money'),
+    'valuation_usd': (['post valuation', 'last financing valuation', 'first financing valuation', 'valuation'], 'money'),
+    'employee_count': (['employees'], 'count'),
+    'year_founded': (['year founded', 'founded'], 'year')
+}
+
+# Amounts anchored to a currency marker or a unit: "$1.5B", "USD 40", "500K", "2M ARR", "12.5 million"
+# (commas removed and text lowercased beforehand); other numbers in the cell ("FY2023: $5M") are ignored
+MONEY_UNIT = r'thousand|million|billion|bn|mm|k|m|b'
+MONEY_PATTERN = (rf'(?:[$€£]|\b(?:usd|eur|gbp)\b)\s*(?P<num>\d+(?:\.\d+)?)\s*(?P<unit>{MONEY_UNIT})?\b'
+                 rf'|(?P<bare>\d+(?:\.\d+)?)\s*(?P<bare_unit>{MONEY_UNIT})\b')
+MONEY_UNITS = {'thousand': 1e3, 'k': 1e3, 'million': 1e6, 'mm': 1e6, 'm': 1e6, 'billion': 1e9, 'bn': 1e9, 'b': 1e9}
+
+# A cell holding only a number (PitchBook's numeric financial columns)
+PLAIN_NUMBER_PATTERN = r'\s*\$?\s*(\d+(?:\.\d+)?)\s*'
+
+# Ranges ("50-100", "$10M to $20M", "51-200 employees") have no single value and are left missing
+RANGE_PATTERN = rf'\d(?:\.\d+)?\s*(?:{MONEY_UNIT})?\s*(?:-|–|\bto\b)\s*[$€£]?\s*\d'
+
+# PitchBook reports financials in $M, so unit-less amounts below this are read as millions
+UNITLESS_MILLIONS_BELOW = 1e5
+
+# Rows per chunk in the chunked (bounded-memory) pipeline
+DEFAULT_CHUNK_ROWS = 50000
+
+# Bytes read from the start of a CSV upload for header detection
+CSV_PEEK_BYTES = 64 * 1024
+
+# Leading magic bytes of the supported binary formats
+FILE_SIGNATURES = [
+    (b'PK\x03\x04', 'xlsx'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'xls'),
+    (b'PAR1', 'parquet'),
+    (b'ARROW1', 'arrow'),
+    (b'\xff\xff\xff\xff', 'arrow_stream'),
+]
 
 class ExcelProcessor:
     """Handles Excel file processing and data validation"""
     
-    def __init__(self):
+    def __init__(self, cache: Optional[DatasetCache] = None, resolver: Optional[ColumnResolver] = None):
         self.logger = logging.getLogger(__name__)
+        self.cache = cache
+        self.resolver = resolver or ColumnResolver()
     
-    def process_excel(self, uploaded_file, skip_rows: int = 0) -> pd.DataFrame:
+    def process_excel(self, uploaded_file, skip_rows: int = 0,
+                      column_mapping: Optional[Dict[str, str]] = None) -> pd.DataFrame:
         """
-        Process uploaded Excel file and return cleaned DataFrame
+        Process uploaded file and return cleaned DataFrame
+        
+        Excel (xlsx), CSV, Parquet and Arrow IPC inputs are detected from their
+        magic bytes and go through the same cleaning and column mapping.
         
         Args:
             uploaded_file: Streamlit uploaded file object
             skip_rows: Number of metadata rows to skip (default: auto-detect)
+            column_mapping: Manual overrides of target column -> source column
             
         Returns:
             pd.DataFrame: Processed firm data
         """
         try:
-            # Try to auto-detect header row if skip_rows not specified
-            if skip_rows == 0:
-                skip_rows = self._detect_header_row(uploaded_file)
-            
             # Reset file pointer
             uploaded_file.seek(0)
             
-            # Read Excel file, skipping metadata rows
-            if skip_rows > 0:
-                df = pd.read_excel(uploaded_file, engine='openpyxl', skiprows=skip_rows)
-            else:
-                df = pd.read_excel(uploaded_file, engine='openpyxl')
+            # Reruns of the same upload with the same options are served from the cache
+            cache_key = None
+            if self.cache is not None:
+                cache_key = self.cache.make_key(uploaded_file.read(), skip_rows, column_mapping)
+                uploaded_file.seek(0)
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return self._tag_dataset(cached, cache_key)
+            
+            df = self._read_input(uploaded_file, skip_rows)
             
             # Clean and validate data
             df = self._clean_data(df)
             df = self._remove_metadata_rows(df)
             df = self._add_missing_columns(df)
+            df = self._apply_column_mapping(df, column_mapping)
+            df = self._add_numeric_columns(df)
+            
+            if cache_key is not None:
+                self.cache.put(cache_key, df)
+                df = self._tag_dataset(df, cache_key)
             
             return df
             
@@ -45,12 +126,350 @@ class ExcelProcessor:
             self.logger.error(f"Error processing Excel file: {str(e)}")
             raise Exception(f"Failed to process Excel file: {str(e)}")
     
-    def _detect_header_row(self, uploaded_file) -> int:
-        """Detect which row contains the actual column headers"""
+    def _tag_dataset(self, df: pd.DataFrame, cache_key: str) -> pd.DataFrame:
+        """Record the dataset key so search indexes are built once per dataset, not hashed per query"""
+        df.attrs[DATASET_KEY_ATTR] = {'key': cache_key, 'rows': len(df)}
+        return df
+    
+    def iter_chunks(self, uploaded_file, skip_rows: int = 0, chunk_size: int = DEFAULT_CHUNK_ROWS,
+                    column_mapping: Optional[Dict[str, str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Process an upload in fixed-size chunks with bounded memory
+        
+        Header detection runs once on the first rows. The required-column mapping
+        is resolved before the first chunk is yielded, from a saved schema profile
+        or from non-empty counts over the whole upload (one extra read pass), so
+        every chunk gets the same mapping as process_excel would pick.
+        
+        Args:
+            uploaded_file: File-like object (xlsx, CSV, Parquet or Arrow IPC)
+            skip_rows: Number of metadata rows to skip (default: auto-detect)
+            chunk_size: Maximum rows per yielded chunk
+            column_mapping: Manual overrides of target column -> source column
+            
+        Yields:
+            pd.DataFrame: Cleaned, mapped chunks of firm data
+        """
+        resolved = self._resolve_chunked_columns(uploaded_file, skip_rows, chunk_size)
+        
+        for chunk in self._iter_clean_chunks(uploaded_file, skip_rows, chunk_size):
+            chunk = self._fill_missing_columns(chunk, resolved)
+            chunk = self._apply_column_mapping(chunk, column_mapping)
+            chunk = self._add_numeric_columns(chunk)
+            
+            yield chunk
+    
+    def _iter_clean_chunks(self, uploaded_file, skip_rows: int, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Non-empty chunks with cleaned column names and values and metadata rows removed"""
+        uploaded_file.seek(0)
+        columns = None
+        
+        for chunk in self._iter_raw_chunks(uploaded_file, skip_rows, chunk_size):
+            if columns is None:
+                columns = self._clean_column_names(chunk).columns.tolist()
+            else:
+                chunk.columns = columns
+            
+            # Categories would differ between chunks, so chunks keep plain string columns
+            chunk = self._clean_values(chunk.dropna(how='all'), categorize=False)
+            chunk = self._remove_metadata_rows(chunk)
+            if len(chunk) > 0:
+                yield chunk
+    
+    def _resolve_chunked_columns(self, uploaded_file, skip_rows: int, chunk_size: int) -> Dict[str, Optional[str]]:
+        """Resolve the required-column mapping for a chunked read from whole-upload fill counts"""
+        columns = None
+        fill_counts = None
+        rows = 0
+        for chunk in self._iter_clean_chunks(uploaded_file, skip_rows, chunk_size):
+            if columns is None:
+                columns = [str(col) for col in chunk.columns]
+                profile = self.resolver.known_profile(columns)
+                if profile is not None:
+                    return profile
+                fill_counts = pd.Series(0, index=chunk.columns)
+            fill_counts += (chunk != '').sum()
+            rows += len(chunk)
+        
+        if columns is None:
+            return {}
+        return self.resolver.resolve_counts(columns, {str(col): int(n) for col, n in fill_counts.items()}, rows)
+    
+    def process_to_parquet(self, uploaded_file, output_path: str, skip_rows: int = 0,
+                           chunk_size: int = DEFAULT_CHUNK_ROWS,
+                           column_mapping: Optional[Dict[str, str]] = None) -> int:
+        """Stream an upload through the chunked pipeline into a Parquet file, returning the row count"""
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to write Parquet output. Install with: pip install pyarrow")
+        
+        writer = None
+        total_rows = 0
+        try:
+            for chunk in self.iter_chunks(uploaded_file, skip_rows, chunk_size, column_mapping):
+                table = pa.Table.from_pandas(chunk, schema=writer.schema if writer else None, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                total_rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        
+        self.logger.info(f"Wrote {total_rows} processed rows to {output_path}")
+        return total_rows
+    
+    def detect_format(self, uploaded_file) -> str:
+        """Detect the upload format from its magic bytes ('xlsx', 'parquet', 'arrow', 'arrow_stream' or 'csv')"""
+        uploaded_file.seek(0)
+        head = uploaded_file.read(8)
+        uploaded_file.seek(0)
+        
+        for signature, file_format in FILE_SIGNATURES:
+            if head.startswith(signature):
+                if file_format == 'xls':
+                    # Legacy OLE2 workbooks would otherwise be parsed as CSV garbage
+                    raise ValueError("Legacy .xls workbooks are not supported - save the file as .xlsx or CSV")
+                return file_format
+        
+        # Anything else is treated as delimited text
+        return 'csv'
+    
+    def _read_input(self, uploaded_file, skip_rows: int = 0) -> pd.DataFrame:
+        """Read the upload into a raw DataFrame using the reader for its format"""
+        file_format = self.detect_format(uploaded_file)
+        self.logger.info(f"Detected input format: {file_format}")
+        
+        if file_format == 'xlsx':
+            # Read the workbook once: header detection and data share one row stream
+            return self._read_excel_single_pass(uploaded_file, skip_rows)
+        if file_format == 'csv':
+            return self._read_csv(uploaded_file, skip_rows)
+        
+        if not PYARROW_AVAILABLE:
+            raise ImportError(f"pyarrow is required to read {file_format} files. Install with: pip install pyarrow")
+        
+        # Columnar formats carry their own schema, so there is no header row to detect
+        if file_format == 'parquet':
+            table = pq.read_table(uploaded_file)
+        elif file_format == 'arrow':
+            table = pa_ipc.open_file(uploaded_file).read_all()
+        else:
+            table = pa_ipc.open_stream(uploaded_file).read_all()
+        
+        return table.to_pandas()
+    
+    def _read_csv(self, uploaded_file, skip_rows: int = 0) -> pd.DataFrame:
+        """Read a CSV upload, detecting the header row from the first lines"""
+        peek = self._peek_csv_rows(uploaded_file)
+        if skip_rows == 0:
+            skip_rows = self._detect_header_row(peek)
+        
+        skipped = []
+        if PYARROW_AVAILABLE:
+            # Every column as text, like the chunked reader: no '6' -> '6.0', no lost leading zeros
+            table = pa_csv.read_csv(
+                uploaded_file,
+                read_options=pa_csv.ReadOptions(skip_rows=skip_rows),
+                parse_options=self._csv_parse_options(skipped),
+                convert_options=pa_csv.ConvertOptions(column_types=self._csv_text_columns(peek, skip_rows))
+            )
+            df = table.to_pandas()
+        else:
+            df = pd.read_csv(uploaded_file, encoding='utf-8-sig', skiprows=skip_rows, dtype=str,
+                             keep_default_na=False, engine='python', on_bad_lines=skipped.append)
+        self._log_skipped_rows(skipped)
+        return df
+    
+    def _csv_text_columns(self, peek: List[List[str]], skip_rows: int) -> Dict[str, Any]:
+        """Arrow column types reading every header column of a CSV upload as string"""
+        if skip_rows < len(peek):
+            return {name: pa.string() for name in peek[skip_rows]}
+        return {}
+    
+    def _csv_parse_options(self, skipped: List):
+        """Arrow CSV parse options that skip malformed rows, collecting them in skipped"""
+        def skip_row(row):
+            # Metadata rows below the header have fewer fields - drop them instead of failing
+            skipped.append(row)
+            return 'skip'
+        return pa_csv.ParseOptions(invalid_row_handler=skip_row)
+    
+    def _log_skipped_rows(self, skipped: List) -> None:
+        """Warn about CSV rows dropped for having the wrong number of fields"""
+        if not skipped:
+            return
+        first = skipped[0]
+        # Arrow passes InvalidRow objects, the pandas fallback the row's fields
+        text = getattr(first, 'text', None) or ','.join(str(field) for field in first)
+        line = getattr(first, 'number', None)
+        where = f" (first at line {line})" if line is not None else ""
+        self.logger.warning(f"Skipped {len(skipped)} malformed CSV rows{where}: {text[:80]!r}")
+    
+    def _peek_csv_rows(self, uploaded_file) -> List[List[str]]:
+        """Parse the first rows of a CSV upload without consuming the file"""
+        head = uploaded_file.read(CSV_PEEK_BYTES).decode('utf-8-sig', errors='replace')
+        uploaded_file.seek(0)
+        lines = head.splitlines()
+        if len(head) == CSV_PEEK_BYTES:
+            lines = lines[:-1]  # Last line may be cut off mid-row
+        return list(islice(csv.reader(lines), HEADER_PEEK_ROWS))
+    
+    def _iter_raw_chunks(self, uploaded_file, skip_rows: int, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Yield uncleaned DataFrame chunks of at most chunk_size rows from any supported format"""
+        file_format = self.detect_format(uploaded_file)
+        self.logger.info(f"Detected input format: {file_format} (chunked, {chunk_size} rows per chunk)")
+        
+        if file_format == 'xlsx':
+            yield from self._iter_excel_chunks(uploaded_file, skip_rows, chunk_size)
+        elif file_format == 'csv':
+            yield from self._iter_csv_chunks(uploaded_file, skip_rows, chunk_size)
+        elif not PYARROW_AVAILABLE:
+            raise ImportError(f"pyarrow is required to read {file_format} files. Install with: pip install pyarrow")
+        elif file_format == 'parquet':
+            batches = pq.ParquetFile(uploaded_file).iter_batches(batch_size=chunk_size)
+            yield from self._slice_batches(batches, chunk_size)
+        elif file_format == 'arrow':
+            reader = pa_ipc.open_file(uploaded_file)
+            batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+            yield from self._slice_batches(batches, chunk_size)
+        else:
+            yield from self._slice_batches(pa_ipc.open_stream(uploaded_file), chunk_size)
+    
+    def _slice_batches(self, batches: Iterable, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Convert Arrow record batches to DataFrames of at most chunk_size rows"""
+        for batch in batches:
+            for offset in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(offset, chunk_size).to_pandas()
+    
+    def _iter_csv_chunks(self, uploaded_file, skip_rows: int, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Stream a CSV upload in chunks, reading every column as text"""
+        peek = self._peek_csv_rows(uploaded_file)
+        if skip_rows == 0:
+            skip_rows = self._detect_header_row(peek)
+        
+        skipped = []
+        if not PYARROW_AVAILABLE:
+            yield from pd.read_csv(uploaded_file, encoding='utf-8-sig', skiprows=skip_rows, dtype=str,
+                                   keep_default_na=False, engine='python', on_bad_lines=skipped.append,
+                                   chunksize=chunk_size)
+            self._log_skipped_rows(skipped)
+            return
+        
+        # Type inference on the first block can break on later blocks, so read everything as text
+        reader = pa_csv.open_csv(
+            uploaded_file,
+            read_options=pa_csv.ReadOptions(skip_rows=skip_rows),
+            parse_options=self._csv_parse_options(skipped),
+            convert_options=pa_csv.ConvertOptions(column_types=self._csv_text_columns(peek, skip_rows))
+        )
+        yield from self._slice_batches(reader, chunk_size)
+        self._log_skipped_rows(skipped)
+    
+    def _read_excel_single_pass(self, uploaded_file, skip_rows: int = 0) -> pd.DataFrame:
+        """Open the workbook once in read-only mode and build the DataFrame from its row stream"""
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True, keep_links=False)
         try:
-            # Read first 30 rows without headers to inspect
-            df_peek = pd.read_excel(uploaded_file, engine='openpyxl', header=None, nrows=30)
+            header, body = self._excel_header_and_body(workbook, skip_rows)
+            return self._rows_to_dataframe(header, body)
+        finally:
+            workbook.close()
+    
+    def _iter_excel_chunks(self, uploaded_file, skip_rows: int, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """Stream a workbook in chunks of rows, with the column count fixed from the header and first rows"""
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True, keep_links=False)
+        try:
+            header, body = self._excel_header_and_body(workbook, skip_rows)
+            header = self._trim_row(header)
+            width = len(header)
+            columns = None
+            truncated_rows = 0
             
+            while True:
+                rows = [self._trim_row(row) for row in islice(body, chunk_size)]
+                if not rows:
+                    break
+                if columns is None:
+                    width = max([width] + [len(row) for row in rows[:HEADER_PEEK_ROWS]])
+                    columns = self._make_column_names(header, width)
+                # Trimmed rows only run past the width when they hold values there
+                truncated_rows += sum(len(row) > width for row in rows)
+                rows = [row[:width] + [None] * (width - len(row)) for row in rows]
+                yield pd.DataFrame(rows, columns=columns)
+            
+            if truncated_rows:
+                self.logger.warning(
+                    f"Dropped values beyond column {width} in {truncated_rows} rows - the header and first "
+                    f"{HEADER_PEEK_ROWS} rows are narrower; load the file without chunking to keep them"
+                )
+        finally:
+            workbook.close()
+    
+    def _excel_header_and_body(self, workbook, skip_rows: int = 0) -> Tuple[tuple, Iterator]:
+        """Locate the header row in the first worksheet and return it with an iterator over the data rows"""
+        sheet = workbook.worksheets[0]
+        # Exported files often carry a wrong <dimension>, which truncates read-only rows
+        sheet.reset_dimensions()
+        rows = sheet.iter_rows(values_only=True)
+        
+        # Peek at the first rows for header detection without re-opening the file
+        peek = list(islice(rows, HEADER_PEEK_ROWS))
+        if skip_rows == 0:
+            skip_rows = self._detect_header_row(peek)
+        
+        if skip_rows < len(peek):
+            return peek[skip_rows], chain(peek[skip_rows + 1:], rows)
+        
+        # Manual skip beyond the peeked rows - keep consuming the same iterator
+        for _ in islice(rows, skip_rows - len(peek)):
+            pass
+        return next(rows, ()), rows
+    
+    def _rows_to_dataframe(self, header: Iterable, body: Iterable) -> pd.DataFrame:
+        """Build a DataFrame from a header row and data rows (mirrors pd.read_excel conventions)"""
+        header = self._trim_row(header)
+        records = []
+        last_row_with_data = -1
+        width = len(header)
+        
+        for row in body:
+            row = self._trim_row(row)
+            if row:
+                last_row_with_data = len(records)
+                width = max(width, len(row))
+            records.append(row)
+        
+        # Drop trailing empty rows, pad ragged rows to the widest row
+        records = [row + [None] * (width - len(row)) for row in records[:last_row_with_data + 1]]
+        
+        return pd.DataFrame(records, columns=self._make_column_names(header, width))
+    
+    def _make_column_names(self, header: List[Any], width: int) -> List[str]:
+        """Turn header cells into column names, naming blanks 'Unnamed: i' and mangling duplicates"""
+        columns = []
+        seen = {}
+        for i in range(width):
+            value = header[i] if i < len(header) else None
+            col = str(value) if value is not None and str(value).strip() else f"Unnamed: {i}"
+            # Mangle duplicate headers the same way pandas does ("Revenue", "Revenue.1")
+            if col in seen:
+                seen[col] += 1
+                col = f"{col}.{seen[col]}"
+            else:
+                seen[col] = 0
+            columns.append(col)
+        
+        return columns
+    
+    def _trim_row(self, row: Iterable) -> List[Any]:
+        """Convert a worksheet row to a list without trailing empty cells"""
+        values = [None if (isinstance(cell, str) and cell == '') else cell for cell in row]
+        while values and values[-1] is None:
+            values.pop()
+        return values
+    
+    def _detect_header_row(self, rows: List[tuple]) -> int:
+        """Detect which row contains the actual column headers"""
+        try:
             # Look for common company data column names
             company_keywords = ['name', 'company', 'firm', 'organization', 'business', 'companies']
             metadata_keywords = ['downloaded', 'created', 'search', 'criteria', 'link', 'export', 'report']
@@ -58,9 +477,9 @@ class ExcelProcessor:
             best_header_row = 0
             max_data_columns = 0
             
-            for idx, row in df_peek.iterrows():
+            for idx, row in enumerate(rows):
                 # Convert row to strings
-                row_values = [str(cell).lower().strip() for cell in row if pd.notna(cell) and str(cell).strip()]
+                row_values = [str(cell).lower().strip() for cell in row if cell is not None and str(cell).strip()]
                 row_str = ' '.join(row_values)
                 
                 # Skip obvious metadata rows
@@ -158,6 +577,10 @@ class ExcelProcessor:
         rows_removed = len(df) - len(df_cleaned)
         if rows_removed > 0:
             self.logger.info(f"Removed {rows_removed} rows with invalid/empty names")
+            # Same upload, same cleaning: the cleaned frame is a dataset of its own
+            dataset = df.attrs.get(DATASET_KEY_ATTR)
+            if dataset and dataset['rows'] == len(df):
+                df_cleaned = self._tag_dataset(df_cleaned, f"{dataset['key']}.names")
         
         return df_cleaned
     
@@ -206,81 +629,114 @@ class ExcelProcessor:
         # Clean column names
         df = self._clean_column_names(df)
         
-        # Convert to string first (this converts NaN to 'nan')
-        for col in df.columns:
-            df[col] = df[col].astype(str)
+        return self._clean_values(df)
+    
+    def _clean_values(self, df: pd.DataFrame, categorize: bool = True) -> pd.DataFrame:
+        """
+        Normalize cell values to compact string columns, with missing values as ''
         
-        # Now replace 'nan' strings with empty strings
-        df = df.replace(['nan', 'None', 'NaN', 'NAN'], '')
+        Columns become Arrow-backed strings; nulls are filled directly instead of
+        round-tripping through 'nan' strings. When categorize is set, low-cardinality
+        columns (stage, industry, location, business status, ...) become categoricals.
+        """
+        cleaned = {}
+        for col in df.columns:
+            series = df[col].astype(STRING_DTYPE).fillna('')
+            
+            # Literal placeholder cells from the export count as missing too
+            series = series.mask(series.isin(NULL_STRINGS), '')
+            
+            if categorize and len(series) > 0 and series.nunique() <= len(series) * CATEGORY_MAX_UNIQUE_RATIO:
+                series = series.astype('category')
+            
+            cleaned[col] = series
         
-        return df
+        return pd.DataFrame(cleaned, index=df.index)
     
     def _add_missing_columns(self, df: pd.DataFrame) -> pd.DataFrame:
         """Add missing required columns with default values"""
-        # Define required columns with alternative names to look for
-        column_mappings = {
-            'name': ['name', 'company', 'companies', 'company name', 'firm', 'organization', 'business name', 'company_name', 'firm name', 'portfolio company'],
-            'description': ['description', 'desc', 'about', 'summary', 'overview', 'business description', 'company description'],
-            'stage': ['stage', 'funding stage', 'round', 'series', 'funding round', 'investment stage'],
-            'revenue': ['revenue', 'arr', 'annual revenue', 'sales', 'mrr', 'total revenue'],
-            'industry': ['industry', 'sector', 'vertical', 'category', 'market', 'primary industry'],
-            'location': ['location', 'hq', 'headquarters', 'city', 'region', 'country', 'geography']
-        }
-        
-        for target_col, alternatives in column_mappings.items():
-            if target_col not in df.columns:
-                # Look for alternative column names
-                found = False
-                best_match = None
-                best_filled_count = 0
-                
-                # Find ALL matching columns and pick the one with most data
-                for alt in alternatives:
-                    matching_cols = [col for col in df.columns if alt in col.lower()]
-                    for match_col in matching_cols:
-                        # Count how many non-empty values
-                        filled = (df[match_col] != '').sum()
-                        if filled > best_filled_count:
-                            best_filled_count = filled
-                            best_match = match_col
-                
-                if best_match:
-                    df[target_col] = df[best_match]
-                    self.logger.info(f"Mapped '{best_match}' to '{target_col}' ({best_filled_count}/{len(df)} filled)")
-                    found = True
-                
-                if not found:
-                    # Try fuzzy matching as fallback
-                    similar_col = self._find_similar_column(df.columns, target_col)
-                    if similar_col:
-                        df[target_col] = df[similar_col]
-                        self.logger.info(f"Fuzzy matched '{similar_col}' to '{target_col}'")
-                    else:
-                        df[target_col] = ''
-                        self.logger.warning(f"No match found for '{target_col}', using empty string")
+        return self._fill_missing_columns(df, self._resolve_missing_columns(df))
+    
+    def _resolve_missing_columns(self, df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """Pick a source column for each missing required column (None when nothing matches)"""
+        return self.resolver.resolve(df)
+    
+    def _fill_missing_columns(self, df: pd.DataFrame, resolved: Dict[str, Optional[str]]) -> pd.DataFrame:
+        """Add the resolved required columns, copying from their source column or filling with ''"""
+        for target_col, source_col in resolved.items():
+            if source_col is not None and source_col in df.columns:
+                df[target_col] = df[source_col]
+            else:
+                df[target_col] = ''
         
         return df
     
-    def _find_similar_column(self, columns: List[str], target: str) -> str:
-        """Find similar column name for mapping"""
-        target_lower = target.lower()
+    def _apply_column_mapping(self, df: pd.DataFrame, column_mapping: Optional[Dict[str, str]]) -> pd.DataFrame:
+        """Apply manual target -> source column overrides"""
+        for target_col, source_col in (column_mapping or {}).items():
+            if source_col in df.columns:
+                df[target_col] = df[source_col]
+                self.logger.info(f"Manually mapped '{source_col}' to '{target_col}'")
+            else:
+                self.logger.warning(f"Manual mapping source '{source_col}' not found, ignoring")
+        return df
+    
+    def _add_numeric_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add typed numeric columns (revenue_usd, valuation_usd, ...) parsed from text fields over whole columns"""
+        columns = [str(col) for col in df.columns]
         
-        for col in columns:
-            col_lower = col.lower()
-            if (target_lower in col_lower or 
-                col_lower in target_lower or
-                self._calculate_similarity(target_lower, col_lower) > 0.7):
-                return col
+        for target_col, (alternatives, parser) in NUMERIC_COLUMNS.items():
+            source_col = self._find_numeric_source(columns, alternatives)
+            if source_col is None:
+                df[target_col] = np.nan
+                continue
+            
+            text = df[source_col].astype(STRING_DTYPE).str.lower().str.replace(',', '', regex=False)
+            if parser == 'money':
+                df[target_col] = self._parse_money(text)
+            elif parser == 'year':
+                df[target_col] = self._to_float(text.str.extract(r'\b(1[89]\d{2}|20\d{2})\b', expand=False))
+            else:
+                count = self._to_float(text.str.extract(r'(\d+(?:\.\d+)?)', expand=False))
+                df[target_col] = count.mask(self._is_range(text))
         
+        return df
+    
+    def _find_numeric_source(self, columns: List[str], alternatives: List[str]) -> Optional[str]:
+        """Pick the source column for a numeric field: exact header first, then the first header containing it"""
+        for alt in alternatives:
+            if alt in columns:
+                return alt
+        for alt in alternatives:
+            for col in columns:
+                if alt in col and col not in NUMERIC_COLUMNS:
+                    return col
         return None
     
-    def _calculate_similarity(self, str1: str, str2: str) -> float:
-        """Calculate simple string similarity"""
-        if not str1 or not str2:
-            return 0.0
+    def _parse_money(self, text: pd.Series) -> pd.Series:
+        """Vectorized parse of amount strings into USD floats (NaN when unparseable or a range)"""
+        parts = text.str.extract(MONEY_PATTERN)
+        plain = text.str.extract(f'^{PLAIN_NUMBER_PATTERN}$', expand=False)
+        value = self._to_float(parts['num'].fillna(parts['bare']).fillna(plain))
+        multiplier = parts['unit'].fillna(parts['bare_unit']).map(MONEY_UNITS).astype('float64')
         
-        common_chars = sum(1 for c in str1 if c in str2)
-        return common_chars / max(len(str1), len(str2))
+        # Unit-less amounts follow the export's $M convention unless already in dollars
+        unitless = np.where(value < UNITLESS_MILLIONS_BELOW, 1e6, 1.0)
+        amount = value * multiplier.fillna(pd.Series(unitless, index=text.index))
+        amount = amount.mask(self._is_range(text))
+        
+        # "Pre-revenue" is a real zero, not a missing value
+        pre_revenue = text.str.contains(r'pre[- ]?revenue', regex=True, na=False).to_numpy(dtype=bool)
+        return amount.mask(pre_revenue, 0.0)
+    
+    def _is_range(self, text: pd.Series) -> np.ndarray:
+        """Rows whose text is a range of numbers rather than one value"""
+        return text.str.contains(RANGE_PATTERN, regex=True, na=False).to_numpy(dtype=bool)
+    
+    def _to_float(self, values: pd.Series) -> pd.Series:
+        """Convert extracted number strings to float64 with NaN for missing"""
+        numbers = pd.to_numeric(values, errors='coerce')
+        return pd.Series(numbers.to_numpy(dtype='float64', na_value=np.nan), index=values.index)
     
     def validate_data(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Validate processed data and return statistics"""
@@ -0,0 +1,202 @@
+"""
+Dataset Cache - On-disk cache of processed DataFrames
+Keyed by upload content hash plus processing options, stored as Feather files
+(derived artifacts such as search indexes are stored next to them as plain .npz arrays)
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow
+    import pyarrow.feather
+    import pyarrow.ipc
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logging.warning("pyarrow not available - dataset cache disabled. Install with: pip install pyarrow")
+
+# Bump whenever the processing pipeline changes its output, so stale entries are never served
+CACHE_VERSION = 5
+
+# File types managed (and evicted) by the cache; '.pkl' artifacts of older versions are only cleaned up
+CACHE_SUFFIXES = ('.feather', '.npz', '.pkl')
+
+# Name of the .npz member holding an artifact's JSON metadata
+ARTIFACT_META_KEY = '__meta__'
+
+# Feather schema metadata key holding the category dtypes Arrow does not round-trip
+CATEGORY_DTYPES_KEY = b'dataset_cache.category_dtypes'
+
+# DataFrame.attrs entry naming the dataset a processed frame was loaded as ({'key', 'rows'})
+DATASET_KEY_ATTR = 'dataset_cache_key'
+
+
+class DatasetCache:
+    """Content-addressed, size-bounded LRU cache of cleaned DataFrames"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.logger = logging.getLogger(__name__)
+        self.enabled = PYARROW_AVAILABLE and max_bytes > 0
+
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def make_key(self, content: bytes, skip_rows: int = 0, column_mapping: Optional[Dict[str, str]] = None) -> str:
+        """Build a cache key from the upload bytes and the options that affect processing"""
+        digest = hashlib.sha256(content)
+        options = {
+            'version': CACHE_VERSION,
+            'skip_rows': skip_rows,
+            'column_mapping': column_mapping or {}
+        }
+        digest.update(json.dumps(options, sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Return the cached DataFrame for key, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            df = self._restore_categories(pd.read_feather(path), path)
+            # Touch the entry so eviction treats it as most recently used
+            os.utime(path, None)
+            self.logger.info(f"Dataset cache hit ({key[:12]})")
+            return df
+        except Exception as e:
+            self.logger.warning(f"Could not read cached dataset {key[:12]}: {e}")
+            self._remove(path)
+            return None
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store a processed DataFrame and evict least recently used entries over the size budget"""
+        if not self.enabled:
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            table = pyarrow.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+            metadata = dict(table.schema.metadata or {})
+            metadata[CATEGORY_DTYPES_KEY] = json.dumps(self._category_dtypes(df)).encode('utf-8')
+            pyarrow.feather.write_feather(table.replace_schema_metadata(metadata), tmp_path)
+            os.replace(tmp_path, path)
+            self.logger.info(f"Cached processed dataset ({key[:12]}, {os.path.getsize(path)} bytes)")
+        except Exception as e:
+            self.logger.warning(f"Could not cache dataset {key[:12]}: {e}")
+            self._remove(tmp_path)
+            return
+
+        self._evict()
+
+    def get_artifact(self, key: str, name: str) -> Optional[Tuple[Dict[str, np.ndarray], Dict[str, Any]]]:
+        """Return the arrays and metadata of a cached derived object (e.g. a search index), or None"""
+        if not self.enabled:
+            return None
+
+        path = self._artifact_path(key, name)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            # Plain arrays only: loading never executes code from the cache directory
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {member: data[member] for member in data.files}
+            meta = json.loads(arrays.pop(ARTIFACT_META_KEY).tobytes().decode('utf-8'))
+            os.utime(path, None)
+            return arrays, meta
+        except Exception as e:
+            self.logger.warning(f"Could not read cached {name} {key[:12]}: {e}")
+            self._remove(path)
+            return None
+
+    def put_artifact(self, key: str, name: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> None:
+        """Store a derived object's arrays and JSON metadata for a dataset key under the same size budget"""
+        if not self.enabled:
+            return
+
+        path = self._artifact_path(key, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            encoded_meta = np.frombuffer(json.dumps(meta).encode('utf-8'), dtype=np.uint8)
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays, **{ARTIFACT_META_KEY: encoded_meta})
+            os.replace(tmp_path, path)
+        except Exception as e:
+            self.logger.warning(f"Could not cache {name} {key[:12]}: {e}")
+            self._remove(tmp_path)
+            return
+
+        self._evict()
+
+    def clear(self) -> None:
+        """Remove every cached dataset and artifact"""
+        if not self.enabled:
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(CACHE_SUFFIXES):
+                self._remove(os.path.join(self.cache_dir, name))
+
+    def _category_dtypes(self, df: pd.DataFrame) -> Dict[str, str]:
+        """Storage of each categorical column with string categories (Feather reads them back as str)"""
+        return {
+            col: df[col].cat.categories.dtype.storage
+            for col in df.columns
+            if isinstance(df[col].dtype, pd.CategoricalDtype)
+            and isinstance(df[col].cat.categories.dtype, pd.StringDtype)
+        }
+
+    def _restore_categories(self, df: pd.DataFrame, path: str) -> pd.DataFrame:
+        """Give categorical columns back the string category dtype they were stored with"""
+        with pyarrow.memory_map(path) as source:
+            metadata = pyarrow.ipc.open_file(source).schema.metadata or {}
+        for col, storage in json.loads(metadata.get(CATEGORY_DTYPES_KEY, b'{}')).items():
+            dtype = df[col].dtype
+            categories = dtype.categories.astype(pd.StringDtype(storage))
+            df[col] = df[col].astype(pd.CategoricalDtype(categories, ordered=dtype.ordered))
+        return df
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.feather")
+
+    def _artifact_path(self, key: str, name: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{name}.npz")
+
+    def _evict(self) -> None:
+        """Delete oldest-used entries until the cache fits in max_bytes"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIXES):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            self.logger.info(f"Evicted cache entry {os.path.basename(path)}")
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Fake OpenAI Server - Local stand-in for the chat-completions API
+Deterministic scores from firm content, configurable latency and 429/5xx injection, no key or network needed
+Usage: python fake_openai_server.py [--port 8765] [--latency 0.8] [--error-rate 0.05] ...
+       then OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=sk-fake streamlit run streamlit_app.py
+"""
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_PORT = 8765
+
+# Rough characters per token for the usage fields
+CHARS_PER_TOKEN = 4
+
+# Prompt markers written by VCExpertAgent
+CRITERIA_PATTERN = re.compile(r'INVESTMENT CRITERIA:\n(.*?)\n\s*\nCOMPANIES', re.S)
+COMPACT_ROW_PATTERN = re.compile(r'^(\d+) \| (.*)$', re.M)
+FIRM_BLOCK_PATTERN = re.compile(r'^FIRM #(\d+): (.*)$', re.M)
+WORD_PATTERN = re.compile(r'[a-z0-9]+')
+
+
+class FakeServerOptions:
+    """Behaviour of the fake server (latency in seconds, rates as probabilities per request)"""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.5, distribution: str = 'lognormal',
+                 seconds_per_token: float = 0.0, rate_limit_rate: float = 0.0, server_error_rate: float = 0.0,
+                 retry_after: float = 1.0, json_mode: bool = True, cached_share: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.distribution = distribution
+        self.seconds_per_token = seconds_per_token
+        self.rate_limit_rate = rate_limit_rate
+        self.server_error_rate = server_error_rate
+        self.retry_after = retry_after
+        self.json_mode = json_mode
+        self.cached_share = cached_share
+        self.seed = seed
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the options, a seeded RNG and request counters"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], options: FakeServerOptions):
+        super().__init__(address, FakeOpenAIHandler)
+        self.options = options
+        self.rng = random.Random(options.seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests': 0, 'ok': 0, 'rate_limited': 0, 'server_errors': 0, 'rejected': 0}
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def draw(self) -> Tuple[float, float]:
+        """(uniform draw for fault injection, latency) from the shared seeded RNG"""
+        with self.lock:
+            fault = self.rng.random()
+            options = self.options
+            if options.distribution == 'fixed':
+                latency = options.latency
+            elif options.distribution == 'uniform':
+                latency = self.rng.uniform(max(0.0, options.latency - options.jitter), options.latency + options.jitter)
+            else:
+                # Lognormal with median = latency: a long right tail like real API latency
+                latency = options.latency * math.exp(self.rng.gauss(0, options.jitter)) if options.latency else 0.0
+            return fault, latency
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats[key] += 1
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Serves POST /v1/chat/completions and GET /v1/models"""
+
+    server: FakeOpenAIServer
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': 'fake', 'object': 'model'}]})
+        else:
+            self._send_error(404, f"Unknown path {self.path}", 'invalid_request_error')
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_error(404, f"Unknown path {self.path}", 'invalid_request_error')
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_error(400, "Request body is not valid JSON", 'invalid_request_error')
+            return
+
+        options = self.server.options
+        if request.get('response_format') and not options.json_mode:
+            self.server.count('rejected')
+            self._send_error(400, "Invalid parameter: 'response_format' of type 'json_object' is not supported "
+                                  "with this model.", 'invalid_request_error')
+            return
+
+        fault, latency = self.server.draw()
+        if fault < options.rate_limit_rate:
+            self.server.count('rate_limited')
+            self._send_error(429, "Rate limit reached (injected by fake server)", 'rate_limit_exceeded',
+                             {'retry-after-ms': str(int(options.retry_after * 1000))})
+            return
+        if fault < options.rate_limit_rate + options.server_error_rate:
+            self.server.count('server_errors')
+            time.sleep(latency)
+            self._send_error(503, "The server is overloaded (injected by fake server)", 'server_error')
+            return
+
+        messages = request.get('messages') or []
+        content = json.dumps(build_answer(messages[-1].get('content', '') if messages else ''))
+        usage = build_usage(messages, content, options.cached_share)
+        time.sleep(latency + usage['completion_tokens'] * options.seconds_per_token)
+        self.server.count('ok')
+
+        model = request.get('model', 'fake')
+        if request.get('stream'):
+            include_usage = bool((request.get('stream_options') or {}).get('include_usage'))
+            self._send_stream(model, content, usage if include_usage else None)
+        else:
+            self._send_json(200, {
+                'id': f"chatcmpl-{uuid.uuid4().hex[:24]}",
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+                'usage': usage
+            })
+
+    def _send_json(self, status: int, body: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: int, message: str, code: str, headers: Optional[Dict[str, str]] = None) -> None:
+        self._send_json(status, {'error': {'message': message, 'type': code, 'param': None, 'code': code}}, headers)
+
+    def _send_stream(self, model: str, content: str, usage: Optional[Dict]) -> None:
+        """Server-sent events: one chunk per few characters, then the usage chunk and [DONE]"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        def event(choices: List[Dict], chunk_usage: Optional[Dict] = None) -> None:
+            chunk = {'id': chunk_id, 'object': 'chat.completion.chunk', 'created': created,
+                     'model': model, 'choices': choices}
+            if usage is not None:
+                chunk['usage'] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode('utf-8'))
+
+        event([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+        for start in range(0, len(content), 16):
+            event([{'index': 0, 'delta': {'content': content[start:start + 16]}, 'finish_reason': None}])
+        event([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        if usage is not None:
+            event([], usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def parse_firms(prompt: str) -> List[Tuple[int, str, str]]:
+    """(number, name, full text) of each company in a compact or verbose VC Expert prompt"""
+    rows = [(int(number), row.split(' | ')[0].strip(), row) for number, row in COMPACT_ROW_PATTERN.findall(prompt)]
+    if rows:
+        return rows
+
+    firms = []
+    blocks = list(FIRM_BLOCK_PATTERN.finditer(prompt))
+    for index, match in enumerate(blocks):
+        end = blocks[index + 1].start() if index + 1 < len(blocks) else len(prompt)
+        firms.append((int(match.group(1)), match.group(2).strip(), prompt[match.start():end]))
+    return firms
+
+
+def firm_score(criteria: str, firm_text: str) -> int:
+    """Deterministic 0-100 score: share of criteria words found in the firm, plus a content hash"""
+    criteria_words = set(WORD_PATTERN.findall(criteria.lower()))
+    firm_words = set(WORD_PATTERN.findall(firm_text.lower()))
+    overlap = len(criteria_words & firm_words) / len(criteria_words) if criteria_words else 0.0
+    digest = hashlib.sha256(f"{criteria}\x1f{firm_text}".encode('utf-8')).digest()
+    return min(100, int(60 * overlap) + digest[0] % 41)
+
+
+def build_answer(prompt: str) -> Dict:
+    """JSON answer in the format the prompt asks for (screening ids or named expert results)"""
+    match = CRITERIA_PATTERN.search(prompt)
+    criteria = match.group(1).strip() if match else ''
+    firms = parse_firms(prompt)
+    if 'using its # as id' in prompt:
+        return {'results': [{'id': number, 'score': firm_score(criteria, text)} for number, _, text in firms]}
+    return {'results': [
+        {'name': name, 'score': firm_score(criteria, text),
+         'reason': f"Fake analysis of {name}: score derived from criteria overlap and firm content."}
+        for _, name, text in firms
+    ]}
+
+
+def build_usage(messages: List[Dict], content: str, cached_share: float) -> Dict:
+    """OpenAI-style usage block with estimated token counts"""
+    prompt_tokens = sum(len(str(m.get('content', ''))) for m in messages) // CHARS_PER_TOKEN + 4 * len(messages)
+    completion_tokens = max(1, len(content) // CHARS_PER_TOKEN)
+    return {
+        'prompt_tokens': prompt_tokens,
+        'completion_tokens': completion_tokens,
+        'total_tokens': prompt_tokens + completion_tokens,
+        'prompt_tokens_details': {'cached_tokens': int(prompt_tokens * cached_share)}
+    }
+
+
+def start_server(options: Optional[FakeServerOptions] = None, host: str = '127.0.0.1',
+                 port: int = 0) -> FakeOpenAIServer:
+    """Serve in a daemon thread (port 0 = any free port); use .base_url and .shutdown()"""
+    server = FakeOpenAIServer((host, port), options or FakeServerOptions())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.5, help="Median response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.5,
+                        help="Lognormal sigma, or +/- seconds for the uniform distribution")
+    parser.add_argument('--distribution', choices=['lognormal', 'uniform', 'fixed'], default='lognormal')
+    parser.add_argument('--seconds-per-token', type=float, default=0.0, help="Extra latency per completion token")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument('--server-error-rate', type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Seconds advertised on injected 429s")
+    parser.add_argument('--no-json-mode', action='store_true', help="Reject response_format like older models")
+    parser.add_argument('--cached-share', type=float, default=0.0, help="Share of prompt tokens reported as cached")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    options = FakeServerOptions(
+        latency=args.latency, jitter=args.jitter, distribution=args.distribution,
+        seconds_per_token=args.seconds_per_token, rate_limit_rate=args.rate_limit_rate,
+        server_error_rate=args.server_error_rate, retry_after=args.retry_after,
+        json_mode=not args.no_json_mode, cached_share=args.cached_share, seed=args.seed
+    )
+    server = FakeOpenAIServer((args.host, args.port), options)
+    print(f"Fake OpenAI server on {server.base_url} - set OPENAI_BASE_URL to this and OPENAI_API_KEY=sk-fake")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Served: {server.stats}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,216 @@
+"""
+Firm Deduplicator - Collapses repeated company rows into one entity before scoring
+Exact matches via hashed normalized names and domains; near-duplicates compared only among sorted neighbours
+"""
+import logging
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Trailing legal-form words dropped from normalized names ("Acme Inc." == "ACME, Inc" == "Acme")
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'corp', 'corporation', 'co', 'company', 'llc', 'llp', 'lp', 'ltd', 'limited',
+    'plc', 'gmbh', 'ag', 'sa', 'sas', 'sarl', 'srl', 'spa', 'bv', 'nv', 'ab', 'oy', 'as', 'pty', 'pte',
+    'kk', 'kg', 'holdings', 'holding', 'group'
+}
+
+# Headers that may hold a company website (first match wins)
+WEBSITE_COLUMNS = ['website', 'domain', 'company website', 'url', 'web site', 'homepage']
+
+# Hosts shared by unrelated companies, never used as an identity
+SHARED_DOMAINS = {
+    'linkedin.com', 'facebook.com', 'twitter.com', 'x.com', 'crunchbase.com', 'pitchbook.com',
+    'angel.co', 'wellfound.com', 'github.com', 'medium.com', 'google.com', 'sites.google.com'
+}
+
+# Minimum similarity of two normalized names for a near-duplicate merge
+DEFAULT_SIMILARITY = 0.92
+
+# Names shorter than this are merged on exact matches only
+MIN_FUZZY_NAME_LENGTH = 6
+
+# Each distinct name is compared with this many following names in sorted order (sorted-neighborhood blocking)
+NEIGHBORHOOD_WINDOW = 4
+
+# Names whose numbers differ are never near-duplicates
+DIGITS_PATTERN = re.compile(r'\d+')
+
+
+def normalize_name(name) -> str:
+    """Case-, accent- and punctuation-insensitive company name without legal suffixes"""
+    text = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode('ascii').lower()
+    text = text.replace('&', ' and ')
+    words = re.sub(r'[^a-z0-9]+', ' ', text).split()
+    if words and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return ''.join(words)
+
+
+def normalize_domain(url) -> str:
+    """Bare host of a website ('https://www.Acme.io/about' -> 'acme.io'), '' if none or shared"""
+    host = str(url or '').strip().lower()
+    host = re.sub(r'^[a-z][a-z0-9+.-]*://', '', host)
+    host = re.split(r'[/?#:\s]', host, maxsplit=1)[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    if '.' not in host or host in SHARED_DOMAINS:
+        return ''
+    return host
+
+
+class FirmDeduplicator:
+    """Merges rows describing the same company, keeping the first row and filling its blanks from the rest"""
+
+    def __init__(self, similarity: float = DEFAULT_SIMILARITY):
+        self.similarity = similarity
+        self.logger = logging.getLogger(__name__)
+
+    def deduplicate(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict[str, int]]:
+        """
+        Collapse duplicate firms into one row per entity
+
+        Rows match on an equal normalized website domain, or on an equal normalized
+        name unless both rows have a different domain; names that are nearly
+        equal to a sorted neighbour match too unless their domains differ. Each
+        entity keeps its first row, with empty fields filled from the other rows
+        in order.
+
+        Args:
+            df: Firms DataFrame (after clean_empty_names)
+
+        Returns:
+            (deduplicated DataFrame, report with rows_before, rows_after, exact_matches, near_matches)
+        """
+        report = {'rows_before': len(df), 'rows_after': len(df), 'exact_matches': 0, 'near_matches': 0}
+        if 'name' not in df.columns or len(df) < 2:
+            return df, report
+
+        names = [normalize_name(name) for name in df['name'].tolist()]
+        website_col = self._find_website_column(df.columns)
+        domains = [normalize_domain(url) for url in df[website_col].tolist()] if website_col else [''] * len(df)
+
+        parent = list(range(len(df)))
+        report['exact_matches'] = (self._link_equal_names(parent, names, domains)
+                                   + self._link_equal_keys(parent, domains))
+        report['near_matches'] = self._link_near_names(parent, names, domains)
+
+        groups = np.array([self._find(parent, i) for i in range(len(df))])
+        deduped = self._merge_groups(df, groups)
+        report['rows_after'] = len(deduped)
+
+        if report['rows_after'] < report['rows_before']:
+            self.logger.info(
+                f"Merged {report['rows_before'] - report['rows_after']} duplicate rows "
+                f"({report['exact_matches']} exact, {report['near_matches']} near matches)"
+            )
+        return deduped, report
+
+    def _find_website_column(self, columns) -> Optional[str]:
+        for alt in WEBSITE_COLUMNS:
+            if alt in columns:
+                return alt
+        return None
+
+    @staticmethod
+    def _find(parent: List[int], i: int) -> int:
+        """Union-find root of row i (with path halving)"""
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def _union(self, parent: List[int], a: int, b: int) -> bool:
+        """Join the groups of rows a and b (the earlier row stays root); False if already joined"""
+        root_a, root_b = self._find(parent, a), self._find(parent, b)
+        if root_a == root_b:
+            return False
+        parent[max(root_a, root_b)] = min(root_a, root_b)
+        return True
+
+    def _link_equal_keys(self, parent: List[int], keys: List[str]) -> int:
+        """Join rows whose non-empty keys are equal (hash lookup); returns the number of joins"""
+        first_row = {}
+        joined = 0
+        for i, key in enumerate(keys):
+            if not key:
+                continue
+            if key in first_row:
+                joined += self._union(parent, first_row[key], i)
+            else:
+                first_row[key] = i
+        return joined
+
+    def _link_equal_names(self, parent: List[int], names: List[str], domains: List[str]) -> int:
+        """Join rows with equal names unless both have a website and they differ; returns the number of joins"""
+        # Per name, the entities seen so far as [first row, domain] ('' until a row with a website joins)
+        entities = {}
+        joined = 0
+        for i, (name, domain) in enumerate(zip(names, domains)):
+            if not name:
+                continue
+            for entity in entities.setdefault(name, []):
+                if not entity[1] or not domain or entity[1] == domain:
+                    joined += self._union(parent, entity[0], i)
+                    entity[1] = entity[1] or domain
+                    break
+            else:
+                entities[name].append([i, domain])
+        return joined
+
+    def _link_near_names(self, parent: List[int], names: List[str], domains: List[str]) -> int:
+        """Join rows with nearly equal names, comparing each distinct name only with its sorted neighbours"""
+        # One representative row (and its domain) per distinct name
+        representative = {}
+        for i, name in enumerate(names):
+            if len(name) >= MIN_FUZZY_NAME_LENGTH and name not in representative:
+                representative[name] = i
+
+        ordered = sorted(representative)
+        joined = 0
+        for a, name in enumerate(ordered):
+            # SequenceMatcher caches its analysis of the second sequence, so that one stays fixed
+            matcher = SequenceMatcher(None, autojunk=False)
+            matcher.set_seq2(name)
+            for other in ordered[a + 1:a + 1 + NEIGHBORHOOD_WINDOW]:
+                row_a, row_b = representative[name], representative[other]
+                if domains[row_a] and domains[row_b] and domains[row_a] != domains[row_b]:
+                    # Different websites: similar names of distinct companies
+                    continue
+                if DIGITS_PATTERN.findall(name) != DIGITS_PATTERN.findall(other):
+                    # "Fund 2" and "Fund 3" are different entities
+                    continue
+                matcher.set_seq1(other)
+                if matcher.real_quick_ratio() >= self.similarity and matcher.ratio() >= self.similarity:
+                    joined += self._union(parent, row_a, row_b)
+        return joined
+
+    def _merge_groups(self, df: pd.DataFrame, groups: np.ndarray) -> pd.DataFrame:
+        """First row of each group, with empty fields filled from the group's later rows"""
+        keep = groups == np.arange(len(groups))
+        merged = df[keep].copy()
+        duplicated = ~keep
+        if not duplicated.any():
+            return merged.reset_index(drop=True)
+
+        # Rows of groups with more than one member, labelled by their group's first row
+        in_dup_group = np.isin(groups, groups[duplicated])
+        members = df[in_dup_group]
+        member_groups = groups[in_dup_group]
+        position = {row: index for index, row in enumerate(np.flatnonzero(keep))}
+
+        for col in df.columns:
+            values = members[col].astype(object)
+            values = values.where(values.notna() & (values != ''))
+            # first() skips missing values, so each group takes its first non-empty value
+            filled = values.groupby(member_groups, sort=False).first().dropna()
+            if len(filled) > 0:
+                rows = [position[group] for group in filled.index]
+                merged.iloc[rows, merged.columns.get_loc(col)] = filled.astype(df[col].dtype).array
+
+        return merged.reset_index(drop=True)
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic PitchBook-shaped company exports for scale testing
+Metadata preamble, 79 columns with duplicate headers, messy revenue strings and near-duplicate companies
+Usage: python generate_pitchbook_data.py --rows 100000 [--format csv|xlsx] [--output firms_100k.csv]
+"""
+import argparse
+import csv
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Export headers in PitchBook order; 'Website', 'Revenue' and 'Employees' appear twice like in real exports
+PITCHBOOK_COLUMNS = [
+    'Companies', 'Company ID', 'Company Former Name', 'Company Also Known As', 'Company Legal Name',
+    'Description', 'Primary Industry Sector', 'Primary Industry Group', 'Primary Industry Code',
+    'All Industries', 'Verticals', 'Keywords', 'Company Financing Status', 'Total Raised',
+    'Business Status', 'Ownership Status', 'Universe', 'Website', 'Employees', 'Exchange', 'Ticker',
+    'Year Founded', 'Parent Company', 'Daily Updates', 'Weekly Updates', 'Revenue', 'Gross Profit',
+    'Net Income', 'EBITDA', 'EBIT', 'Net Debt', 'Fiscal Period', 'Growth Rate', 'Growth Rate Percentile',
+    'Web Growth Rate', 'Social Growth Rate', 'HQ Location', 'HQ Address Line 1', 'HQ City',
+    'HQ State/Province', 'HQ Post Code', 'HQ Country/Territory', 'HQ Phone', 'HQ Email',
+    'Primary Contact', 'Primary Contact Title', 'Primary Contact Email', 'Active Investors', 'Acquirers',
+    'Former Investors', 'Number of Active Investors', 'First Financing Date', 'First Financing Size',
+    'First Financing Valuation', 'First Financing Deal Type', 'Last Financing Date', 'Last Financing Size',
+    'Last Financing Valuation', 'Last Financing Deal Type', 'Last Financing Deal Type 2',
+    'Last Financing Status', 'Post Valuation', 'Success Probability', 'Predicted Exit Type',
+    'Opportunity Score', 'Profile Data Source', 'Total Patent Documents', 'Active Patent Documents',
+    'Twitter Followers', 'Facebook Likes', 'Majestic Referring Domains', 'Similarweb Unique Visitors',
+    'Clarity Score', 'Emerging Spaces', 'PBId', 'View Company Online', 'Website', 'Revenue', 'Employees'
+]
+
+SYLLABLES = [
+    'al', 'an', 'ar', 'be', 'bi', 'bo', 'ca', 'ce', 'co', 'da', 'de', 'di', 'el', 'en', 'er', 'fa', 'fi',
+    'ga', 'ge', 'ha', 'in', 'io', 'ka', 'ki', 'la', 'le', 'li', 'lo', 'lu', 'ma', 'me', 'mi', 'mo', 'na',
+    'ne', 'ni', 'no', 'nu', 'or', 'pa', 'pe', 'pi', 'qua', 'ra', 're', 'ri', 'ro', 'sa', 'se', 'si', 'so',
+    'ta', 'te', 'ti', 'to', 'tra', 'va', 've', 'vi', 'vo', 'xa', 'ya', 'za', 'zo', 'ul'
+]
+NAME_WORDS = ['', '', '', ' AI', ' Labs', ' Health', ' Robotics', ' Systems', ' Technologies', ' Bio',
+              ' Analytics', ' Energy', ' Pay', ' Cloud', ' Security', ' Therapeutics']
+LEGAL_SUFFIXES = ['', '', '', '', ', Inc.', ' Inc', ' LLC', ' Ltd', ' GmbH', ' Corp.', ' Holdings']
+
+SECTORS = {
+    'Information Technology': ['Software', 'IT Services', 'Communications and Networking'],
+    'Healthcare': ['Healthcare Technology Systems', 'Pharmaceuticals and Biotechnology', 'Healthcare Devices'],
+    'Financial Services': ['Commercial Banks', 'Insurance', 'Capital Markets/Institutions'],
+    'Business Products and Services (B2B)': ['Commercial Services', 'Commercial Products'],
+    'Consumer Products and Services (B2C)': ['Retail', 'Restaurants, Hotels and Leisure', 'Media'],
+    'Energy': ['Energy Services', 'Exploration, Production and Refining'],
+    'Materials and Resources': ['Chemicals and Gases', 'Agriculture']
+}
+VERTICALS = ['Artificial Intelligence & Machine Learning', 'SaaS', 'FinTech', 'HealthTech', 'CleanTech',
+             'Cybersecurity', 'AgTech', 'E-Commerce', 'Big Data', 'Robotics and Drones', 'Digital Health',
+             'Supply Chain Tech', 'EdTech', 'Mobility Tech', 'Life Sciences', 'Climate Tech']
+PRODUCTS = ['analytics platform', 'payments API', 'clinical decision tool', 'robotic picking system',
+            'fraud detection engine', 'carbon accounting software', 'supply chain marketplace',
+            'drug discovery platform', 'security monitoring service', 'learning app', 'battery chemistry',
+            'precision farming sensors', 'insurance underwriting model', 'developer tooling suite']
+CUSTOMERS = ['enterprises', 'hospitals', 'small businesses', 'banks', 'retailers', 'manufacturers',
+             'utilities', 'farmers', 'insurers', 'software teams', 'consumers', 'governments']
+ADJECTIVES = ['AI-powered', 'Cloud-based', 'Real-time', 'Developer-first', 'Vertical', 'Autonomous',
+              'Privacy-preserving', 'Low-code', 'Open-source', 'Data-driven']
+DEAL_TYPES = ['Seed Round', 'Angel (individual)', 'Early Stage VC', 'Later Stage VC', 'Series A', 'Series B',
+              'Series C', 'Accelerator/Incubator', 'Grant', 'PE Growth/Expansion', 'Debt - General']
+BUSINESS_STATUSES = ['Generating Revenue', 'Generating Revenue/Not Profitable', 'Product Development',
+                     'Startup', 'Profitable', 'Clinical Trials - Phase 2', 'Out of Business']
+OWNERSHIP_STATUSES = ['Privately Held (backing)', 'Privately Held (no backing)', 'Acquired/Merged',
+                      'Publicly Held']
+FINANCING_STATUSES = ['Venture Capital-Backed', 'Angel-Backed', 'Accelerator/Incubator Backed',
+                      'Corporate Backed or Acquired', 'Private Equity-Backed']
+LOCATIONS = [('San Francisco', 'California', 'United States'), ('New York', 'New York', 'United States'),
+             ('Boston', 'Massachusetts', 'United States'), ('Austin', 'Texas', 'United States'),
+             ('Seattle', 'Washington', 'United States'), ('London', '', 'United Kingdom'),
+             ('Berlin', '', 'Germany'), ('Paris', '', 'France'), ('Toronto', 'Ontario', 'Canada'),
+             ('Tel Aviv', '', 'Israel'), ('Bangalore', 'Karnataka', 'India'), ('Singapore', '', 'Singapore'),
+             ('Stockholm', '', 'Sweden'), ('Denver', 'Colorado', 'United States')]
+INVESTORS = ['Sequoia Capital', 'Andreessen Horowitz', 'Accel', 'Index Ventures', 'Y Combinator',
+             'Lightspeed Venture Partners', 'General Catalyst', 'Khosla Ventures', 'First Round Capital',
+             'Tiger Global Management', 'Insight Partners', 'SV Angel', 'Bessemer Venture Partners']
+PREDICTED_EXITS = ['Merger/Acquisition', 'IPO', 'Not Exited']
+
+
+def generate_firms(rows: int, seed: int = 0, duplicate_share: float = 0.02) -> pd.DataFrame:
+    """
+    Synthetic company export with PITCHBOOK_COLUMNS (duplicate headers kept) as strings
+
+    About duplicate_share of the rows re-list an earlier company with a reformatted
+    name and some fields blanked, like rows merged from several searches.
+    """
+    rng = np.random.default_rng(seed)
+
+    def pick(values: List[str], p_empty: float = 0.0) -> np.ndarray:
+        return _pick(rng, values, rows, p_empty)
+
+    # Row index -> four syllables via a multiplier coprime to len(SYLLABLES)**4: unique stems up to 17.8M rows
+    syllables = np.array(SYLLABLES, dtype=object)
+    codes = (np.arange(rows, dtype=np.int64) * 2654435761 + seed) % len(SYLLABLES) ** 4
+    stems = syllables[codes % len(SYLLABLES)]
+    for place in range(1, 4):
+        stems = stems + syllables[codes // len(SYLLABLES) ** place % len(SYLLABLES)]
+    stems = np.array([stem.capitalize() for stem in stems], dtype=object)
+    names = stems + pick(NAME_WORDS) + pick(LEGAL_SUFFIXES)
+
+    sectors = pick(list(SECTORS))
+    groups = np.array([SECTORS[sector][i % len(SECTORS[sector])] for sector, i in
+                       zip(sectors, rng.integers(0, 3, rows))], dtype=object)
+    locations = rng.integers(0, len(LOCATIONS), rows)
+    cities = np.array([LOCATIONS[i][0] for i in locations], dtype=object)
+    states = np.array([LOCATIONS[i][1] for i in locations], dtype=object)
+    countries = np.array([LOCATIONS[i][2] for i in locations], dtype=object)
+    hq = np.array([', '.join(part for part in LOCATIONS[i] if part) for i in locations], dtype=object)
+    founded = rng.integers(1995, 2025, rows)
+    revenue_m = np.round(rng.lognormal(0.5, 1.6, rows), 2)
+    raised_m = np.round(rng.lognormal(1.5, 1.5, rows), 2)
+    valuation_m = np.round(raised_m * rng.uniform(2, 12, rows), 2)
+    employees = np.maximum(1, rng.lognormal(3.2, 1.3, rows).astype(int))
+    domains = np.array([stem.lower() for stem in stems], dtype=object) + pick(['.com', '.io', '.ai', '.co'])
+    deal_types = pick(DEAL_TYPES)
+    growth = np.round(rng.normal(15, 40, rows), 2)
+
+    values = {
+        'Companies': names,
+        'Company ID': np.array([f"{a}-{b:02d}" for a, b in zip(rng.integers(50000, 999999, rows),
+                                                              rng.integers(0, 100, rows))], dtype=object),
+        'Company Former Name': _blank(rng, stems + ' Technologies', 0.95),
+        'Company Also Known As': _blank(rng, stems, 0.9),
+        'Company Legal Name': stems + pick([', Inc.', ' LLC', ' Ltd.', ' GmbH']),
+        'Description': pick(ADJECTIVES) + ' ' + pick(PRODUCTS) + ' for ' + pick(CUSTOMERS) + '. '
+                       + 'The company ' + pick(['sells', 'licenses', 'operates', 'develops']) + ' '
+                       + pick(PRODUCTS) + ' to ' + pick(CUSTOMERS) + ' in ' + hq + '.',
+        'Primary Industry Sector': sectors,
+        'Primary Industry Group': groups,
+        'Primary Industry Code': groups + pick([' (Other)', '', ' Software', ' Services']),
+        'All Industries': groups + ', ' + pick(list(SECTORS)),
+        'Verticals': pick(VERTICALS) + pick(['', ', ' + VERTICALS[0], ', SaaS']),
+        'Keywords': pick(PRODUCTS) + ', ' + pick(VERTICALS),
+        'Company Financing Status': pick(FINANCING_STATUSES, 0.1),
+        'Total Raised': _blank(rng, _amounts(raised_m), 0.15),
+        'Business Status': pick(BUSINESS_STATUSES, 0.05),
+        'Ownership Status': pick(OWNERSHIP_STATUSES),
+        'Universe': pick(['Venture Capital', 'Venture Capital, Angel', 'Private Equity', 'M&A']),
+        'Website': 'www.' + domains,
+        'Employees': _blank(rng, employees.astype(str).astype(object), 0.1),
+        'Exchange': _blank(rng, pick(['NASDAQ', 'NYSE', 'LSE']), 0.97),
+        'Ticker': _blank(rng, np.array([stem[:4].upper() for stem in stems], dtype=object), 0.97),
+        'Year Founded': _blank(rng, founded.astype(str).astype(object), 0.05),
+        'Parent Company': _blank(rng, pick(INVESTORS), 0.95),
+        'Daily Updates': _blank(rng, rng.integers(0, 5, rows).astype(str).astype(object), 0.5),
+        'Weekly Updates': _blank(rng, rng.integers(0, 20, rows).astype(str).astype(object), 0.5),
+        'Revenue': _messy_revenue(rng, revenue_m),
+        'Gross Profit': _blank(rng, _amounts(revenue_m * 0.6), 0.6),
+        'Net Income': _blank(rng, _amounts(revenue_m * rng.uniform(-0.8, 0.3, rows)), 0.6),
+        'EBITDA': _blank(rng, _amounts(revenue_m * rng.uniform(-0.5, 0.3, rows)), 0.6),
+        'EBIT': _blank(rng, _amounts(revenue_m * rng.uniform(-0.6, 0.25, rows)), 0.7),
+        'Net Debt': _blank(rng, _amounts(raised_m * 0.1), 0.8),
+        'Fiscal Period': _blank(rng, pick(['FY 2022', 'FY 2023', 'TTM 3Q2024']), 0.4),
+        'Growth Rate': _blank(rng, growth.astype(str).astype(object), 0.2),
+        'Growth Rate Percentile': _blank(rng, rng.integers(1, 100, rows).astype(str).astype(object), 0.2),
+        'Web Growth Rate': _blank(rng, np.round(rng.normal(5, 20, rows), 2).astype(str).astype(object), 0.3),
+        'Social Growth Rate': _blank(rng, np.round(rng.normal(3, 10, rows), 2).astype(str).astype(object), 0.4),
+        'HQ Location': hq,
+        'HQ Address Line 1': np.array([f"{n} {street}" for n, street in zip(
+            rng.integers(1, 2000, rows), pick(['Market Street', 'Main Street', 'Broadway', 'High Street']))],
+            dtype=object),
+        'HQ City': cities,
+        'HQ State/Province': states,
+        'HQ Post Code': rng.integers(10000, 99999, rows).astype(str).astype(object),
+        'HQ Country/Territory': countries,
+        'HQ Phone': np.array([f"+1 ({a}) {b}-{c:04d}" for a, b, c in zip(
+            rng.integers(200, 999, rows), rng.integers(200, 999, rows), rng.integers(0, 9999, rows))], dtype=object),
+        'HQ Email': 'info@' + domains,
+        'Primary Contact': pick(['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey']) + ' '
+                           + pick(['Smith', 'Chen', 'Garcia', 'Patel', 'Müller', 'Okafor']),
+        'Primary Contact Title': pick(['Co-Founder & Chief Executive Officer', 'Founder & CEO', 'CTO', 'President']),
+        'Primary Contact Email': pick(['ceo', 'founders', 'hello']) + '@' + domains,
+        'Active Investors': _blank(rng, pick(INVESTORS) + ', ' + pick(INVESTORS), 0.2),
+        'Acquirers': _blank(rng, pick(INVESTORS), 0.95),
+        'Former Investors': _blank(rng, pick(INVESTORS), 0.8),
+        'Number of Active Investors': rng.integers(0, 15, rows).astype(str).astype(object),
+        'First Financing Date': _dates(rng, founded, rows),
+        'First Financing Size': _blank(rng, _amounts(raised_m * 0.1), 0.3),
+        'First Financing Valuation': _blank(rng, _amounts(valuation_m * 0.2), 0.5),
+        'First Financing Deal Type': pick(DEAL_TYPES[:4]),
+        'Last Financing Date': _dates(rng, np.minimum(founded + 3, 2024), rows),
+        'Last Financing Size': _blank(rng, _amounts(raised_m * 0.4), 0.2),
+        'Last Financing Valuation': _blank(rng, _amounts(valuation_m), 0.4),
+        'Last Financing Deal Type': deal_types,
+        'Last Financing Deal Type 2': _blank(rng, pick(['Series A', 'Series B', 'Series C', 'Seed']), 0.3),
+        'Last Financing Status': pick(['Completed', 'Announced/In Progress']),
+        'Post Valuation': _blank(rng, _amounts(valuation_m), 0.4),
+        'Success Probability': _blank(rng, rng.integers(1, 100, rows).astype(str).astype(object), 0.3),
+        'Predicted Exit Type': _blank(rng, pick(PREDICTED_EXITS), 0.3),
+        'Opportunity Score': _blank(rng, rng.integers(1, 100, rows).astype(str).astype(object), 0.4),
+        'Profile Data Source': pick(['PitchBook Research', 'Company Submitted', 'Web Research']),
+        'Total Patent Documents': _blank(rng, rng.integers(0, 300, rows).astype(str).astype(object), 0.7),
+        'Active Patent Documents': _blank(rng, rng.integers(0, 100, rows).astype(str).astype(object), 0.7),
+        'Twitter Followers': _blank(rng, rng.integers(0, 90000, rows).astype(str).astype(object), 0.4),
+        'Facebook Likes': _blank(rng, rng.integers(0, 50000, rows).astype(str).astype(object), 0.5),
+        'Majestic Referring Domains': rng.integers(0, 5000, rows).astype(str).astype(object),
+        'Similarweb Unique Visitors': _blank(rng, rng.integers(100, 2000000, rows).astype(str).astype(object), 0.4),
+        'Clarity Score': _blank(rng, rng.integers(1, 10, rows).astype(str).astype(object), 0.3),
+        'Emerging Spaces': _blank(rng, pick(VERTICALS), 0.7),
+        'PBId': np.array([f"{a}-{b:02d}" for a, b in zip(rng.integers(50000, 999999, rows),
+                                                        rng.integers(0, 100, rows))], dtype=object),
+        'View Company Online': 'https://my.pitchbook.com/profile/' + rng.integers(50000, 999999, rows).astype(str).astype(object),
+    }
+    # The second copy of a duplicated header carries a different variant of the data
+    second = {
+        'Website': _blank(rng, 'https://' + domains + '/', 0.3),
+        'Revenue': _blank(rng, _amounts(revenue_m * rng.uniform(0.8, 1.2, rows)), 0.5),
+        'Employees': _blank(rng, (employees * rng.uniform(0.9, 1.1, rows)).astype(int).astype(str).astype(object), 0.3),
+    }
+
+    columns = []
+    seen = set()
+    for header in PITCHBOOK_COLUMNS:
+        columns.append(second[header] if header in seen else values[header])
+        seen.add(header)
+    frame = pd.DataFrame(dict(enumerate(columns)))
+    frame.columns = PITCHBOOK_COLUMNS
+
+    _add_duplicates(rng, frame, duplicate_share)
+    return frame
+
+
+def _pick(rng: np.random.Generator, values: List[str], rows: int, p_empty: float = 0.0) -> np.ndarray:
+    picked = np.array(values, dtype=object)[rng.integers(0, len(values), rows)]
+    return _blank(rng, picked, p_empty) if p_empty else picked
+
+
+def _blank(rng: np.random.Generator, values: np.ndarray, p_empty: float) -> np.ndarray:
+    """Copy of values with about p_empty of the cells empty"""
+    values = np.array(values, dtype=object)
+    values[rng.random(len(values)) < p_empty] = ''
+    return values
+
+
+def _amounts(millions: np.ndarray) -> np.ndarray:
+    """PitchBook-style amounts in $M ('12.50')"""
+    return np.array([f"{value:.2f}" for value in millions], dtype=object)
+
+
+def _messy_revenue(rng: np.random.Generator, millions: np.ndarray) -> np.ndarray:
+    """Revenue in the mix of formats seen in exports and hand-edited sheets"""
+    formats = [
+        lambda m: f"{m:.2f}",
+        lambda m: f"${m:.1f}M",
+        lambda m: f"{m * 1000:,.0f}K",
+        lambda m: f"${m * 1e6:,.0f}",
+        lambda m: f"{m:.1f}M ARR",
+        lambda m: f"${m:.1f} million",
+        lambda m: f"EUR {m:.1f}M",
+        lambda m: f"{m / 1000:.3f}B" if m >= 100 else f"{m:.1f}mm",
+        lambda m: 'Pre-revenue',
+        lambda m: 'n/a',
+        lambda m: '',
+    ]
+    weights = np.array([30, 15, 8, 5, 8, 5, 3, 3, 5, 3, 15], dtype=float)
+    choice = rng.choice(len(formats), size=len(millions), p=weights / weights.sum())
+    return np.array([formats[c](m) for c, m in zip(choice, millions)], dtype=object)
+
+
+def _dates(rng: np.random.Generator, years: np.ndarray, rows: int) -> np.ndarray:
+    months = rng.integers(1, 13, rows)
+    days = rng.integers(1, 29, rows)
+    return np.array([f"{m:02d}-{d:02d}-{y}" for y, m, d in zip(years, months, days)], dtype=object)
+
+
+def _add_duplicates(rng: np.random.Generator, frame: pd.DataFrame, share: float) -> None:
+    """Overwrite about share of the rows with re-listings of earlier companies (reformatted name, gaps)"""
+    count = int(len(frame) * share)
+    if count == 0 or len(frame) < 2:
+        return
+    targets = rng.choice(np.arange(1, len(frame)), size=count, replace=False)
+    sources = (rng.random(count) * targets).astype(int)
+    copies = frame.iloc[sources].to_numpy(copy=True)
+    name_styles = [str.upper, lambda name: name + ', Inc.', lambda name: 'The ' + name,
+                   lambda name: name.replace(' ', '')]
+    for row, style in zip(copies, rng.integers(0, len(name_styles), count)):
+        name = name_styles[style](str(row[0]))
+        row[rng.random(len(row)) < 0.3] = ''
+        row[0] = name
+    frame.iloc[targets] = copies
+
+
+def write_export(frame: pd.DataFrame, path: str, file_format: Optional[str] = None) -> str:
+    """Write the frame as a PitchBook download (metadata preamble, blank row, header, data); returns the format"""
+    file_format = file_format or ('xlsx' if path.endswith('.xlsx') else 'csv')
+    preamble = [
+        [f"Downloaded on: {time.strftime('%d-%b-%Y')}"],
+        ['Created for: Synthetic Benchmark User'],
+        ['Search Link: https://my.pitchbook.com/search-results/s000000000/companies'],
+        [f"Search Criteria: Companies, {len(frame):,} results"],
+        [],
+    ]
+    if file_format == 'xlsx':
+        # write_only streams rows instead of building the sheet in memory
+        from openpyxl import Workbook
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet('Data')
+        for row in preamble:
+            sheet.append(row)
+        sheet.append(list(frame.columns))
+        for row in frame.itertuples(index=False, name=None):
+            sheet.append(row)
+        workbook.save(path)
+    else:
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerows(preamble)
+            writer.writerow(list(frame.columns))
+            writer.writerows(frame.itertuples(index=False, name=None))
+    return file_format
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000, help="Companies to generate (e.g. 1000 ... 1000000)")
+    parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv', help="csv is much faster for 100k+ rows")
+    parser.add_argument('--output', help="Output path (default: pitchbook_<rows>.<format>)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--duplicate-share', type=float, default=0.02, help="Share of re-listed companies")
+    args = parser.parse_args()
+
+    output = args.output or f"pitchbook_{args.rows}.{args.format}"
+    started = time.perf_counter()
+    frame = generate_firms(args.rows, seed=args.seed, duplicate_share=args.duplicate_share)
+    write_export(frame, output, args.format)
+    print(f"✅ Wrote {len(frame):,} companies x {len(frame.columns)} columns to {output} "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+JSON Stream - Tolerant incremental parser for LLM result arrays
+Salvages every complete object from partial, fenced or wrapped JSON, fed whole or token by token
+"""
+import json
+from typing import Dict, List
+
+
+class JSONArrayStreamParser:
+    """
+    Emits each object that is an element of the response's result array as soon as it closes
+
+    Accepts a bare array ([{...}, ...]), one wrapped in an object ({"results": [...]})
+    or a single result object, with any prose or markdown fences around it. A truncated
+    response still yields every object completed before the cut; an element that fails
+    to parse is skipped.
+    """
+
+    def __init__(self):
+        self.items = []
+        self._buffer = []
+        self._position = 0
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+        self._top_start = None
+        self._top_items = 0
+
+    def feed(self, text: str) -> List[Dict]:
+        """Consume the next piece of the response; returns the objects completed by it"""
+        completed = []
+        for char in text:
+            self._buffer.append(char)
+            position = self._position
+            self._position += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"' and self._stack:
+                self._in_string = True
+            elif char in '[{':
+                if not self._stack and char == '{':
+                    self._top_start = position
+                    self._top_items = 0
+                # An element of the result array: a '{' directly inside the outermost array
+                if char == '{' and self._stack in (['['], ['{', '[']):
+                    self._item_start = position
+                self._stack.append(char)
+            elif char in ']}' and self._stack:
+                if self._stack[-1] != ('[' if char == ']' else '{'):
+                    # Mismatched bracket in stray prose - start over at the top level
+                    self._stack = []
+                    self._item_start = None
+                    self._top_start = None
+                    continue
+                self._stack.pop()
+                if char == '}' and self._item_start is not None and self._stack in (['['], ['{', '[']):
+                    item = self._decode(''.join(self._buffer[self._item_start:]))
+                    self._item_start = None
+                    if item is not None:
+                        completed.append(item)
+                        self._top_items += 1
+                elif char == '}' and not self._stack and self._top_start is not None:
+                    # A lone top-level object that wrapped no result array is itself a result
+                    item = self._decode(''.join(self._buffer[self._top_start:])) if not self._top_items else None
+                    self._top_start = None
+                    if item is not None and not any(isinstance(value, list) for value in item.values()):
+                        completed.append(item)
+
+        if self._item_start is None and not self._stack and self._top_start is None:
+            # Nothing pending - drop consumed text so long streams don't keep it around
+            self._buffer = []
+            self._position = 0
+
+        self.items.extend(completed)
+        return completed
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            item = json.loads(text)
+        except ValueError:
+            return None
+        return item if isinstance(item, dict) else None
+
+
+def parse_json_objects(text: str) -> List[Dict]:
+    """Every complete result object in an LLM response (see JSONArrayStreamParser)"""
+    return JSONArrayStreamParser().feed(text)
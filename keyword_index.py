@@ -0,0 +1,89 @@
+"""
+Keyword Index - Per-dataset inverted index for the keyword fallback ranker
+Maps whitespace tokens to posting lists per field so a query touches only matching rows
+"""
+import logging
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class KeywordIndex:
+    """
+    Inverted index of lowercased whitespace tokens -> row ids, one per field
+
+    Query keywords never contain whitespace, so "keyword in field" holds exactly
+    when the keyword is a substring of one of the field's tokens. Lookups scan the
+    (small) token vocabulary instead of every row.
+    """
+
+    def __init__(self, fields: List[str], num_rows: int):
+        self.fields = fields
+        self.num_rows = num_rows
+        self._vocab_text = {}
+        self._token_starts = {}
+        self._postings = {}
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, fields: List[str]) -> 'KeywordIndex':
+        """Build the index for the given fields of a DataFrame"""
+        index = cls(fields, len(df))
+
+        for field in fields:
+            postings = {}
+            if field in df.columns:
+                for row_id, value in enumerate(df[field].tolist()):
+                    for token in set(str(value).lower().split()):
+                        postings.setdefault(token, []).append(row_id)
+
+            tokens = list(postings)
+            # Newline-joined vocabulary lets one C-level regex scan find every token containing a keyword
+            index._vocab_text[field] = '\n'.join(tokens)
+            index._token_starts[field] = np.cumsum([0] + [len(token) + 1 for token in tokens[:-1]]).astype(np.int64)
+            index._postings[field] = [np.array(rows, dtype=np.int32) for rows in postings.values()]
+
+        logging.getLogger(__name__).info(
+            f"Built keyword index over {len(df)} rows ({sum(len(p) for p in index._postings.values())} tokens)"
+        )
+        return index
+
+    def rows_containing(self, field: str, keyword: str) -> np.ndarray:
+        """Sorted row ids whose field contains keyword as a substring"""
+        vocab_text = self._vocab_text.get(field, '')
+        if not vocab_text or not keyword:
+            return np.empty(0, dtype=np.int32)
+
+        positions = [match.start() for match in re.finditer(re.escape(keyword), vocab_text)]
+        if not positions:
+            return np.empty(0, dtype=np.int32)
+
+        token_ids = np.unique(np.searchsorted(self._token_starts[field], positions, side='right') - 1)
+        postings = self._postings[field]
+        return np.unique(np.concatenate([postings[token_id] for token_id in token_ids]))
+
+    def to_arrays(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and JSON metadata for the dataset cache (see from_arrays)"""
+        arrays = {}
+        for position, field in enumerate(self.fields):
+            postings = self._postings[field]
+            arrays[f"token_starts_{position}"] = self._token_starts[field]
+            arrays[f"posting_rows_{position}"] = (np.concatenate(postings) if postings
+                                                  else np.empty(0, dtype=np.int32))
+            arrays[f"posting_offsets_{position}"] = np.cumsum([0] + [len(rows) for rows in postings]).astype(np.int64)
+        meta = {'fields': self.fields, 'num_rows': self.num_rows,
+                'vocab_text': [self._vocab_text[field] for field in self.fields]}
+        return arrays, meta
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> 'KeywordIndex':
+        """Rebuild an index stored with to_arrays"""
+        index = cls(meta['fields'], meta['num_rows'])
+        for position, field in enumerate(index.fields):
+            offsets = arrays[f"posting_offsets_{position}"]
+            index._vocab_text[field] = meta['vocab_text'][position]
+            index._token_starts[field] = arrays[f"token_starts_{position}"]
+            rows = arrays[f"posting_rows_{position}"]
+            index._postings[field] = np.split(rows, offsets[1:-1]) if len(offsets) > 1 else []
+        return index
@@ -0,0 +1,133 @@
+"""
+LLM Result Cache - Persistent cache of per-firm VC Expert results
+SQLite table keyed by (model, criteria hash, firm content hash) with TTL and LRU eviction
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Bump whenever the prompt or result format changes, so stale answers are never served
+LLM_CACHE_VERSION = 4
+
+# SQLite limits the number of bound parameters per statement
+LOOKUP_CHUNK = 500
+
+
+class LLMResultCache:
+    """Maps (model, criteria, firm) to a cached {name, score, reason} result"""
+
+    def __init__(self, path: Optional[str], ttl_seconds: float, max_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.logger = logging.getLogger(__name__)
+        self.enabled = bool(path) and max_entries > 0
+
+        if self.enabled:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with self._connect() as conn:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS results ("
+                        "model TEXT, criteria TEXT, firm TEXT, result TEXT, "
+                        "created REAL, used REAL, PRIMARY KEY (model, criteria, firm))"
+                    )
+                    conn.execute("CREATE INDEX IF NOT EXISTS results_used ON results (used)")
+            except sqlite3.Error as e:
+                self.logger.warning(f"LLM result cache disabled: {e}")
+                self.enabled = False
+
+    @staticmethod
+    def criteria_key(criteria: str) -> str:
+        """Hash of the criteria, ignoring case and whitespace differences"""
+        normalized = ' '.join(criteria.lower().split())
+        return hashlib.sha256(f"{LLM_CACHE_VERSION}|{normalized}".encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def firm_key(firm: Dict) -> str:
+        """Hash of a firm's content"""
+        return hashlib.sha256(json.dumps(firm, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def get_many(self, model: str, criteria: str, firm_keys: Iterable[str]) -> Dict[str, Dict]:
+        """Return cached results for the firm keys that hit (expired entries are misses)"""
+        if not self.enabled:
+            return {}
+
+        criteria_hash = self.criteria_key(criteria)
+        now = time.time()
+        keys = list(dict.fromkeys(firm_keys))
+        hits = {}
+        try:
+            with self._connect() as conn:
+                for start in range(0, len(keys), LOOKUP_CHUNK):
+                    chunk = keys[start:start + LOOKUP_CHUNK]
+                    rows = conn.execute(
+                        f"SELECT firm, result FROM results WHERE model = ? AND criteria = ? AND created > ? "
+                        f"AND firm IN ({','.join('?' * len(chunk))})",
+                        [model, criteria_hash, now - self.ttl_seconds] + chunk
+                    ).fetchall()
+                    hits.update((firm, json.loads(result)) for firm, result in rows)
+
+                # Touch hits so eviction treats them as most recently used
+                conn.executemany(
+                    "UPDATE results SET used = ? WHERE model = ? AND criteria = ? AND firm = ?",
+                    [(now, model, criteria_hash, firm) for firm in hits]
+                )
+        except (sqlite3.Error, ValueError) as e:
+            self.logger.warning(f"Could not read LLM result cache: {e}")
+            return {}
+
+        self.logger.info(f"LLM result cache: {len(hits)}/{len(keys)} firms cached")
+        return hits
+
+    def put_many(self, model: str, criteria: str, items: List[Tuple[str, Dict]]) -> None:
+        """Store (firm key, result) pairs and evict expired and least recently used entries"""
+        if not self.enabled or not items:
+            return
+
+        criteria_hash = self.criteria_key(criteria)
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                    [(model, criteria_hash, firm, json.dumps(result), now, now) for firm, result in items]
+                )
+                self._evict(conn, now)
+        except sqlite3.Error as e:
+            self.logger.warning(f"Could not write LLM result cache: {e}")
+
+    def clear(self) -> None:
+        """Remove every cached result"""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM results")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection per call (safe from batch worker threads), committed on success"""
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Delete expired entries, then the least recently used ones over max_entries"""
+        conn.execute("DELETE FROM results WHERE created <= ?", (now - self.ttl_seconds,))
+        excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM results WHERE rowid IN (SELECT rowid FROM results ORDER BY used LIMIT ?)",
+                (excess,)
+            )
+            self.logger.info(f"Evicted {excess} LLM cache entries")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Measure VC Expert prompt size per firm for each prompt encoding
+Usage: python measure_prompt_tokens.py [file.xlsx|.csv] [--criteria "..."] [--json report.json]
+"""
+import argparse
+import json
+import os
+import statistics
+
+# Measuring must not read or fill the LLM result cache
+os.environ.setdefault('LLM_CACHE_MAX_ENTRIES', '0')
+
+from ai_filter import AIFilter
+from config import Config
+from data_processor import ExcelProcessor
+from firm_dedup import FirmDeduplicator
+from token_budget import TIKTOKEN_AVAILABLE, count_tokens
+from vc_expert_agent import VCExpertAgent
+
+PROMPT_FORMATS = ['verbose', 'compact']
+DEFAULT_CRITERIA = "B2B AI companies with over $5M revenue, Series A or B, based in the US"
+
+
+def measure(agent: VCExpertAgent, firms, criteria: str, model: str) -> dict:
+    """Token statistics of the full-analysis prompt in the current encoding"""
+    columns = agent._compact_columns(firms)
+    per_firm = [count_tokens(agent._format_firm(i, firm, columns), model) for i, firm in enumerate(firms, 1)]
+    fixed = count_tokens(agent._get_vc_expert_system_prompt() + agent._build_expert_prompt([], criteria, columns),
+                         model)
+    batches = agent._pack_batches(firms, criteria, model)
+    return {
+        'firms': len(firms),
+        'tokens_per_firm_mean': round(statistics.mean(per_firm), 1) if per_firm else 0,
+        'tokens_per_firm_p95': sorted(per_firm)[int(0.95 * (len(per_firm) - 1))] if per_firm else 0,
+        'fixed_prompt_tokens': fixed,
+        'requests': len(batches),
+        'firms_per_request': round(len(firms) / len(batches), 1) if batches else 0,
+        'total_prompt_tokens': fixed * len(batches) + sum(per_firm)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('path', nargs='?', default='sample_firms.xlsx', help="Upload to measure")
+    parser.add_argument('--criteria', default=DEFAULT_CRITERIA, help="Investment criteria used in the prompt")
+    parser.add_argument('--skip-rows', type=int, default=0, help="Metadata rows to skip")
+    parser.add_argument('--json', dest='json_path', help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    config = Config()
+    processor = ExcelProcessor()
+    with open(args.path, 'rb') as f:
+        df = processor.clean_empty_names(processor.process_excel(f, skip_rows=args.skip_rows))
+    if config.is_dedup_enabled():
+        df, _ = FirmDeduplicator(config.get_dedup_similarity()).deduplicate(df)
+    firms = AIFilter(config)._prepare_firm_data(df)
+    model = config.get_ai_model()
+
+    report = {'path': args.path, 'model': model, 'exact_token_counts': TIKTOKEN_AVAILABLE, 'formats': {}}
+    for prompt_format in PROMPT_FORMATS:
+        os.environ['PROMPT_FORMAT'] = prompt_format
+        report['formats'][prompt_format] = measure(VCExpertAgent(config), firms, args.criteria, model)
+
+    print(f"{len(firms)} firms from {args.path} ({model}, "
+          f"{'tiktoken' if TIKTOKEN_AVAILABLE else 'estimated'} token counts)")
+    print(f"{'format':<10}{'tok/firm':>10}{'p95':>8}{'fixed':>8}{'requests':>10}{'firms/req':>11}{'total':>10}")
+    for prompt_format, stats in report['formats'].items():
+        print(f"{prompt_format:<10}{stats['tokens_per_firm_mean']:>10}{stats['tokens_per_firm_p95']:>8}"
+              f"{stats['fixed_prompt_tokens']:>8}{stats['requests']:>10}{stats['firms_per_request']:>11}"
+              f"{stats['total_prompt_tokens']:>10}")
+
+    verbose, compact = report['formats']['verbose'], report['formats']['compact']
+    if verbose['tokens_per_firm_mean']:
+        saving = 1 - compact['tokens_per_firm_mean'] / verbose['tokens_per_firm_mean']
+        report['tokens_per_firm_saving'] = round(saving, 3)
+        print(f"Compact encoding saves {saving:.0%} tokens per firm")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.json_path}")
+
+
+if __name__ == '__main__':
+    main()
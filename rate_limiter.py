@@ -0,0 +1,119 @@
+"""
+Rate Limiter - Client-side RPM/TPM pacing and retry helpers for LLM requests
+Token buckets refill continuously; a 429 with retry-after pauses every caller
+"""
+import logging
+import random
+import threading
+import time
+from typing import Optional
+
+# HTTP statuses worth retrying (throttling and transient server errors)
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# Exception class names (OpenAI 1.x and 0.x) that mean a transient failure without a status code
+RETRYABLE_ERROR_NAMES = {
+    'APIConnectionError', 'APITimeoutError', 'RateLimitError', 'InternalServerError',
+    'ServiceUnavailableError', 'Timeout', 'TryAgain'
+}
+
+# Error codes that will not clear up by waiting
+FATAL_ERROR_CODES = {'insufficient_quota', 'invalid_api_key'}
+
+
+class TokenBucket:
+    """Bucket holding up to one minute's budget, refilled continuously"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated = time.monotonic()
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount is available (requests larger than the bucket wait for a full bucket)"""
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.refill_per_second)
+
+    def consume(self, amount: float) -> None:
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """Paces requests against requests-per-minute and tokens-per-minute budgets (0 = unlimited)"""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.blocked_until = 0.0
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int) -> float:
+        """Block until one request of the given size fits both budgets; returns seconds waited"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self.blocked_until - now
+                for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                    if bucket is not None:
+                        bucket.refill(now)
+                        wait = max(wait, bucket.wait_time(amount))
+                if wait <= 0:
+                    for bucket, amount in ((self.requests, 1), (self.tokens, tokens)):
+                        if bucket is not None:
+                            bucket.consume(amount)
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for the given time (e.g. after a 429 with retry-after)"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """HTTP status of an API error, if it carries one"""
+    status = getattr(error, 'status_code', None) or getattr(error, 'http_status', None)
+    return int(status) if status else None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an API error is throttling or a transient failure worth retrying"""
+    code = getattr(error, 'code', None)
+    if code in FATAL_ERROR_CODES:
+        return False
+    status = error_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def is_fatal(error: Exception) -> bool:
+    """Whether an API error will fail every request of the run (bad key, no quota)"""
+    return getattr(error, 'code', None) in FATAL_ERROR_CODES or error_status(error) in (401, 403)
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-requested wait from retry-after / retry-after-ms headers, if present"""
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or getattr(error, 'headers', None) or {}
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        if headers.get('retry-after'):
+            return float(headers['retry-after'])
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
@@ -0,0 +1,155 @@
+"""
+Run Report - Per-batch token, latency, retry and cost accounting for one filter run
+Batches are recorded from worker threads; summary() gives totals and latency percentiles
+"""
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+# Estimated USD per 1M tokens: (prompt, cached prompt, completion), matched by longest model prefix
+MODEL_PRICES = {
+    'gpt-4.1-nano': (0.10, 0.025, 0.40),
+    'gpt-4.1-mini': (0.40, 0.10, 1.60),
+    'gpt-4.1': (2.00, 0.50, 8.00),
+    'gpt-4o-mini': (0.15, 0.075, 0.60),
+    'gpt-4o': (2.50, 1.25, 10.00),
+    'gpt-4-turbo': (10.00, 10.00, 30.00),
+    'gpt-4': (30.00, 30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 0.50, 1.50),
+}
+
+
+def model_price(model: str) -> Optional[tuple]:
+    """(prompt, cached prompt, completion) USD per 1M tokens for a model, None if unknown"""
+    for prefix in sorted(MODEL_PRICES, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_PRICES[prefix]
+    return None
+
+
+def estimate_cost(model: str, prompt_tokens: int, cached_prompt_tokens: int, completion_tokens: int) -> float:
+    """Estimated USD cost of one request (0 for models without a known price)"""
+    price = model_price(model)
+    if price is None:
+        return 0.0
+    uncached = max(0, prompt_tokens - cached_prompt_tokens)
+    return (uncached * price[0] + cached_prompt_tokens * price[1] + completion_tokens * price[2]) / 1e6
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Nearest-rank percentile (share in 0-1) of a list, 0 when empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(share * len(ordered)) - 1))]
+
+
+class RunReport:
+    """Batches, cache hits and stage timings of one filter run"""
+
+    def __init__(self, mode: str = 'vc_expert'):
+        self.mode = mode
+        self.started = time.time()
+        self.finished = None
+        self.batches = []
+        self.cached_firms = 0
+        self.stage_seconds = {}
+        self._lock = threading.Lock()
+
+    def new_batch(self, model: str, stage: str, firms: int) -> Dict[str, Any]:
+        """Blank record for a batch about to be sent (filled in by the request code)"""
+        return {
+            'model': model,
+            'stage': stage,
+            'firms': firms,
+            'status': 'pending',
+            'requests': 0,
+            'retries': 0,
+            'prompt_tokens': 0,
+            'cached_prompt_tokens': 0,
+            'completion_tokens': 0,
+            'latency_seconds': 0.0,
+            'wait_seconds': 0.0,
+            'cost_usd': 0.0,
+            'error': None
+        }
+
+    def add_batch(self, record: Dict[str, Any]) -> None:
+        """Record a finished (or failed) batch, pricing its tokens"""
+        record['cost_usd'] = round(estimate_cost(
+            record['model'], record['prompt_tokens'], record['cached_prompt_tokens'], record['completion_tokens']
+        ), 6)
+        with self._lock:
+            self.batches.append(record)
+
+    def add_cached(self, firms: int) -> None:
+        with self._lock:
+            self.cached_firms += firms
+
+    def add_stage_time(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.stage_seconds[stage] = round(self.stage_seconds.get(stage, 0.0) + seconds, 4)
+
+    def finish(self) -> None:
+        self.finished = time.time()
+
+    def summary(self) -> Dict[str, Any]:
+        """Run totals, batch latency percentiles and per-model breakdown"""
+        with self._lock:
+            batches = list(self.batches)
+        analyzed = sum(b['firms'] for b in batches if b['status'] == 'ok')
+        prompt_tokens = sum(b['prompt_tokens'] for b in batches)
+        completion_tokens = sum(b['completion_tokens'] for b in batches)
+        latencies = [b['latency_seconds'] for b in batches if b['status'] == 'ok']
+
+        by_model = {}
+        for b in batches:
+            model = by_model.setdefault(b['model'], {
+                'batches': 0, 'firms': 0, 'prompt_tokens': 0, 'completion_tokens': 0, 'cost_usd': 0.0
+            })
+            model['batches'] += 1
+            model['firms'] += b['firms']
+            model['prompt_tokens'] += b['prompt_tokens']
+            model['completion_tokens'] += b['completion_tokens']
+            model['cost_usd'] = round(model['cost_usd'] + b['cost_usd'], 6)
+
+        return {
+            'mode': self.mode,
+            'wall_seconds': round((self.finished or time.time()) - self.started, 3),
+            'batches': len(batches),
+            'failed_batches': sum(b['status'] != 'ok' for b in batches),
+            'requests': sum(b['requests'] for b in batches),
+            'retries': sum(b['retries'] for b in batches),
+            'firms_analyzed': analyzed,
+            'firms_cached': self.cached_firms,
+            'prompt_tokens': prompt_tokens,
+            'cached_prompt_tokens': sum(b['cached_prompt_tokens'] for b in batches),
+            'completion_tokens': completion_tokens,
+            'tokens_per_firm': round((prompt_tokens + completion_tokens) / analyzed, 1) if analyzed else 0.0,
+            'cost_usd': round(sum(b['cost_usd'] for b in batches), 6),
+            'latency_p50_seconds': round(percentile(latencies, 0.5), 3),
+            'latency_p95_seconds': round(percentile(latencies, 0.95), 3),
+            'stage_seconds': dict(self.stage_seconds),
+            'by_model': by_model
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary plus every batch record (for JSON export)"""
+        with self._lock:
+            batches = [dict(b) for b in self.batches]
+        return {'started': self.started, 'summary': self.summary(), 'batches': batches}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def save(self, directory: str) -> str:
+        """Write the report as run_<timestamp>.json in directory; returns the path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, time.strftime('run_%Y%m%d_%H%M%S', time.localtime(self.started))
+                            + f"_{int(self.started * 1000) % 1000:03d}.json")
+        with open(path, 'w') as f:
+            f.write(self.to_json())
+        return path
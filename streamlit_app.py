@@ -1,6 +1,9 @@
 import streamlit as st
 import pandas as pd
 from data_processor import ExcelProcessor
+from column_resolver import ColumnResolver
+from firm_dedup import FirmDeduplicator
+from dataset_cache import DatasetCache
 from ai_filter import AIFilter
 from config import Config
 
@@ -16,7 +19,9 @@ def main():
     
     # Initialize components
     config = Config()
-    processor = ExcelProcessor()
+    cache = DatasetCache(config.get_dataset_cache_dir(), config.get_dataset_cache_max_bytes())
+    resolver = ColumnResolver(config.get_schema_profile_path())
+    processor = ExcelProcessor(cache=cache, resolver=resolver)
     
     # API Key Configuration Section (at top, prominent)
     openai_key = config.get_openai_key()
@@ -55,13 +60,13 @@ def main():
         st.divider()
     
     # Initialize AI Filter (will use fallback if no API key)
-    ai_filter = AIFilter(config)
+    ai_filter = AIFilter(config, cache=cache)
     
     # File upload
     uploaded_file = st.file_uploader(
         "Upload Excel file with firms data",
-        type=['xlsx', 'xls'],
-        help="Excel file should contain firm information"
+        type=['xlsx', 'csv', 'parquet', 'arrow', 'feather'],
+        help="Excel, CSV, Parquet or Arrow file with firm information"
     )
     
     # Advanced options for data processing
@@ -78,6 +83,26 @@ def main():
         
         st.divider()
         
+        st.markdown("**Offline Ranking Mode**")
+        ranker_options = {'keyword': 'Keyword matching', 'bm25': 'BM25 relevance'}
+        ranker = st.radio(
+            "How to rank firms without the VC Expert",
+            options=list(ranker_options),
+            index=list(ranker_options).index(config.get_fallback_ranker()),
+            format_func=ranker_options.get,
+            horizontal=True,
+            help="BM25 weighs rare terms higher and normalizes for description length"
+        )
+        shortlist_size = st.number_input(
+            "Firms sent to VC Expert (top local matches, 0 = all)",
+            min_value=0,
+            max_value=5000,
+            value=config.get_cascade_shortlist_size(),
+            help="The offline ranker shortlists this many firms; only they are analyzed by the VC Expert"
+        )
+        
+        st.divider()
+        
         # Column mapping will be available after file upload
         if 'uploaded_columns' in st.session_state and st.session_state.uploaded_columns:
             st.markdown("**Manual Column Mapping**")
@@ -96,14 +121,19 @@ def main():
     
     if uploaded_file is not None:
         try:
-            # Process Excel file
-            df = processor.process_excel(uploaded_file, skip_rows=skip_rows)
+            # Process Excel file (manual mapping is part of the cache key)
+            manual_name_column = st.session_state.get('manual_name_column')
+            column_mapping = {'name': manual_name_column} if manual_name_column else None
+            df = processor.process_excel(uploaded_file, skip_rows=skip_rows, column_mapping=column_mapping)
             
             # Store original columns for manual mapping
             st.session_state.uploaded_columns = df.columns.tolist()
             
-            # FORCE use "Companies" column (capital C) as the name column
-            if 'Companies' in df.columns:
+            # Manual column mapping overrides auto-detection
+            if manual_name_column and manual_name_column in df.columns:
+                st.info(f"ℹ️ Using '{manual_name_column}' as company name column")
+            # Otherwise FORCE use "Companies" column (capital C) as the name column
+            elif 'Companies' in df.columns:
                 df['name'] = df['Companies']
                 companies_filled = (df['Companies'] != '').sum()
                 st.success(f"✅ Auto-selected 'Companies' column ({companies_filled} entries) as company names")
@@ -112,11 +142,6 @@ def main():
                 companies_filled = (df['companies'] != '').sum()
                 st.success(f"✅ Auto-selected 'companies' column ({companies_filled} entries) as company names")
             
-            # Apply manual column mapping if set (overrides auto-detection)
-            if 'manual_name_column' in st.session_state and st.session_state.manual_name_column in df.columns:
-                df['name'] = df[st.session_state.manual_name_column]
-                st.info(f"ℹ️ Using '{st.session_state.manual_name_column}' as company name column")
-            
             # Clean rows with empty or invalid names
             rows_before = len(df)
             df = processor.clean_empty_names(df)
@@ -129,6 +154,15 @@ def main():
                 else:
                     st.info(f"ℹ️ Removed {rows_removed} rows with invalid/empty company names")
             
+            # Merge repeated listings of the same company so each firm is scored once
+            duplicates_merged = 0
+            if config.is_dedup_enabled():
+                df, dedup_report = FirmDeduplicator(config.get_dedup_similarity()).deduplicate(df)
+                duplicates_merged = dedup_report['rows_before'] - dedup_report['rows_after']
+                if duplicates_merged > 0:
+                    st.info(f"ℹ️ Merged {duplicates_merged} duplicate rows "
+                            f"({dedup_report['near_matches']} near-duplicate names)")
+            
             # Validate that we have actual company data
             if len(df) == 0:
                 st.error("❌ No valid company data found in Excel file. Please check your file format.")
@@ -148,6 +182,8 @@ def main():
                 st.caption(f"Total rows after processing: {len(df)}")
                 if rows_removed > 0:
                     st.caption(f"Rows removed: {rows_removed}")
+                if duplicates_merged > 0:
+                    st.caption(f"Duplicate rows merged: {duplicates_merged}")
                 st.caption(f"Total columns: {len(df.columns)}")
                 
                 st.divider()
@@ -246,15 +282,38 @@ def main():
                                 # Store initial state to detect fallback
                                 expected_vc_mode = openai_key and vc_available
                                 
-                                results = ai_filter.filter_firms(df, heuristics)
+                                # Stream partial rankings: live leaderboard + progress while batches complete
+                                stage_labels = {'screening': "Screening", 'analysis': "VC Expert analysis"}
+                                progress_bar = st.progress(0.0)
+                                leaderboard = st.empty()
+                                results = []
+                                final_update = {}
+                                for update in ai_filter.iter_filter_firms(df, heuristics, ranker=ranker, shortlist_size=shortlist_size):
+                                    results = update['ranking']
+                                    final_update = update
+                                    if update['stage'] not in stage_labels:
+                                        continue
+                                    if update['total']:
+                                        progress_bar.progress(
+                                            update['done'] / update['total'],
+                                            text=f"{stage_labels[update['stage']]}: {update['done']}/{update['total']} batches"
+                                        )
+                                    if results:
+                                        leaderboard.dataframe(
+                                            pd.DataFrame(
+                                                [{'Rank': i, 'Firm': firm['name'], 'Score': firm['score']}
+                                                 for i, firm in enumerate(results, 1)]
+                                            ),
+                                            hide_index=True,
+                                            use_container_width=True
+                                        )
+                                progress_bar.empty()
+                                leaderboard.empty()
                                 
-                                # Check if results look like fallback (keyword matching)
-                                used_fallback = False
-                                if results and len(results) > 0:
-                                    # Detect fallback by checking if reason is generic
-                                    first_reason = results[0].get('reason', '')
-                                    if 'mentions' in first_reason.lower() and len(first_reason) < 100:
-                                        used_fallback = True
+                                # Fallback results arrive as a 'fallback' update and mark the run report
+                                final_report = final_update.get('report') or ai_filter.last_report
+                                used_fallback = (final_update.get('stage') == 'fallback'
+                                                 or getattr(final_report, 'mode', None) == 'fallback')
                                 
                                 if results and len(results) > 0:
                                     st.subheader("🏆 Top Matching Firms")
@@ -262,6 +321,40 @@ def main():
                                     # Show ACTUAL filtering method used (detect fallback)
                                     if expected_vc_mode and not used_fallback:
                                         st.success("✨ **VC Expert Analysis Complete** - Results analyzed by AI with venture capital expertise")
+                                        run_stats = ai_filter.vc_expert.last_run_stats
+                                        if run_stats['prompt_tokens']:
+                                            cache_rate = run_stats['cached_prompt_tokens'] / run_stats['prompt_tokens']
+                                            st.caption(f"⚡ {run_stats['requests']} API requests · provider prompt cache hit rate {cache_rate:.0%} of prompt tokens")
+                                        failed_firms = ai_filter.vc_expert.last_failed_firms
+                                        if failed_firms:
+                                            st.warning(f"⚠️ {failed_firms} firms were not analyzed - their batches kept failing after retries (see terminal). Re-run to retry them; finished firms are cached.")
+                                        
+                                        # Where the run's time and money went
+                                        run_report = ai_filter.last_report
+                                        report_summary = run_report.summary()
+                                        with st.expander(f"📈 Run Report - ~${report_summary['cost_usd']:.4f}, {report_summary['wall_seconds']:.1f}s"):
+                                            metric_cols = st.columns(4)
+                                            metric_cols[0].metric("Estimated cost", f"${report_summary['cost_usd']:.4f}")
+                                            metric_cols[1].metric("Tokens", f"{report_summary['prompt_tokens'] + report_summary['completion_tokens']:,}")
+                                            metric_cols[2].metric("Tokens / firm", report_summary['tokens_per_firm'])
+                                            metric_cols[3].metric("Batch latency p50 / p95", f"{report_summary['latency_p50_seconds']:.1f}s / {report_summary['latency_p95_seconds']:.1f}s")
+                                            st.caption(
+                                                f"{report_summary['requests']} requests · {report_summary['retries']} retries · "
+                                                f"{report_summary['failed_batches']} failed batches · "
+                                                f"{report_summary['firms_analyzed']} firms analyzed, {report_summary['firms_cached']} from cache"
+                                            )
+                                            if run_report.batches:
+                                                st.dataframe(
+                                                    pd.DataFrame(run_report.batches).drop(columns=['error']),
+                                                    hide_index=True,
+                                                    use_container_width=True
+                                                )
+                                            st.download_button(
+                                                "⬇️ Export report (JSON)",
+                                                data=run_report.to_json(),
+                                                file_name="vc_filter_run_report.json",
+                                                mime="application/json"
+                                            )
                                     elif expected_vc_mode and used_fallback:
                                         st.error("❌ **VC Expert Failed** - Fell back to keyword matching")
                                         
@@ -298,6 +391,34 @@ def main():
                                     if keywords and not openai_key:
                                         st.caption(f"🔍 Searching for keywords: {', '.join(keywords)}")
                                     
+                                    # Show hard constraints applied before the VC Expert
+                                    prefilter = ai_filter.last_prefilter
+                                    if prefilter and prefilter['constraints']:
+                                        with st.expander(f"🧮 Pre-filter: {prefilter['rows_after']}/{prefilter['rows_before']} firms sent to VC Expert"):
+                                            for constraint in prefilter['constraints']:
+                                                st.text(f"• {constraint['label']} ({constraint['passed']} passed)")
+                                            if prefilter['relaxed']:
+                                                st.warning("⚠️ No firm met every constraint - all firms were analyzed")
+                                    
+                                    # Show how the local shortlist fed the VC Expert (recall diagnostics)
+                                    cascade = ai_filter.last_cascade
+                                    if cascade and expected_vc_mode and not used_fallback:
+                                        with st.expander(f"🎯 Shortlist: top {cascade['shortlist_size']}/{cascade['rows_before']} firms by {cascade['ranker']} score"):
+                                            kept = cascade['matched_in_shortlist']
+                                            matched = cascade['matched_rows']
+                                            ranks = [rank for rank in cascade['finalist_ranks'] if rank]
+                                            col_a, col_b, col_c = st.columns(3)
+                                            col_a.metric("Local matches kept", f"{kept}/{matched}",
+                                                         help="Firms the local ranker matched that made the shortlist")
+                                            col_b.metric("Ties left out", cascade['tied_left_out'],
+                                                         help="Firms scoring the same as the last shortlisted firm but not sent")
+                                            col_c.metric("Deepest finalist", f"#{max(ranks)}" if ranks else "n/a",
+                                                         help="Lowest local rank among the VC Expert's top picks")
+                                            if ranks and max(ranks) > 0.8 * cascade['shortlist_size']:
+                                                st.warning("⚠️ Finalists come from the bottom of the shortlist - a larger shortlist may surface better matches")
+                                            elif matched > kept or cascade['tied_left_out']:
+                                                st.caption("💡 Increase 'Firms sent to VC Expert' in Advanced Options to analyze more firms")
+                                    
                                     for i, firm in enumerate(results, 1):
                                         with st.container():
                                             col1, col2 = st.columns([3, 1])
@@ -27,7 +27,9 @@ except ImportError as e:
 
 # Test 3: Initialize with mock config
 print("\n3. Testing initialization...")
-class MockConfig:
+class MockConfig(Config):
+    """Real config (batching, caching, routing settings) with a prompted API key"""
+    
     def get_openai_key(self):
         # You need to put your REAL API key here for testing
         key = input("   Enter your OpenAI API key (or press Enter to skip): ").strip()
@@ -0,0 +1,247 @@
+"""Tests for AIFilter's local shortlist (cascade) ahead of the VC Expert"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bm25_index import SCIPY_AVAILABLE
+
+HEURISTICS = "B2B fintech payments platform"
+
+
+@pytest.fixture
+def ai_filter(monkeypatch):
+    monkeypatch.setenv('LLM_CACHE_MAX_ENTRIES', '0')
+    monkeypatch.setenv('DATASET_CACHE_MAX_MB', '0')
+    from ai_filter import AIFilter
+    from config import Config
+    return AIFilter(Config())
+
+
+@pytest.fixture
+def df():
+    descriptions = ['Grocery delivery', 'B2B payments platform for fintech', 'Pet food', 'Fintech lending',
+                    'Payments API', 'Restaurant software', 'B2B fintech payments platform', 'Solar panels']
+    return pd.DataFrame({
+        'name': [f"Firm {i}" for i in range(len(descriptions))],
+        'description': descriptions,
+        'industry': ['Retail', 'FinTech', 'Consumer', 'FinTech', 'FinTech', 'Software', 'FinTech', 'Energy'],
+        'location': ['Boston'] * len(descriptions)
+    })
+
+
+@pytest.mark.parametrize('ranker', ['keyword', pytest.param('bm25', marks=pytest.mark.skipif(
+    not SCIPY_AVAILABLE, reason="scipy is required for BM25 ranking"))])
+def test_shortlist_keeps_best_local_matches_first(ai_filter, df, ranker):
+    shortlist = ai_filter._apply_cascade(df, HEURISTICS, ranker, 3)
+    assert len(shortlist) == 3
+    assert set(shortlist['name'].iloc[:2]) == {'Firm 1', 'Firm 6'}
+    assert set(shortlist['industry']) == {'FinTech'}
+
+    stats = ai_filter.last_cascade
+    assert stats['ranker'] == ranker
+    assert stats['rows_before'] == len(df)
+    assert stats['shortlist_size'] == 3
+    assert stats['matched_in_shortlist'] == 3
+    assert stats['matched_rows'] == 4
+
+
+def test_shortlist_follows_full_ranking_order(ai_filter, df):
+    shortlist = ai_filter._apply_cascade(df, HEURISTICS, 'keyword', 4)
+    ranking = ai_filter._fallback_filter(df, HEURISTICS, 4, 'keyword')
+    assert shortlist['name'].tolist() == [firm['name'] for firm in ranking]
+
+
+@pytest.mark.parametrize('shortlist_size', [0, 8, 20])
+def test_no_shortlist_when_disabled_or_not_smaller(ai_filter, df, shortlist_size):
+    assert ai_filter._apply_cascade(df, HEURISTICS, 'keyword', shortlist_size) is df
+    assert ai_filter.last_cascade is None
+
+
+def test_shortlist_size_defaults_to_config(ai_filter, df, monkeypatch):
+    monkeypatch.setenv('CASCADE_SHORTLIST', '2')
+    assert len(ai_filter._apply_cascade(df, HEURISTICS, 'keyword', None)) == 2
+
+
+def test_tied_rows_left_out_are_reported(ai_filter, df):
+    # Every row ties on a keyword nobody mentions
+    ai_filter._apply_cascade(df, "quantum computing", 'keyword', 3)
+    assert ai_filter.last_cascade['matched_rows'] == 0
+    assert ai_filter.last_cascade['tied_left_out'] == len(df) - 3
+
+
+class StubExpert:
+    """Stands in for VCExpertAgent, replaying scripted updates (and optionally failing after them)"""
+
+    def __init__(self, updates, error=None):
+        self.updates = updates
+        self.error = error
+        self.firms = None
+
+    def is_available(self):
+        return True
+
+    def iter_analyze_firms(self, firms, criteria, top_n=10, report=None):
+        self.firms = firms
+        for update in self.updates:
+            yield dict(update)
+        if self.error is not None:
+            raise self.error
+
+
+def expert_updates():
+    first = {'name': 'Firm 6', 'score': 91, 'reason': 'Payments fit'}
+    second = {'name': 'Firm 1', 'score': 88, 'reason': 'Fintech fit'}
+    return [
+        {'stage': 'analysis', 'done': 0, 'total': 2, 'ranking': []},
+        {'stage': 'analysis', 'done': 1, 'total': 2, 'ranking': [first]},
+        {'stage': 'analysis', 'done': 2, 'total': 2, 'ranking': [first, second]},
+        {'stage': 'done', 'done': 2, 'total': 2, 'ranking': [first, second]},
+    ]
+
+
+@pytest.fixture
+def expert_filter(ai_filter, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', 'sk-test')
+    monkeypatch.setenv('PREFILTER_ENABLED', 'false')
+    monkeypatch.setenv('CASCADE_SHORTLIST', '3')
+    return ai_filter
+
+
+def test_expert_updates_stream_through_with_the_report_last(expert_filter, df):
+    expert_filter.vc_expert = StubExpert(expert_updates())
+
+    updates = list(expert_filter.iter_filter_firms(df, HEURISTICS, top_n=2))
+    assert [update['stage'] for update in updates] == ['analysis', 'analysis', 'analysis', 'done']
+    assert all('report' not in update for update in updates[:-1])
+    report = updates[-1]['report']
+    assert report is expert_filter.last_report
+    assert report.mode == 'vc_expert'
+    assert report.summary()['mode'] == 'vc_expert'
+    assert [firm['name'] for firm in updates[-1]['ranking']] == ['Firm 6', 'Firm 1']
+    # Only the shortlist reaches the expert
+    assert len(expert_filter.vc_expert.firms) == 3
+
+
+def test_filter_firms_returns_the_final_update(expert_filter, df):
+    expert_filter.vc_expert = StubExpert(expert_updates())
+    results, report = expert_filter.filter_firms(df, HEURISTICS, top_n=2, return_report=True)
+    assert results == expert_updates()[-1]['ranking']
+    assert report.mode == 'vc_expert'
+
+
+def assert_fallback_update(update, top_n):
+    assert set(update) == {'stage', 'done', 'total', 'ranking', 'report'}
+    assert (update['stage'], update['done'], update['total']) == ('fallback', 1, 1)
+    assert update['report'].mode == 'fallback'
+    assert 0 < len(update['ranking']) <= top_n
+    assert {'name', 'score', 'reason'} <= set(update['ranking'][0])
+
+
+def test_no_api_key_gives_a_single_fallback_update(ai_filter, df, monkeypatch):
+    monkeypatch.setenv('OPENAI_API_KEY', '')
+    updates = list(ai_filter.iter_filter_firms(df, HEURISTICS, top_n=3))
+    assert len(updates) == 1
+    assert_fallback_update(updates[0], 3)
+
+
+def test_expert_failure_ends_with_a_fallback_update(expert_filter, df):
+    expert_filter.vc_expert = StubExpert(expert_updates()[:2], error=RuntimeError("connection reset"))
+
+    updates = list(expert_filter.iter_filter_firms(df, HEURISTICS, top_n=3))
+    assert [update['stage'] for update in updates] == ['analysis', 'analysis', 'fallback']
+    assert_fallback_update(updates[-1], 3)
+
+
+def legacy_fallback_filter(df, heuristics, top_n):
+    """The original row-by-row keyword scorer, kept as the reference for the vectorized one"""
+    keywords = [word for word in heuristics.lower().split() if len(word) > 2]
+    weights = {'industry': 25, 'revenue': 20, 'stage': 15, 'description': 15, 'location': 10, 'name': 20}
+    matches = []
+    for _, row in df.iterrows():
+        text = {field: str(row.get(field, '')).lower() for field in weights}
+        field_matches = {field: [keyword for keyword in keywords if keyword in text[field]] for field in weights}
+        score = sum(weights[field] * len(kws) for field, kws in field_matches.items())
+
+        reason_details = []
+        if score:
+            for field, kws in field_matches.items():
+                actual_value = str(row.get(field, '')).strip()
+                if kws and actual_value and actual_value != 'nan':
+                    kw_str = "', '".join(kws[:2])
+                    if field == 'industry':
+                        reason_details.append(f"Industry: '{actual_value}' (matches '{kw_str}')")
+                    elif field == 'revenue':
+                        reason_details.append(f"Revenue: {actual_value}")
+                    elif field == 'stage':
+                        reason_details.append(f"Stage: {actual_value}")
+                    elif field == 'description' and len(reason_details) < 3:
+                        reason_details.append(f"Description mentions '{kw_str}'")
+            reason_details = reason_details or ["Matches search keywords"]
+        else:
+            reason_details = ["No strong keyword matches found"]
+            score = 1
+
+        matches.append({'name': row.get('name', 'Unknown'), 'score': min(score, 100),
+                        'reason': '; '.join(reason_details[:4])})
+
+    matches.sort(key=lambda x: x['score'], reverse=True)
+    return matches[:top_n]
+
+
+@pytest.mark.parametrize('engine', ['index', 'scan'])
+@pytest.mark.parametrize('heuristics', [
+    HEURISTICS,
+    "FinTech FINTECH payments Series",
+    "pay tech boston boston",
+    "nan none quantum",
+])
+def test_keyword_scores_match_the_row_by_row_scorer(ai_filter, monkeypatch, engine, heuristics):
+    monkeypatch.setenv('FALLBACK_ENGINE', engine)
+    df = pd.DataFrame({
+        'name': ['PayTech', 'Fintech Payments Co', np.nan, 'Boston Pay', 'Quiet Co', 'None Capital', 'Solar'],
+        'description': ['B2B payments platform', np.nan, 'Fintech lending for B2B', 'payments, payments',
+                        '', 'Fintech platform', None],
+        'industry': ['FinTech', 'fintech', 'FINTECH / Payments', np.nan, 'Retail', 'Fintech', pd.NA],
+        'stage': ['Series A', np.nan, 'Seed', 'Series B', 'Series A', '', 'Growth'],
+        'location': ['Boston', 'New York', 'Boston, MA', np.nan, 'Austin', 'Boston', 'Paris']
+    }, index=[10, 3, 7, 1, 0, 12, 5])
+
+    assert ai_filter._fallback_filter(df, heuristics, len(df), 'keyword') == legacy_fallback_filter(
+        df, heuristics, len(df))
+    assert ai_filter._fallback_filter(df, heuristics, 3, 'keyword') == legacy_fallback_filter(df, heuristics, 3)
+
+
+def test_keyword_index_is_built_once_per_loaded_dataset(ai_filter, monkeypatch, tmp_path):
+    import ai_filter as ai_filter_module
+    from data_processor import ExcelProcessor
+    from dataset_cache import DatasetCache
+    from keyword_index import KeywordIndex
+
+    builds = []
+    original_build = KeywordIndex.build
+
+    def counting_build(df, fields):
+        builds.append(len(df))
+        return original_build(df, fields)
+
+    monkeypatch.setattr(KeywordIndex, 'build', counting_build)
+    monkeypatch.setattr(ai_filter_module, '_SEARCH_INDEXES', {})
+    rows = [f"Firm {i},{'B2B payments platform' if i % 3 else 'Pet food'},{'FinTech' if i % 2 else 'Retail'},Boston\n"
+            for i in range(30)]
+    upload = io.BytesIO(("Companies,Description,Industry,Location\n" + "".join(rows)).encode('utf-8'))
+    df = ExcelProcessor(cache=DatasetCache(str(tmp_path), 0)).process_excel(upload)
+
+    def ranking(frame, engine):
+        monkeypatch.setenv('FALLBACK_ENGINE', engine)
+        return ai_filter._fallback_filter(frame, HEURISTICS, 10, 'keyword')
+
+    assert ranking(df, 'index') == ranking(df, 'scan')
+    ranking(df, 'index')
+    assert builds == [len(df)]
+
+    # A row subset is not the loaded dataset, so it gets its own index
+    subset = df[df['industry'] == 'FinTech'].reset_index(drop=True)
+    assert ranking(subset, 'index') == ranking(subset, 'scan')
+    assert builds == [len(df), len(subset)]
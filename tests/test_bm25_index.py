@@ -0,0 +1,76 @@
+"""Tests for the sparse BM25F index"""
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bm25_index import BM25_B, BM25_FIELD_WEIGHTS, BM25_K1, SCIPY_AVAILABLE, BM25Index, tokenize
+
+pytestmark = pytest.mark.skipif(not SCIPY_AVAILABLE, reason="scipy is required for BM25 ranking")
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'name': ['Acme AI', 'Beta Payments', 'Gamma Health', 'Delta'],
+        'description': ['AI platform for banks', 'Payments API for merchants', 'AI diagnostics for clinics', None],
+        'industry': ['Software', 'FinTech', 'HealthTech', 'AI'],
+        'location': ['Boston', 'Austin', 'Boston', 'Paris']
+    })
+
+
+def reference_scores(df, query):
+    """Straightforward BM25F over the field-weighted term frequencies"""
+    docs = []
+    for _, row in df.iterrows():
+        tf = {}
+        for field, boost in BM25_FIELD_WEIGHTS.items():
+            if field in df.columns:
+                for token in tokenize(row[field]):
+                    tf[token] = tf.get(token, 0.0) + boost
+        docs.append(tf)
+    lengths = [sum(tf.values()) for tf in docs]
+    avg_length = sum(lengths) / len(lengths)
+    scores = []
+    for tf, length in zip(docs, lengths):
+        score = 0.0
+        for term in tokenize(query):
+            if term not in tf:
+                continue
+            doc_freq = sum(term in other for other in docs)
+            idf = math.log(1.0 + (len(docs) - doc_freq + 0.5) / (doc_freq + 0.5))
+            norm = BM25_K1 * (1.0 - BM25_B + BM25_B * length / avg_length)
+            score += idf * tf[term] * (BM25_K1 + 1.0) / (tf[term] + norm)
+        scores.append(score)
+    return scores
+
+
+def test_tokenize_drops_stopwords_and_punctuation():
+    assert tokenize("Looking for B2B AI-first companies in the U.S.") == ['b2b', 'ai', 'first', 'u', 's']
+
+
+@pytest.mark.parametrize('query', ['AI', 'AI platform for banks', 'payments payments', 'boston health'])
+def test_scores_match_reference_bm25f(df, query):
+    scores, _ = BM25Index.build(df).score(query)
+    assert scores == pytest.approx(reference_scores(df, query), rel=1e-5)
+
+
+def test_field_boost_ranks_industry_match_higher(df):
+    scores, terms = BM25Index.build(df).score('ai')
+    assert terms == ['ai']
+    # "ai" in the (boosted) industry of a short document beats a description mention
+    assert int(np.argmax(scores)) == 3
+    assert scores[1] == 0
+
+
+def test_unknown_terms_score_zero(df):
+    index = BM25Index.build(df)
+    scores, terms = index.score('quantum for the')
+    assert terms == []
+    assert scores.tolist() == [0.0] * len(df)
+
+
+def test_custom_fields(df):
+    scores, _ = BM25Index.build(df, ['location']).score('boston')
+    assert (scores > 0).tolist() == [True, False, True, False]
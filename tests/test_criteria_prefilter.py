@@ -0,0 +1,138 @@
+"""Tests for criteria_prefilter: heuristics -> hard constraints -> masks"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from criteria_prefilter import CriteriaPrefilter
+
+SAMPLE_HEURISTICS = os.path.join(os.path.dirname(__file__), '..', 'SAMPLE_HEURISTICS.md')
+
+REVENUE_5M = 'revenue_usd >= $5M'
+REVENUE_OVER_5M = 'revenue_usd > $5M'
+VALUATION_200_400 = ['valuation_usd >= $200M', 'valuation_usd <= $400M']
+SERIES_B_C = 'Stage in Series B, Series C'
+AI = 'Industry matches AI/ML'
+AI_SAAS = 'Industry matches AI/ML or SaaS'
+
+# Constraints expected for every example in SAMPLE_HEURISTICS.md, keyed by the example's first line
+EXPECTED = {
+    'Looking for B2B artificial intelligence companies with the following criteria:': [
+        REVENUE_5M, *VALUATION_200_400,
+        'Stage in Series B, Series C, Series D, Series E, Series F, Series G, Series H', AI
+    ],
+    'B2B AI companies generating over $5M revenue with valuations between $200M-$400M, backed by top-tier VC '
+    'funds or corporate venture capital': [REVENUE_OVER_5M, *VALUATION_200_400, AI],
+    'B2B AI artificial intelligence machine learning enterprise revenue $5M $10M $20M valuation $200M $300M '
+    '$400M Series B Series C venture capital VC CVC corporate venture': [SERIES_B_C, AI],
+    'Target: B2B-only AI companies with strong financial metrics': [
+        REVENUE_5M, *VALUATION_200_400, SERIES_B_C, AI_SAAS
+    ],
+    'B2B AI enterprise software companies with $5M+ ARR, valuations of $200-400M, Series B or C stage, funded '
+    'by tier-1 venture capital firms like Sequoia, Andreessen Horowitz, or corporate venture capital arms': [
+        REVENUE_5M, *VALUATION_200_400, SERIES_B_C, AI
+    ],
+    'B2B artificial intelligence firms generating over $5 million revenue with valuations between $200M-$400M '
+    'backed by top VC funds or CVCs': [REVENUE_OVER_5M, *VALUATION_200_400, AI],
+    'B2B AI companies with strong revenue and venture capital backing in the growth stage': [AI],
+    '[Business Model] [Technology/Industry] companies with:': [],
+    'B2B AI companies with:': [
+        REVENUE_OVER_5M, *VALUATION_200_400, SERIES_B_C, AI_SAAS, 'Location in United States'
+    ],
+    'B2B AI companies with venture capital funding': [AI],
+    'B2B AI companies with $5M+ revenue and venture capital funding': [REVENUE_5M, AI],
+    'B2B AI companies with $5M+ revenue, $200-400M valuation, and VC funding': [REVENUE_5M, *VALUATION_200_400, AI],
+    'B2B AI companies with $5M+ revenue, $200-400M valuation, backed by top-tier VC or CVC': [
+        REVENUE_5M, *VALUATION_200_400, AI
+    ],
+    'B2B artificial intelligence companies generating minimum $5 million annual revenue with valuations between '
+    '$200 million and $400 million, backed by top-tier venture capital firms or corporate venture capital (CVC). '
+    'Focus on enterprise software, SaaS, or AI platforms serving business customers, typically in Series B or '
+    'Series C funding stages.': [REVENUE_5M, *VALUATION_200_400, SERIES_B_C, AI_SAAS],
+    'B2B AI artificial intelligence machine learning enterprise SaaS revenue $5M $5 million $10M ARR valuation '
+    '$200M $300M $400M Series B Series C venture capital VC CVC corporate venture backed funded tier-1': [
+        SERIES_B_C, AI_SAAS
+    ],
+}
+
+
+def sample_examples():
+    with open(SAMPLE_HEURISTICS, encoding='utf-8') as f:
+        return re.findall(r'```\n(.*?)```', f.read(), re.DOTALL)
+
+
+def labels(heuristics):
+    return sorted(c['label'] for c in CriteriaPrefilter().compile(heuristics))
+
+
+@pytest.mark.parametrize('example', sample_examples(), ids=lambda text: text.strip().splitlines()[0][:40])
+def test_sample_heuristics(example):
+    first_line = example.strip().splitlines()[0]
+    assert first_line in EXPECTED, "New SAMPLE_HEURISTICS.md example: add its expected constraints"
+    assert labels(example) == sorted(EXPECTED[first_line])
+
+
+@pytest.mark.parametrize('heuristics, expected', [
+    ('Series B-C sweet spot', ['Stage in Series B, Series C']),
+    ('Seed to Series B', ['Stage in Seed, Series A, Series B']),
+    ('Series A/B', ['Stage in Series A, Series B']),
+    ('series a or b', ['Stage in Series A, Series B']),
+    ('Series B - Series D', ['Stage in Series B, Series C, Series D']),
+    ('Series E+', ['Stage in Series E, Series F, Series G, Series H']),
+    ('Series A or earlier', ['Stage in Pre-Seed, Seed, Series A']),
+    ('Series B and a strong team', ['Stage in Series B']),
+    ('not seed stage', []),
+    ('Series A preferred', []),
+])
+def test_stages(heuristics, expected):
+    assert labels(heuristics) == expected
+
+
+@pytest.mark.parametrize('heuristics, expected', [
+    ('Valuation: $200M minimum, $400M maximum', ['valuation_usd <= $400M', 'valuation_usd >= $200M']),
+    ('revenue of $5M or more', ['revenue_usd >= $5M']),
+    ('headcount of 50 or fewer', ['employee_count <= 50']),
+    ('revenue no more than $10M', ['revenue_usd <= $10M']),
+    ('revenue not over $5M', []),
+    ('at least 2 years of revenue history', []),
+    ('revenue growth of at least 40%', []),
+    ('revenue over $1,000,000', ['revenue_usd > $1M']),
+    ('founded between 2015 and 2020', ['year_founded <= 2020', 'year_founded >= 2015']),
+    ('Revenue: $5M+ annual revenue, $10M+ ARR preferred', ['revenue_usd >= $5M']),
+])
+def test_numeric(heuristics, expected):
+    assert labels(heuristics) == expected
+
+
+@pytest.mark.parametrize('heuristics, expected', [
+    ('no crypto', []),
+    ('Exclude crypto', []),
+    ('AI companies, no crypto', ['Industry matches AI/ML']),
+    ('B2B only (not B2C), fintech', ['Industry matches Fintech']),
+    ('outside the US', []),
+    ('US-based AI', ['Industry matches AI/ML', 'Location in United States']),
+])
+def test_negation(heuristics, expected):
+    assert labels(heuristics) == expected
+
+
+def test_exclusion_alone_keeps_every_firm():
+    df = pd.DataFrame({'name': ['Coin Co', 'Pay Co'], 'industry': ['Crypto', 'Fintech']})
+    prefilter = CriteriaPrefilter()
+    kept, applied = prefilter.apply(df, prefilter.compile('Exclude crypto'))
+    assert len(kept) == 2
+    assert applied == []
+
+
+def test_apply_keeps_missing_values():
+    df = pd.DataFrame({
+        'name': ['Big', 'Small', 'Unknown'],
+        'stage': ['Series C', 'Seed', ''],
+        'revenue_usd': [20e6, 1e6, np.nan]
+    })
+    prefilter = CriteriaPrefilter()
+    kept, applied = prefilter.apply(df, prefilter.compile('Series B or later, revenue over $5M'))
+    assert kept['name'].tolist() == ['Big', 'Unknown']
+    assert [c['passed'] for c in applied] == [2, 2]
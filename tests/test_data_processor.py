@@ -0,0 +1,117 @@
+"""Tests for ExcelProcessor reading and cleaning uploads"""
+import io
+import logging
+
+import pandas as pd
+import pytest
+
+from data_processor import ExcelProcessor
+
+PREAMBLE = "Downloaded on:,2024-01-01\nCreated for:,Analyst\n\n"
+
+
+def csv_upload(rows):
+    header = "Companies,Description,HQ Post Code,Employees,Growth Rate\n"
+    return io.BytesIO((PREAMBLE + header + "".join(rows)).encode('utf-8'))
+
+
+def test_csv_values_are_read_as_text():
+    rows = [f"Firm {i},AI platform,0{2139 + i},{6 + i},2.90\n" for i in range(8)]
+    df = ExcelProcessor().process_excel(csv_upload(rows))
+    assert df['name'].tolist()[:2] == ['Firm 0', 'Firm 1']
+    assert df['hq post code'].tolist()[0] == '02139'
+    assert df['employees'].tolist()[0] == '6'
+    assert df['growth rate'].tolist()[0] == '2.90'
+
+
+def test_malformed_csv_rows_are_logged(caplog):
+    rows = [f"Firm {i},AI platform,0{2139 + i},{6 + i},2.90\n" for i in range(8)]
+    rows.insert(3, "Broken,row,with,too,many,fields\n")
+    with caplog.at_level(logging.WARNING, logger='data_processor'):
+        df = ExcelProcessor().process_excel(csv_upload(rows))
+    assert len(df) == 8
+    assert 'Skipped 1 malformed CSV rows' in caplog.text
+
+
+def test_legacy_xls_is_rejected():
+    ole2 = io.BytesIO(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1' + b'\0' * 512)
+    with pytest.raises(Exception, match=r'\.xls workbooks are not supported'):
+        ExcelProcessor().process_excel(ole2)
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('$2M ARR', 2e6),
+    ('FY2023: $5M', 5e6),
+    ('6.2M ARR', 6.2e6),
+    ('EUR 0.6M', 6e5),
+    ('$1,500,000', 1.5e6),
+    ('12.5 million', 12.5e6),
+    ('1066.2', 1066.2e6),
+    ('Pre-revenue', 0.0),
+    ('50-100', None),
+    ('$10M to $20M', None),
+    ('Grew 40% in 2023', None),
+])
+def test_money_parsing_is_anchored_to_currency_or_unit(text, expected):
+    df = ExcelProcessor()._add_numeric_columns(pd.DataFrame({'revenue': [text]}))
+    value = df['revenue_usd'].iloc[0]
+    assert pd.isna(value) if expected is None else value == pytest.approx(expected)
+
+
+def test_employee_ranges_are_left_missing():
+    df = ExcelProcessor()._add_numeric_columns(pd.DataFrame({'employees': ['51-200', '249']}))
+    assert pd.isna(df['employee_count'].iloc[0])
+    assert df['employee_count'].iloc[1] == 249
+
+
+def test_derived_numeric_columns_stay_out_of_firm_data():
+    from ai_filter import AIFilter
+    from config import Config
+
+    rows = [f"Firm {i},AI platform,0{2139 + i},{6 + i},2.90\n" for i in range(8)]
+    df = ExcelProcessor().process_excel(csv_upload(rows))
+    assert 'employee_count' in df.columns
+    firms = AIFilter(Config())._prepare_firm_data(df)
+    assert 'employee_count' not in firms[0]
+    assert firms[0]['employees'] == '6'
+
+
+def test_values_beyond_the_chunk_width_are_reported(caplog):
+    from openpyxl import Workbook
+
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Companies', 'Description', 'Industry'])
+    for i in range(40):
+        sheet.append([f"Firm {i}", 'AI platform', 'Software'] + (['extra', 'wide'] if i == 35 else []))
+    upload = io.BytesIO()
+    workbook.save(upload)
+
+    with caplog.at_level(logging.WARNING, logger='data_processor'):
+        chunks = list(ExcelProcessor()._iter_excel_chunks(upload, skip_rows=0, chunk_size=16))
+    assert [len(chunk) for chunk in chunks] == [16, 16, 8]
+    assert all(len(chunk.columns) == 3 for chunk in chunks)
+    assert chunks[2].iloc[3].tolist() == ['Firm 35', 'AI platform', 'Software']
+    assert 'Dropped values beyond column 3 in 1 rows' in caplog.text
+
+
+def test_chunked_ranking_matches_single_frame(tmp_path, monkeypatch):
+    from ai_filter import AIFilter
+    from config import Config
+    from generate_pitchbook_data import generate_firms, write_export
+
+    monkeypatch.setenv('LLM_CACHE_MAX_ENTRIES', '0')
+    path = tmp_path / 'export.csv'
+    write_export(generate_firms(2000, seed=0), str(path), 'csv')
+    data = path.read_bytes()
+    heuristics = 'B2B AI SaaS companies with revenue over $5M in the United States'
+
+    df = ExcelProcessor().process_excel(io.BytesIO(data))
+    chunks = list(ExcelProcessor().iter_chunks(io.BytesIO(data), chunk_size=300))
+    for target in ('name', 'description', 'location', 'industry'):
+        assert [value for chunk in chunks for value in chunk[target].tolist()] == df[target].tolist()
+
+    ai_filter = AIFilter(Config())
+    single = ai_filter._fallback_filter(df, heuristics, 25, ranker='keyword')
+    chunked = ai_filter.rank_chunks(iter(chunks), heuristics, 25)
+    assert [(r['name'], r['score']) for r in chunked] == [(r['name'], r['score']) for r in single]
@@ -0,0 +1,90 @@
+"""Tests for the on-disk DatasetCache"""
+import io
+
+import pandas as pd
+import pytest
+
+from data_processor import ExcelProcessor
+from dataset_cache import PYARROW_AVAILABLE, DatasetCache
+
+pytestmark = pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow is required for the dataset cache")
+
+
+def test_round_trip_keeps_dtypes(tmp_path):
+    string = pd.StringDtype('pyarrow')
+    df = pd.DataFrame({
+        'name': pd.Series(['Acme', 'Beta', None], dtype=string),
+        'location': pd.Series(['Boston', 'Boston', 'Austin'], dtype=string).astype('category'),
+        'revenue_usd': [5e6, None, 0.0]
+    })
+    cache = DatasetCache(str(tmp_path), 10 ** 8)
+    cache.put('key', df)
+    pd.testing.assert_frame_equal(cache.get('key'), df)
+
+
+def test_cached_upload_matches_processed_frame(tmp_path):
+    from generate_pitchbook_data import generate_firms, write_export
+
+    path = tmp_path / 'export.csv'
+    write_export(generate_firms(300, seed=0), str(path), 'csv')
+    data = path.read_bytes()
+    processor = ExcelProcessor(cache=DatasetCache(str(tmp_path / 'cache'), 10 ** 8))
+
+    first = processor.process_excel(io.BytesIO(data))
+    second = processor.process_excel(io.BytesIO(data))
+    assert any(isinstance(dtype, pd.CategoricalDtype) for dtype in first.dtypes)
+    pd.testing.assert_frame_equal(second, first)
+
+
+def test_disabled_cache_never_stores(tmp_path):
+    cache = DatasetCache(str(tmp_path), 0)
+    cache.put('key', pd.DataFrame({'a': [1]}))
+    assert cache.get('key') is None
+
+
+@pytest.fixture
+def firms():
+    return pd.DataFrame({
+        'name': ['Acme AI', 'Beta Payments', None, 'Delta Labs'],
+        'description': ['AI platform for banks', 'Payments API', 'AI diagnostics', ''],
+        'industry': ['Software', 'FinTech', 'HealthTech', 'AI'],
+        'location': ['Boston', 'Austin', 'Boston', 'Paris']
+    })
+
+
+def test_keyword_index_artifact_round_trip(tmp_path, firms):
+    from keyword_index import KeywordIndex
+
+    cache = DatasetCache(str(tmp_path), 10 ** 8)
+    index = KeywordIndex.build(firms, ['name', 'description', 'industry', 'stage'])
+    cache.put_artifact('key', 'keyword_index', *index.to_arrays())
+    assert [path.name for path in tmp_path.iterdir()] == ['key.keyword_index.npz']
+
+    restored = KeywordIndex.from_arrays(*cache.get_artifact('key', 'keyword_index'))
+    for field in ('name', 'description', 'industry', 'stage'):
+        for keyword in ('ai', 'pay', 'none', 'boston'):
+            assert restored.rows_containing(field, keyword).tolist() == index.rows_containing(field, keyword).tolist()
+
+
+def test_bm25_index_artifact_round_trip(tmp_path, firms):
+    from bm25_index import SCIPY_AVAILABLE, BM25Index
+
+    if not SCIPY_AVAILABLE:
+        pytest.skip("scipy is required for BM25 ranking")
+    cache = DatasetCache(str(tmp_path), 10 ** 8)
+    index = BM25Index.build(firms)
+    cache.put_artifact('key', 'bm25_index', *index.to_arrays())
+
+    restored = BM25Index.from_arrays(*cache.get_artifact('key', 'bm25_index'))
+    for query in ('AI platform', 'boston payments', 'quantum'):
+        scores, terms = restored.score(query)
+        expected_scores, expected_terms = index.score(query)
+        assert terms == expected_terms
+        assert scores.tolist() == expected_scores.tolist()
+
+
+def test_unreadable_artifact_is_dropped(tmp_path):
+    cache = DatasetCache(str(tmp_path), 10 ** 8)
+    (tmp_path / 'key.keyword_index.npz').write_bytes(b'not an archive')
+    assert cache.get_artifact('key', 'keyword_index') is None
+    assert list(tmp_path.iterdir()) == []
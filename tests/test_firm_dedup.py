@@ -0,0 +1,100 @@
+"""Tests for FirmDeduplicator and its name/domain normalization"""
+import pandas as pd
+import pytest
+
+from firm_dedup import FirmDeduplicator, normalize_domain, normalize_name
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('Acme Inc.', 'acme'),
+    ('ACME, Inc', 'acme'),
+    ('The Acme Group Holdings', 'acme'),
+    ('Société Générale SA', 'societegenerale'),
+    ('Smith & Sons', 'smithandsons'),
+    ('Group', 'group'),
+    (None, ''),
+])
+def test_normalize_name(name, expected):
+    assert normalize_name(name) == expected
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://www.Acme.io/about', 'acme.io'),
+    ('acme.io:8080', 'acme.io'),
+    ('http://linkedin.com/company/acme', ''),
+    ('n/a', ''),
+    (None, ''),
+])
+def test_normalize_domain(url, expected):
+    assert normalize_domain(url) == expected
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=['name', 'website', 'description', 'revenue'])
+
+
+def test_exact_name_and_domain_matches_merge_and_fill_blanks():
+    df = frame([
+        ['Acme Inc.', 'acme.io', '', '$5M'],
+        ['ACME', '', 'AI platform', ''],
+        ['Acme Robotics Co', 'https://www.acme.io', '', ''],
+        ['Beta', 'beta.com', 'Payments', '$1M'],
+    ])
+    deduped, report = FirmDeduplicator().deduplicate(df)
+    assert deduped['name'].tolist() == ['Acme Inc.', 'Beta']
+    assert deduped.loc[0, 'description'] == 'AI platform'
+    assert deduped.loc[0, 'revenue'] == '$5M'
+    assert report == {'rows_before': 4, 'rows_after': 2, 'exact_matches': 2, 'near_matches': 0}
+
+
+def test_near_duplicate_names_merge():
+    df = frame([['Datavault Analytics', '', 'x', ''], ['Datavault Analytic', '', '', '$2M']])
+    deduped, report = FirmDeduplicator().deduplicate(df)
+    assert len(deduped) == 1
+    assert deduped.loc[0, 'revenue'] == '$2M'
+    assert report['near_matches'] == 1
+
+
+@pytest.mark.parametrize('rows', [
+    # Different websites mean different companies
+    [['Datavault Analytics', 'datavault.com', '', ''], ['Datavault Analytic', 'datavault.io', '', '']],
+    [['Summit Partners', 'summitpartners.com', '', ''], ['Summit Partners', 'summit-partners.co.uk', '', '']],
+    # Numbered funds are distinct
+    [['Horizon Ventures Fund 2', '', '', ''], ['Horizon Ventures Fund 3', '', '', '']],
+    # Short names only merge on exact matches
+    [['Abcd', '', '', ''], ['Abce', '', '', '']],
+    # Shared hosts are not an identity
+    [['Acme', 'linkedin.com/company/acme', '', ''], ['Beta', 'linkedin.com/company/beta', '', '']],
+])
+def test_distinct_firms_are_kept(rows):
+    deduped, report = FirmDeduplicator().deduplicate(frame(rows))
+    assert len(deduped) == 2
+    assert report['rows_after'] == 2
+
+
+def test_same_name_without_website_joins_the_first_matching_entity():
+    df = frame([
+        ['Summit Partners', 'summitpartners.com', 'Growth equity', ''],
+        ['Summit Partners', 'summit-partners.co.uk', 'Seed fund', ''],
+        ['Summit Partners', '', '', '$9B AUM'],
+        ['Summit Partners', 'summit-partners.co.uk', '', '$50M fund'],
+    ])
+    deduped, report = FirmDeduplicator().deduplicate(df)
+    assert deduped['website'].tolist() == ['summitpartners.com', 'summit-partners.co.uk']
+    assert deduped['revenue'].tolist() == ['$9B AUM', '$50M fund']
+    assert report['exact_matches'] == 2
+
+
+def test_merge_keeps_column_dtypes():
+    df = frame([['Acme', '', '', ''], ['Acme Inc', 'acme.io', 'AI', '$5M']]).astype(pd.StringDtype())
+    df['location'] = pd.Series(['Boston', 'Boston']).astype('category')
+    deduped, _ = FirmDeduplicator().deduplicate(df)
+    assert deduped.dtypes.equals(df.dtypes)
+    assert deduped.loc[0, 'website'] == 'acme.io'
+
+
+def test_frame_without_name_column_is_unchanged():
+    df = pd.DataFrame({'description': ['a', 'a']})
+    deduped, report = FirmDeduplicator().deduplicate(df)
+    assert deduped is df
+    assert report['rows_after'] == 2
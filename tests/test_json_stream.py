@@ -0,0 +1,64 @@
+"""Tests for the tolerant streaming JSON result parser"""
+import json
+
+import pytest
+
+from json_stream import JSONArrayStreamParser, parse_json_objects
+
+RESULTS = [
+    {'rank': 1, 'name': 'Acme {AI}', 'reason': 'Says "B2B" and [SaaS]'},
+    {'rank': 2, 'name': 'Beta', 'reason': 'Back\\slash \\" escape'},
+    {'rank': 3, 'name': 'Gamma', 'scores': {'fit': 0.9}}
+]
+
+
+@pytest.mark.parametrize('text', [
+    json.dumps(RESULTS),
+    json.dumps({'results': RESULTS}),
+    "Here is the ranking:\n```json\n" + json.dumps(RESULTS, indent=2) + "\n```\nLet me know!",
+    "```\n" + json.dumps({'firms': RESULTS}) + "\n```",
+])
+def test_parses_arrays_wrapped_fenced_and_prose(text):
+    assert parse_json_objects(text) == RESULTS
+
+
+def test_single_result_object():
+    assert parse_json_objects(json.dumps(RESULTS[0])) == [RESULTS[0]]
+
+
+def test_wrapper_object_is_not_a_result():
+    assert parse_json_objects(json.dumps({'results': []})) == []
+
+
+def test_truncated_response_keeps_complete_objects():
+    text = json.dumps(RESULTS)
+    cut = text.index('"Gamma"')
+    assert parse_json_objects(text[:cut]) == RESULTS[:2]
+
+
+def test_invalid_element_is_skipped():
+    text = '[{"rank": 1, "name": "Acme"}, {"rank": 2, name: Beta}, {"rank": 3, "name": "Gamma"}]'
+    assert [item['name'] for item in parse_json_objects(text)] == ['Acme', 'Gamma']
+
+
+def test_stray_closing_bracket_in_prose_resets():
+    text = "Results) ] follow: " + json.dumps(RESULTS)
+    assert parse_json_objects(text) == RESULTS
+
+
+@pytest.mark.parametrize('piece_size', [1, 3, 17])
+def test_token_by_token_feed_matches_whole_text(piece_size):
+    text = "```json\n" + json.dumps({'results': RESULTS}) + "\n```"
+    parser = JSONArrayStreamParser()
+    emitted = []
+    for start in range(0, len(text), piece_size):
+        emitted.append(parser.feed(text[start:start + piece_size]))
+    assert [item for items in emitted for item in items] == RESULTS
+    assert parser.items == RESULTS
+
+
+def test_objects_are_emitted_as_soon_as_they_close():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"rank": 1, "name": "Acme"},') == [{'rank': 1, 'name': 'Acme'}]
+    assert parser.feed(' {"rank": 2, "na') == []
+    assert parser.feed('me": "Beta"}]') == [{'rank': 2, 'name': 'Beta'}]
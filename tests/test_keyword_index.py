@@ -0,0 +1,41 @@
+"""Tests for the keyword fallback's inverted index"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from keyword_index import KeywordIndex
+
+FIELDS = ['name', 'description', 'industry']
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'name': ['Acme AI', 'Beta Payments', 'Gamma', None, 'DataDog-like Labs'],
+        'description': ['B2B SaaS for banks', 'Fintech payments API', 'AI-powered SaaS', 'Nothing', ''],
+        'industry': ['Software', 'FinTech', 'Software, AI', 'nan', 'Software'],
+        'location': ['Boston', 'Austin', 'Boston', 'Paris', 'Berlin']
+    })
+
+
+@pytest.mark.parametrize('field', FIELDS)
+@pytest.mark.parametrize('keyword', ['ai', 'saas', 'fintech', 'software', 'pay', 'a', '-like', 'missing', 'nan'])
+def test_rows_containing_matches_substring_scan(df, field, keyword):
+    index = KeywordIndex.build(df, FIELDS)
+    # Same text as the fallback's full scan, where missing values read as 'nan'
+    text = df[field].astype(str).fillna('nan').str.lower()
+    expected = np.flatnonzero(text.str.contains(keyword, regex=False).to_numpy())
+    assert index.rows_containing(field, keyword).tolist() == expected.tolist()
+
+
+def test_unindexed_field_and_empty_keyword_match_nothing(df):
+    index = KeywordIndex.build(df, FIELDS)
+    assert index.rows_containing('location', 'boston').size == 0
+    assert index.rows_containing('name', '').size == 0
+
+
+def test_regex_characters_are_literal():
+    index = KeywordIndex.build(pd.DataFrame({'name': ['a.b', 'axb', 'c++']}), ['name'])
+    assert index.rows_containing('name', 'a.b').tolist() == [0]
+    assert index.rows_containing('name', '++').tolist() == [2]
+
@@ -0,0 +1,95 @@
+"""Tests for the persistent LLM result cache"""
+import pytest
+
+import llm_cache
+from llm_cache import LLMResultCache
+
+CRITERIA = "B2B AI SaaS with revenue over $5M"
+RESULT = {'name': 'Acme', 'score': 8, 'reason': 'Strong fit'}
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(llm_cache.time, 'time', fake.time)
+    return fake
+
+
+def make_cache(tmp_path, ttl_seconds=3600, max_entries=100):
+    return LLMResultCache(str(tmp_path / 'llm' / 'results.sqlite'), ttl_seconds, max_entries)
+
+
+def test_round_trip(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put_many('gpt-4o-mini', CRITERIA, [('firm-1', RESULT)])
+    assert cache.get_many('gpt-4o-mini', CRITERIA, ['firm-1', 'firm-2']) == {'firm-1': RESULT}
+
+
+def test_keys_are_scoped_by_model_and_criteria(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put_many('gpt-4o-mini', CRITERIA, [('firm-1', RESULT)])
+    assert cache.get_many('gpt-4o', CRITERIA, ['firm-1']) == {}
+    assert cache.get_many('gpt-4o-mini', 'Fintech in Europe', ['firm-1']) == {}
+    # Case and whitespace differences in the criteria still hit
+    assert cache.get_many('gpt-4o-mini', '  b2b ai saas   WITH revenue over $5m', ['firm-1']) == {'firm-1': RESULT}
+
+
+def test_firm_key_depends_on_content_not_order():
+    firm = {'name': 'Acme', 'description': 'AI platform', 'location': 'Boston'}
+    assert LLMResultCache.firm_key(firm) == LLMResultCache.firm_key(dict(reversed(list(firm.items()))))
+    assert LLMResultCache.firm_key(firm) != LLMResultCache.firm_key(dict(firm, location='Austin'))
+
+
+def test_expired_entries_miss_and_are_evicted(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl_seconds=60)
+    cache.put_many('m', CRITERIA, [('old', RESULT)])
+    clock.now += 61
+    assert cache.get_many('m', CRITERIA, ['old']) == {}
+
+    cache.put_many('m', CRITERIA, [('new', RESULT)])
+    with cache._connect() as conn:
+        assert [row[0] for row in conn.execute("SELECT firm FROM results")] == ['new']
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put_many('m', CRITERIA, [('a', RESULT)])
+    clock.now += 1
+    cache.put_many('m', CRITERIA, [('b', RESULT)])
+    clock.now += 1
+    # Reading 'a' makes 'b' the least recently used
+    cache.get_many('m', CRITERIA, ['a'])
+    clock.now += 1
+    cache.put_many('m', CRITERIA, [('c', RESULT)])
+    assert set(cache.get_many('m', CRITERIA, ['a', 'b', 'c'])) == {'a', 'c'}
+
+
+def test_lookups_beyond_the_parameter_limit(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(llm_cache, 'LOOKUP_CHUNK', 3)
+    cache = make_cache(tmp_path)
+    items = [(f"firm-{i}", dict(RESULT, score=i)) for i in range(10)]
+    cache.put_many('m', CRITERIA, items)
+    hits = cache.get_many('m', CRITERIA, [key for key, _ in items] + ['firm-1', 'missing'])
+    assert hits == dict(items)
+
+
+def test_disabled_cache(tmp_path):
+    for cache in (LLMResultCache(None, 3600, 100), make_cache(tmp_path, max_entries=0)):
+        assert not cache.enabled
+        cache.put_many('m', CRITERIA, [('firm-1', RESULT)])
+        assert cache.get_many('m', CRITERIA, ['firm-1']) == {}
+
+
+def test_clear(tmp_path, clock):
+    cache = make_cache(tmp_path)
+    cache.put_many('m', CRITERIA, [('firm-1', RESULT)])
+    cache.clear()
+    assert cache.get_many('m', CRITERIA, ['firm-1']) == {}
@@ -0,0 +1,45 @@
+"""Tests for the compact and verbose firm encodings of VC Expert prompts"""
+import pytest
+
+from config import Config
+from vc_expert_agent import VCExpertAgent
+
+# Firm dicts as AIFilter._prepare_firm_data builds them: cleaned, lowercased column names
+FIRMS = [
+    {'name': 'Acme AI', 'description': 'AI for logistics', 'revenue': '$6M', 'growth rate': '45%',
+     'total raised': '$30M', 'active investors': 'Sequoia Capital'},
+    {'name': 'Beta Pay', 'description': 'Payments API', 'revenue': '$2M', 'total raised': '$8M'},
+]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.setenv('LLM_CACHE_MAX_ENTRIES', '0')
+    monkeypatch.setenv('PROMPT_FORMAT', 'compact')
+    return VCExpertAgent(Config())
+
+
+def test_compact_rows_include_investment_fields(agent):
+    lines = agent._format_firms(FIRMS).splitlines()
+    assert lines[1] == '# | Name | Description | Revenue | Growth Rate | Total Raised | Active Investors'
+    assert lines[2] == '1 | Acme AI | AI for logistics | $6M | 45% | $30M | Sequoia Capital'
+    assert lines[3] == '2 | Beta Pay | Payments API | $2M | - | $8M | -'
+
+
+def test_compact_columns_follow_the_batch(agent):
+    header = agent._format_firms(FIRMS[1:]).splitlines()[1]
+    assert header == '# | Name | Description | Revenue | Total Raised'
+
+
+def test_packing_sizes_rows_with_every_filled_column(agent):
+    batches = agent._pack_batches(FIRMS, 'B2B AI', 'gpt-4o-mini')
+    assert [firm['name'] for batch in batches for firm in batch] == ['Acme AI', 'Beta Pay']
+
+
+def test_verbose_block_includes_investment_fields(agent, monkeypatch):
+    monkeypatch.setenv('PROMPT_FORMAT', 'verbose')
+    block = agent._format_firms(FIRMS[:1])
+    assert '  • Growth Rate: 45%' in block
+    assert '  • Active Investors: Sequoia Capital' in block
+    assert '  • Revenue' not in block
@@ -0,0 +1,36 @@
+"""Tests for the shared-prefix layout of VC Expert prompts"""
+import pytest
+
+from config import Config
+from vc_expert_agent import VCExpertAgent
+
+FIRMS = [
+    {'name': 'Acme AI', 'description': 'AI for logistics'},
+    {'name': 'Beta Pay', 'description': 'Payments API'},
+]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.delenv('OPENAI_API_KEY', raising=False)
+    monkeypatch.setenv('LLM_CACHE_MAX_ENTRIES', '0')
+    monkeypatch.setenv('PROMPT_FORMAT', 'compact')
+    return VCExpertAgent(Config())
+
+
+@pytest.mark.parametrize('build', ['_build_expert_prompt', '_build_screening_prompt'])
+def test_batches_share_the_prompt_prefix(agent, build):
+    first = getattr(agent, build)(FIRMS[:1], 'B2B AI')
+    second = getattr(agent, build)(FIRMS[1:], 'B2B AI')
+    prefix = getattr(agent, build)([], 'B2B AI').split('# |')[0]
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert prefix.index('B2B AI') < prefix.index('One company per row')
+    # Firm rows come last
+    assert first.rstrip().splitlines()[-1].startswith('1 | Acme AI')
+    assert second.rstrip().splitlines()[-1].startswith('1 | Beta Pay')
+
+
+def test_expert_prefix_is_the_prompt_start(agent):
+    prompt = agent._build_expert_prompt(FIRMS, 'B2B AI')
+    assert prompt.startswith(agent._build_expert_prefix('B2B AI'))
+    assert 'Acme AI' not in agent._build_expert_prefix('B2B AI')
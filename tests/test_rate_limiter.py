@@ -0,0 +1,182 @@
+"""Tests for rate_limiter pacing and retry helpers, and the VC Expert's retry accounting"""
+from types import SimpleNamespace
+
+import pytest
+
+import rate_limiter
+from rate_limiter import (RateLimiter, TokenBucket, backoff_delay, is_fatal, is_retryable,
+                          retry_after_seconds)
+
+
+class APIError(Exception):
+    def __init__(self, status_code=None, code=None, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.code = code
+        self.response = SimpleNamespace(headers=headers or {})
+
+
+class APIConnectionError(Exception):
+    pass
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', fake.monotonic)
+    monkeypatch.setattr(rate_limiter.time, 'sleep', fake.sleep)
+    return fake
+
+
+def test_token_bucket_refills_continuously(clock):
+    bucket = TokenBucket(60)
+    bucket.consume(60)
+    assert bucket.wait_time(1) == pytest.approx(1.0)
+    bucket.refill(clock.now + 30)
+    assert bucket.level == pytest.approx(30)
+    bucket.refill(clock.now + 600)
+    assert bucket.level == bucket.capacity
+
+
+def test_oversized_request_waits_for_a_full_bucket(clock):
+    bucket = TokenBucket(100)
+    bucket.consume(50)
+    assert bucket.wait_time(1000) == pytest.approx(30.0)
+
+
+def test_acquire_paces_requests_per_minute(clock):
+    limiter = RateLimiter(rpm=2, tpm=0)
+    assert limiter.acquire(10) == 0.0
+    assert limiter.acquire(10) == 0.0
+    assert limiter.acquire(10) == pytest.approx(30.0)
+
+
+def test_acquire_paces_tokens_per_minute(clock):
+    limiter = RateLimiter(rpm=0, tpm=600)
+    assert limiter.acquire(600) == 0.0
+    assert limiter.acquire(300) == pytest.approx(30.0)
+
+
+def test_unlimited_limiter_never_waits(clock):
+    limiter = RateLimiter(rpm=0, tpm=0)
+    assert sum(limiter.acquire(10 ** 6) for _ in range(100)) == 0.0
+
+
+def test_pause_holds_back_every_caller(clock):
+    limiter = RateLimiter(rpm=0, tpm=0)
+    limiter.pause(5)
+    limiter.pause(2)
+    assert limiter.acquire(1) == pytest.approx(5.0)
+    assert limiter.acquire(1) == 0.0
+
+
+@pytest.mark.parametrize('error, retryable', [
+    (APIError(429), True),
+    (APIError(503), True),
+    (APIError(400), False),
+    (APIError(401), False),
+    (APIError(429, code='insufficient_quota'), False),
+    (APIConnectionError(), True),
+    (ValueError('bad json'), False),
+])
+def test_is_retryable(error, retryable):
+    assert is_retryable(error) is retryable
+
+
+def test_is_fatal():
+    assert is_fatal(APIError(401))
+    assert is_fatal(APIError(429, code='insufficient_quota'))
+    assert not is_fatal(APIError(429))
+
+
+@pytest.mark.parametrize('headers, expected', [
+    ({'retry-after-ms': '250'}, 0.25),
+    ({'retry-after': '3'}, 3.0),
+    ({'retry-after': 'Wed, 21 Oct 2015 07:28:00 GMT'}, None),
+    ({}, None),
+])
+def test_retry_after_seconds(headers, expected):
+    assert retry_after_seconds(APIError(429, headers=headers)) == expected
+
+
+def test_backoff_delay_is_capped_full_jitter():
+    for attempt in range(10):
+        delays = [backoff_delay(attempt, 1.0, 8.0) for _ in range(50)]
+        assert all(0 <= delay <= min(8.0, 2 ** attempt) for delay in delays)
+
+
+def completion(text):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+                           usage=SimpleNamespace(prompt_tokens=100, completion_tokens=10, prompt_tokens_details=None))
+
+
+class FakeCompletions:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return completion('[]')
+
+
+def expert_agent(monkeypatch, errors, max_retries):
+    import vc_expert_agent
+    from config import Config
+    from run_report import RunReport
+
+    for key, value in {'OPENAI_API_KEY': '', 'LLM_CACHE_MAX_ENTRIES': '0', 'MAX_RETRIES': str(max_retries),
+                       'RETRY_BASE_DELAY': '0.5', 'STREAM_COMPLETIONS': 'false', 'JSON_MODE': 'false'}.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(vc_expert_agent, 'OPENAI_VERSION', 1)
+    monkeypatch.setattr(vc_expert_agent.time, 'sleep', lambda seconds: None)
+    agent = vc_expert_agent.VCExpertAgent(Config())
+    completions = FakeCompletions(errors)
+    agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return agent, completions, RunReport().new_batch('gpt-4o-mini', 'analysis', 5)
+
+
+def test_retries_are_counted_per_attempt(monkeypatch):
+    errors = [APIError(429, headers={'retry-after': '0.05'}), APIError(503)]
+    agent, completions, record = expert_agent(monkeypatch, errors, max_retries=3)
+    messages = [{'role': 'user', 'content': 'rank these firms'}]
+
+    assert agent._request_completion('gpt-4o-mini', messages, 0.1, record) == '[]'
+    assert completions.calls == 3
+    assert record['requests'] == 3
+    assert record['retries'] == 2
+    assert record['prompt_tokens'] == 100
+    # The retry-after wait plus the jittered backoffs are all counted as waiting
+    assert record['wait_seconds'] >= 0.05
+    assert agent._get_rate_limiter('gpt-4o-mini').blocked_until > 0
+
+
+def test_retries_stop_at_max_retries(monkeypatch):
+    agent, completions, record = expert_agent(monkeypatch, [APIError(500)] * 5, max_retries=2)
+
+    with pytest.raises(APIError):
+        agent._request_completion('gpt-4o-mini', [{'role': 'user', 'content': 'x'}], 0.1, record)
+    assert completions.calls == record['requests'] == 3
+    assert record['retries'] == 2
+
+
+def test_non_retryable_errors_are_not_retried(monkeypatch):
+    agent, completions, record = expert_agent(monkeypatch, [APIError(400)], max_retries=5)
+
+    with pytest.raises(APIError):
+        agent._request_completion('gpt-4o-mini', [{'role': 'user', 'content': 'x'}], 0.1, record)
+    assert completions.calls == record['requests'] == 1
+    assert record['retries'] == 0
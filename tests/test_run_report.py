@@ -0,0 +1,72 @@
+"""Tests for run_report, including request/retry accounting against the fake OpenAI server"""
+import pytest
+
+from run_report import RunReport, estimate_cost, model_price, percentile
+
+
+def test_model_price_uses_longest_prefix():
+    assert model_price('gpt-4o-mini-2024-07-18') == model_price('gpt-4o-mini')
+    assert model_price('gpt-4o-2024-08-06') == model_price('gpt-4o')
+    assert model_price('unknown-model') is None
+
+
+def test_estimate_cost_prices_cached_tokens_separately():
+    prompt, cached, completion = model_price('gpt-4o-mini')
+    expected = (600 * prompt + 400 * cached + 100 * completion) / 1e6
+    assert estimate_cost('gpt-4o-mini', 1000, 400, 100) == pytest.approx(expected)
+    assert estimate_cost('unknown-model', 1000, 0, 100) == 0.0
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert percentile([float(i) for i in range(1, 101)], 0.95) == 95.0
+
+
+def test_summary_totals():
+    report = RunReport()
+    for status, latency in (('ok', 1.0), ('ok', 3.0), ('failed', 9.0)):
+        record = report.new_batch('gpt-4o-mini', 'analysis', 10)
+        record.update(status=status, requests=2, retries=1, prompt_tokens=1000, completion_tokens=100,
+                      latency_seconds=latency)
+        report.add_batch(record)
+    report.add_cached(5)
+
+    summary = report.summary()
+    assert summary['batches'] == 3
+    assert summary['failed_batches'] == 1
+    assert summary['requests'] == 6
+    assert summary['retries'] == 3
+    assert summary['firms_analyzed'] == 20
+    assert summary['firms_cached'] == 5
+    assert summary['latency_p50_seconds'] == 1.0
+    assert summary['by_model']['gpt-4o-mini']['batches'] == 3
+
+
+@pytest.mark.parametrize('json_mode', [True, False])
+def test_request_counts_match_server_log(monkeypatch, json_mode):
+    pytest.importorskip('openai')
+    from fake_openai_server import FakeServerOptions, start_server
+
+    server = start_server(FakeServerOptions(latency=0.0, jitter=0.0, rate_limit_rate=0.4, server_error_rate=0.1,
+                                            retry_after=0.01, json_mode=json_mode, seed=3))
+    try:
+        for key, value in {'OPENAI_API_KEY': 'sk-fake', 'OPENAI_BASE_URL': server.base_url,
+                           'LLM_CACHE_MAX_ENTRIES': '0', 'MAX_RETRIES': '30', 'RETRY_BASE_DELAY': '0.01',
+                           'SCREENING_MODEL': '', 'BATCH_SIZE': '5'}.items():
+            monkeypatch.setenv(key, value)
+        from config import Config
+        from vc_expert_agent import VCExpertAgent
+
+        agent = VCExpertAgent(Config())
+        firms = [{'name': f"Firm {i}", 'description': 'AI platform for enterprises'} for i in range(30)]
+        agent.analyze_firms(firms, 'B2B AI companies', top_n=5)
+        summary = agent.last_report.summary()
+    finally:
+        server.shutdown()
+
+    stats = server.stats
+    assert summary['failed_batches'] == 0
+    assert summary['requests'] == stats['requests']
+    assert summary['retries'] == stats['rate_limited'] + stats['server_errors']
+    assert stats['rate_limited'] > 0
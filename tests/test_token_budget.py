@@ -0,0 +1,67 @@
+"""Tests for token counting and batch packing"""
+from types import SimpleNamespace
+
+import pytest
+
+import token_budget
+from token_budget import DEFAULT_CONTEXT_TOKENS, context_window, count_tokens, pack_batches
+
+
+@pytest.mark.parametrize('model, tokens', [
+    ('gpt-4o-mini', 128000),
+    ('gpt-4-32k-0613', 32768),
+    ('gpt-4-0613', 8192),
+    ('gpt-4.1-nano', 1047576),
+    ('o3-mini', 200000),
+    ('some-local-model', DEFAULT_CONTEXT_TOKENS),
+])
+def test_context_window_uses_longest_prefix(model, tokens):
+    assert context_window(model) == tokens
+
+
+def test_estimate_rounds_up_without_tiktoken(monkeypatch):
+    monkeypatch.setattr(token_budget, 'TIKTOKEN_AVAILABLE', False)
+    assert count_tokens('', 'gpt-4o-mini') == 0
+    assert count_tokens('abcd', 'gpt-4o-mini') == 2
+    assert count_tokens('a' * 35, 'gpt-4o-mini') == 10
+
+
+def test_count_tokens_grows_with_text():
+    short = count_tokens('AI platform for banks', 'gpt-4o-mini')
+    assert 0 < short < count_tokens('AI platform for banks ' * 10, 'gpt-4o-mini')
+
+
+def test_pack_batches_respects_budget_and_order():
+    assert pack_batches([40, 40, 40, 10, 90], budget=100, max_items=10) == [[0, 1], [2, 3], [4]]
+
+
+def test_pack_batches_respects_max_items():
+    assert pack_batches([1] * 7, budget=1000, max_items=3) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_oversized_item_gets_its_own_batch():
+    assert pack_batches([10, 500, 10], budget=100, max_items=10) == [[0], [1], [2]]
+
+
+def test_pack_batches_empty():
+    assert pack_batches([], budget=100, max_items=10) == []
+
+
+def test_unloadable_encoding_falls_back_to_estimate(monkeypatch):
+    calls = []
+
+    def unavailable(name):
+        calls.append(name)
+        raise ValueError("could not download cl100k_base")
+
+    fake_tiktoken = SimpleNamespace(encoding_for_model=unavailable, get_encoding=unavailable)
+    monkeypatch.setattr(token_budget, 'tiktoken', fake_tiktoken, raising=False)
+    monkeypatch.setattr(token_budget, 'TIKTOKEN_AVAILABLE', True)
+    token_budget._encoding.cache_clear()
+    try:
+        assert count_tokens('abcd', 'gpt-4o-mini') == 2
+        assert count_tokens('a' * 35, 'gpt-4o-mini') == 10
+    finally:
+        token_budget._encoding.cache_clear()
+    # The failure is cached, so the download is not retried for every count
+    assert calls == ['gpt-4o-mini']
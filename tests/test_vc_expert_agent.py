@@ -0,0 +1,222 @@
+"""Tests for VC Expert batch dispatch against a stub OpenAI client"""
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import vc_expert_agent
+from config import Config
+from vc_expert_agent import VCExpertAgent
+
+# Compact prompt rows: "<#> | <name> | <description>"
+ROW_PATTERN = re.compile(r'^(\d+) \| (.+?) \| (.*)$', re.MULTILINE)
+
+FIRMS = [{'name': f"Firm {i:02d}", 'description': f"Company number {i}"} for i in range(12)]
+
+# Ties (Firm 01/Firm 05/Firm 09) must keep upload order whatever order the batches finish in
+SCORES = {firm['name']: score for firm, score in zip(FIRMS, [40, 70, 55, 90, 10, 70, 85, 20, 60, 70, 30, 95])}
+
+
+class APIError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class StubCompletions:
+    """Answers expert and screening prompts from fixed scores, recording each request"""
+
+    def __init__(self, delays=None, fail=(), error=None, score=None, json_mode=True):
+        self.score = score or (lambda name, description: SCORES[name])
+        self.json_mode = json_mode
+        self.delays = delays or {}
+        self.fail = set(fail)
+        self.error = error or ValueError("batch rejected")
+        self.requests = []
+        self.completed = []
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, **kwargs):
+        prompt = messages[-1]['content']
+        rows = ROW_PATTERN.findall(prompt.split('COMPANIES')[-1])
+        names = [name for _, name, _ in rows]
+        with self._lock:
+            self.requests.append((model, [(name, description) for _, name, description in rows]))
+        if 'response_format' in kwargs and not self.json_mode:
+            raise ValueError("Invalid parameter: 'response_format' is not supported with this model")
+        time.sleep(self.delays.get(names[0], 0))
+        if self.fail & set(names):
+            raise self.error
+
+        if 'No explanations' in prompt:
+            results = [{'id': int(number), 'score': self.score(name, description)}
+                       for number, name, description in rows]
+        else:
+            results = [{'name': name, 'score': self.score(name, description), 'reason': f"{name} fits"}
+                       for _, name, description in rows]
+        with self._lock:
+            self.completed.append(names[0])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=json.dumps({'results': results})))],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=20, prompt_tokens_details=None)
+        )
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    def make(completions, **env):
+        settings = {'OPENAI_API_KEY': 'sk-test', 'LLM_CACHE_MAX_ENTRIES': '0', 'MAX_RETRIES': '0',
+                    'PROMPT_FORMAT': 'compact', 'STREAM_COMPLETIONS': 'false',
+                    # Three firms per analysis batch
+                    'MAX_COMPLETION_TOKENS': str(3 * vc_expert_agent.COMPLETION_TOKENS_PER_FIRM),
+                    'MAX_CONCURRENT_BATCHES': '4', 'SCREENING_MODEL': '', 'AI_MODEL': 'gpt-4o'}
+        settings.update(env)
+        for key, value in settings.items():
+            monkeypatch.setenv(key, value)
+        monkeypatch.setattr(vc_expert_agent, 'OPENAI_VERSION', 1)
+        agent = VCExpertAgent(Config())
+        agent.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+        return agent
+    return make
+
+
+def ranking(results):
+    return [(result['name'], result['score']) for result in results]
+
+
+def test_results_merge_in_batch_order_whatever_finishes_first(make_agent):
+    # Earlier batches answer last
+    delays = {'Firm 00': 0.15, 'Firm 03': 0.1, 'Firm 06': 0.05}
+    completions = StubCompletions(delays=delays)
+    agent = make_agent(completions)
+
+    updates = list(agent.iter_analyze_firms(FIRMS, 'B2B', top_n=12))
+    assert completions.completed[0] == 'Firm 09'
+    assert completions.completed[-1] == 'Firm 00'
+
+    expected = sorted(((name, score) for name, score in SCORES.items()), key=lambda item: -item[1])
+    assert ranking(updates[-1]['ranking']) == expected
+    assert [update['done'] for update in updates if update['stage'] == 'analysis'] == [0, 1, 2, 3, 4]
+
+
+def test_serial_dispatch_gives_the_same_result(make_agent):
+    concurrent = make_agent(StubCompletions(delays={'Firm 00': 0.1})).analyze_firms(FIRMS, 'B2B', top_n=12)
+    serial_completions = StubCompletions()
+    serial = make_agent(serial_completions, MAX_CONCURRENT_BATCHES='1').analyze_firms(FIRMS, 'B2B', top_n=12)
+
+    assert ranking(serial) == ranking(concurrent)
+    assert serial_completions.completed == ['Firm 00', 'Firm 03', 'Firm 06', 'Firm 09']
+
+
+def test_failed_batch_is_dropped_and_the_rest_kept(make_agent):
+    agent = make_agent(StubCompletions(fail={'Firm 04'}))
+
+    results = agent.analyze_firms(FIRMS, 'B2B', top_n=12)
+    dropped = {'Firm 03', 'Firm 04', 'Firm 05'}
+    assert {result['name'] for result in results} == {firm['name'] for firm in FIRMS} - dropped
+    assert agent.last_failed_firms == 3
+    summary = agent.last_report.summary()
+    assert summary['batches'] == 4
+    assert summary['failed_batches'] == 1
+
+
+def test_every_batch_failing_raises(make_agent):
+    agent = make_agent(StubCompletions(fail={firm['name'] for firm in FIRMS}))
+    with pytest.raises(ValueError):
+        agent.analyze_firms(FIRMS, 'B2B', top_n=12)
+    assert agent.last_failed_firms == len(FIRMS)
+
+
+def test_fatal_error_stops_the_run(make_agent):
+    agent = make_agent(StubCompletions(fail={'Firm 04'}, error=APIError(401)))
+    with pytest.raises(APIError):
+        agent.analyze_firms(FIRMS, 'B2B', top_n=12)
+
+
+def test_usage_is_recorded_per_batch(make_agent):
+    agent = make_agent(StubCompletions())
+    agent.analyze_firms(FIRMS, 'B2B', top_n=12)
+
+    summary = agent.last_report.summary()
+    assert summary['requests'] == 4
+    assert summary['retries'] == 0
+    assert summary['prompt_tokens'] == 400
+    assert summary['completion_tokens'] == 80
+    assert summary['firms_analyzed'] == len(FIRMS)
+
+
+def test_screening_model_hands_finalists_to_the_strong_model(make_agent):
+    completions = StubCompletions()
+    agent = make_agent(completions, SCREENING_MODEL='gpt-4o-mini', PROMOTE_TOP='4')
+
+    updates = list(agent.iter_analyze_firms(FIRMS, 'B2B', top_n=3))
+    screened = [firm for model, rows in completions.requests if model == 'gpt-4o-mini' for firm, _ in rows]
+    finalists = [firm for model, rows in completions.requests if model == 'gpt-4o' for firm, _ in rows]
+    assert sorted(screened) == sorted(firm['name'] for firm in FIRMS)
+    # Best screening scores first; the tie at 70 goes to the earlier upload row
+    assert finalists == ['Firm 11', 'Firm 03', 'Firm 06', 'Firm 01']
+    assert [update['stage'] for update in updates][-1] == 'done'
+    assert ranking(updates[-1]['ranking']) == [('Firm 11', 95), ('Firm 03', 90), ('Firm 06', 85)]
+    assert {record['model'] for record in agent.last_report.batches} == {'gpt-4o-mini', 'gpt-4o'}
+
+
+def test_promotion_follows_screening_ids_not_names(make_agent):
+    firms = [{'name': 'Summit Partners', 'description': 'Growth equity in Boston'},
+             {'name': 'Summit Partners', 'description': 'Seed fund in London'},
+             {'name': 'Other Capital', 'description': 'Credit fund'}]
+    scores = {'Growth equity in Boston': 20, 'Seed fund in London': 90, 'Credit fund': 50}
+    completions = StubCompletions(score=lambda name, description: scores[description])
+    agent = make_agent(completions, SCREENING_MODEL='gpt-4o-mini', PROMOTE_TOP='1')
+
+    agent.analyze_firms(firms, 'Seed funds', top_n=1)
+    finalists = [row for model, rows in completions.requests if model == 'gpt-4o' for row in rows]
+    assert finalists == [('Summit Partners', 'Seed fund in London')]
+
+
+@pytest.mark.parametrize('screening_model, stages', [
+    ('', ['analysis', 'done']),
+    ('gpt-4o-mini', ['screening', 'analysis', 'done']),
+])
+def test_update_stages_and_monotone_partial_rankings(make_agent, screening_model, stages):
+    agent = make_agent(StubCompletions(), SCREENING_MODEL=screening_model, PROMOTE_TOP='6',
+                       MAX_CONCURRENT_BATCHES='1')
+    updates = list(agent.iter_analyze_firms(FIRMS, 'B2B', top_n=5))
+
+    assert list(dict.fromkeys(update['stage'] for update in updates)) == stages
+    assert updates[-1]['stage'] == 'done'
+    for stage in stages[:-1]:
+        stage_updates = [update for update in updates if update['stage'] == stage]
+        assert [update['done'] for update in stage_updates] == list(range(stage_updates[-1]['total'] + 1))
+        # Each completed batch only adds results, so no rank's score ever drops
+        for before, after in zip(stage_updates, stage_updates[1:]):
+            assert len(after['ranking']) >= len(before['ranking'])
+            assert all(new['score'] >= old['score'] for old, new in zip(before['ranking'], after['ranking']))
+    assert updates[-1]['ranking'] == updates[-2]['ranking']
+
+
+class CountingLimiter:
+    def __init__(self):
+        self.acquired = 0
+
+    def acquire(self, tokens):
+        self.acquired += 1
+        return 0.0
+
+
+def test_plain_text_resend_goes_through_the_limiter(make_agent):
+    completions = StubCompletions(json_mode=False)
+    agent = make_agent(completions, JSON_MODE='true', MAX_CONCURRENT_BATCHES='1')
+    limiter = CountingLimiter()
+    agent._get_rate_limiter = lambda model: limiter
+
+    results = agent.analyze_firms(FIRMS, 'B2B', top_n=12)
+    assert len(results) == len(FIRMS)
+    # The first batch is sent twice (JSON mode, then plain text); later batches skip JSON mode
+    assert len(completions.requests) == 5
+    assert limiter.acquired == 5
+    summary = agent.last_report.summary()
+    assert summary['requests'] == 5
+    assert summary['retries'] == 0
@@ -0,0 +1,85 @@
+"""
+Token Budget - Token counting and batch packing for LLM requests
+Uses tiktoken when installed, otherwise a characters-per-token estimate
+"""
+import logging
+import math
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    logging.warning("tiktoken not available - estimating token counts. Install with: pip install tiktoken")
+
+# Context window per model family (longest matching prefix wins)
+MODEL_CONTEXT_TOKENS = {
+    'gpt-3.5-turbo': 16385,
+    'gpt-4': 8192,
+    'gpt-4-32k': 32768,
+    'gpt-4-turbo': 128000,
+    'gpt-4o': 128000,
+    'gpt-4.1': 1047576,
+    'o1': 200000,
+    'o3': 200000,
+    'o4-mini': 200000
+}
+DEFAULT_CONTEXT_TOKENS = 16385
+
+# Fallback estimate when tiktoken is missing (rounded up, so it errs on the safe side)
+CHARS_PER_TOKEN = 3.5
+
+# Chat framing added per message by the API
+TOKENS_PER_MESSAGE = 4
+
+
+def context_window(model: str) -> int:
+    """Context length of a model, by longest known prefix"""
+    matches = [prefix for prefix in MODEL_CONTEXT_TOKENS if model.startswith(prefix)]
+    return MODEL_CONTEXT_TOKENS[max(matches, key=len)] if matches else DEFAULT_CONTEXT_TOKENS
+
+
+@lru_cache(maxsize=None)
+def _encoding(model: str):
+    """tiktoken encoding for a model, or None when it can't be loaded (cached either way)"""
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        # The BPE files are downloaded on first use, which fails offline or behind a proxy
+        logging.getLogger(__name__).warning(
+            f"Could not load tiktoken encoding for {model} - estimating token counts: {e}"
+        )
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Number of tokens in text for the given model"""
+    encoding = _encoding(model) if TIKTOKEN_AVAILABLE else None
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def pack_batches(token_counts: List[int], budget: int, max_items: int) -> List[List[int]]:
+    """
+    Greedily pack items (in order) into batches of at most budget tokens and max_items items
+
+    An item larger than the budget still gets a batch of its own; callers should
+    shrink such items first.
+    """
+    batches = []
+    current, current_tokens = [], 0
+    for index, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > budget or len(current) >= max_items):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
@@ -3,7 +3,17 @@ VC Expert Agent - Intelligent analysis of companies against investment criteria
 Acts as an experienced venture capital analyst
 """
 import logging
-from typing import List, Dict, Any
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+from json_stream import JSONArrayStreamParser, parse_json_objects
+from llm_cache import LLMResultCache
+from rate_limiter import RateLimiter, backoff_delay, is_fatal, is_retryable, retry_after_seconds
+from run_report import RunReport
+from token_budget import TOKENS_PER_MESSAGE, context_window, count_tokens, pack_batches
 
 try:
     import openai
@@ -15,6 +25,75 @@ except ImportError:
     OPENAI_VERSION = 0
     logging.warning("OpenAI module not available. Install with: pip install openai")
 
+# Fields every firm block starts with
+PRIORITY_FIELDS = ['name', 'description', 'industry', 'stage', 'revenue', 'location']
+
+# PitchBook fields added when present (values truncated to 50 chars); firm dicts carry the
+# cleaned, lowercased column names, so these labels are matched through _column_key
+KEY_INVESTMENT_FIELDS = [
+    'Revenue', 'Growth Rate', 'Total Raised', 'Active Investors',
+    'First Financing Valuation', 'Success Probability', 'Employees',
+    'Year Founded', 'Business Status', 'Primary Industry Sector'
+]
+
+# Compact encoding: one header row, then one row per firm (investment fields that
+# repeat a priority field, like 'Revenue' vs 'revenue', are sent once; columns empty
+# for the whole batch are left out)
+COMPACT_FIELDS = PRIORITY_FIELDS + [
+    field for field in KEY_INVESTMENT_FIELDS if field.lower() not in PRIORITY_FIELDS
+]
+COMPACT_LABELS = {field: field.replace('_', ' ').title() if field in PRIORITY_FIELDS else field
+                  for field in COMPACT_FIELDS}
+COMPACT_LEGEND = ('One company per row, columns separated by " | " in header order. '
+                  '"-" = no data, "…" = value truncated.')
+
+# Per-field character limits in compact rows (0 = never truncate; the name identifies the firm)
+COMPACT_FIELD_LIMITS = {'name': 0, 'description': 240, 'industry': 80, 'location': 60}
+COMPACT_DEFAULT_LIMIT = 50
+
+# Completion tokens reserved per company (score + 2-3 sentence rationale in JSON)
+COMPLETION_TOKENS_PER_FIRM = 150
+
+# Completion tokens reserved per company in the score-only screening pass
+SCREENING_TOKENS_PER_FIRM = 15
+
+# Longest backoff between retries of one batch (seconds)
+RETRY_MAX_DELAY = 60.0
+
+
+def _to_score(value):
+    """Numeric score from 87, "87", "87/100" or "87%" (None if unreadable)"""
+    try:
+        return float(str(value).split('/')[0].strip().rstrip('%'))
+    except ValueError:
+        return None
+
+
+def _column_key(field: str) -> str:
+    """Field label as ExcelProcessor cleans column names ('Total Raised' -> 'total raised')"""
+    return re.sub(r'[\s_]+', ' ', re.sub(r'[^\w\s]', ' ', field.lower())).strip()
+
+
+def _firm_value(firm: Dict, field: str) -> str:
+    """Value of a prompt field in a firm dict, matched case-insensitively ('' if missing)"""
+    value = firm.get(field)
+    if value is None:
+        value = firm.get(_column_key(field))
+    return '' if value is None else str(value)
+
+
+def _field(obj, name: str):
+    """Attribute of an OpenAI 1.x response object or key of a 0.x dict response"""
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+class JSONModeUnsupported(Exception):
+    """The model rejected response_format; the request is resent as plain text"""
+
 
 class VCExpertAgent:
     """AI agent with VC expertise for analyzing investment opportunities"""
@@ -23,19 +102,47 @@ class VCExpertAgent:
         self.config = config
         self.logger = logging.getLogger(__name__)
         self.client = None
+        self.result_cache = LLMResultCache(
+            config.get_llm_cache_path(),
+            config.get_llm_cache_ttl_seconds(),
+            config.get_llm_cache_max_entries()
+        )
+        self._rate_limiters = {}
+        self._rate_limiter_lock = threading.Lock()
+        # Companies dropped from the last analyze_firms run because their batch failed
+        self.last_failed_firms = 0
+        # Per-batch tokens, latency, retries and cost of the last run
+        self.last_report = RunReport()
+        # Models that rejected response_format (JSON mode)
+        self._plain_text_models = set()
         self._setup_openai()
     
+    @property
+    def last_run_stats(self) -> Dict[str, int]:
+        """Request and provider prompt-cache stats of the last run"""
+        summary = self.last_report.summary()
+        return {key: summary[key] for key in ('requests', 'prompt_tokens', 'cached_prompt_tokens')}
+    
     def _setup_openai(self):
         """Initialize OpenAI client"""
         if OPENAI_AVAILABLE:
             api_key = self.config.get_openai_key()
+            base_url = self.config.get_openai_base_url()
             if api_key:
                 if OPENAI_VERSION >= 1:
-                    # New API (OpenAI 1.0+)
-                    self.client = OpenAI(api_key=api_key)
+                    # New API (OpenAI 1.0+); SDK retries are off so _request_completion paces and counts every attempt
+                    client_kwargs = {'api_key': api_key, 'max_retries': 0,
+                                     'timeout': self.config.get_request_timeout()}
+                    if base_url:
+                        client_kwargs['base_url'] = base_url
+                    self.client = OpenAI(**client_kwargs)
                 else:
                     # Old API (OpenAI 0.x)
                     openai.api_key = api_key
+                    if base_url:
+                        openai.api_base = base_url
+                if base_url:
+                    self.logger.info(f"Using OpenAI-compatible endpoint {base_url}")
         else:
             self.logger.warning("OpenAI not available - install with: pip install openai")
     
@@ -43,6 +150,18 @@ class VCExpertAgent:
         """
         Analyze firms using VC expertise with batching to avoid token limits
         
+        Batches are packed to a share of the model's context window (leaving room
+        for the completion) rather than a fixed number of companies.
+        
+        With SCREENING_MODEL set, every firm is first scored by the cheap model with a
+        score-only prompt and only the top PROMOTE_TOP go to the strong model.
+        Firms with a cached result for the same model and criteria are not sent again.
+        Up to MAX_CONCURRENT_BATCHES batches are in flight at once, so wall-clock
+        time scales with batches / concurrency rather than the batch count.
+        Requests are paced to RATE_LIMIT_RPM/TPM and throttled or transient failures
+        are retried; a batch that still fails is skipped (see last_failed_firms)
+        instead of discarding the batches that succeeded.
+        
         Args:
             firms: List of firm data dictionaries
             criteria: Investment criteria/heuristics
@@ -51,6 +170,21 @@ class VCExpertAgent:
         Returns:
             List of analyzed firms with expert reasoning
         """
+        ranking = []
+        for update in self.iter_analyze_firms(firms, criteria, top_n):
+            ranking = update['ranking']
+        return ranking
+    
+    def iter_analyze_firms(self, firms: List[Dict], criteria: str, top_n: int = 10,
+                           report: Optional[RunReport] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Same analysis as analyze_firms, yielding a partial ranking as each batch completes
+        
+        Updates look like {'stage': 'screening' | 'analysis' | 'done', 'done': batches
+        finished, 'total': batches in the stage, 'ranking': top N so far}. The final
+        'done' update holds exactly what analyze_firms returns. Every batch is recorded
+        in report (a new one when not given), available afterwards as last_report.
+        """
         # Check if OpenAI is available
         if not OPENAI_AVAILABLE:
             raise ImportError("OpenAI module not installed. Install with: pip install openai")
@@ -59,68 +193,336 @@ class VCExpertAgent:
         if not self.config.get_openai_key():
             raise ValueError("OpenAI API key not configured")
         
+        self.last_failed_firms = 0
+        self.last_report = report if report is not None else RunReport()
         try:
-            # Process in smaller batches to avoid token limits
-            batch_size = 5  # Process 5 companies at a time (very safe for token limits)
-            all_results = []
-            
-            for i in range(0, len(firms), batch_size):
-                batch = firms[i:i + batch_size]
-                self.logger.info(f"Processing batch {i//batch_size + 1}/{(len(firms)-1)//batch_size + 1} ({len(batch)} companies)")
-                
-                # Build expert analysis prompt for this batch
-                prompt = self._build_expert_prompt(batch, criteria)
-                
-                # Get analysis from AI with VC context
-                if OPENAI_VERSION >= 1:
-                    # New API (OpenAI 1.0+)
-                    response = self.client.chat.completions.create(
-                        model=self.config.get_ai_model(),
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": self._get_vc_expert_system_prompt()
-                            },
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        max_tokens=2000,
-                        temperature=0.4
-                    )
-                    result_text = response.choices[0].message.content
-                else:
-                    # Old API (OpenAI 0.x)
-                    response = openai.ChatCompletion.create(
-                        model=self.config.get_ai_model(),
-                        messages=[
-                            {
-                                "role": "system",
-                                "content": self._get_vc_expert_system_prompt()
-                            },
-                            {
-                                "role": "user",
-                                "content": prompt
-                            }
-                        ],
-                        max_tokens=2000,
-                        temperature=0.4
-                    )
-                    result_text = response.choices[0].message.content
+            # Two-tier routing: a cheap model screens everything, the strong model analyzes finalists
+            strong_model = self.config.get_ai_model()
+            screening_model = self.config.get_screening_model()
+            promote_count = max(self.config.get_promote_count(), top_n)
+            if screening_model and screening_model != strong_model and len(firms) > promote_count:
+                screened = []
+                for progress in self._iter_tier(firms, criteria, screening_model, screening=True):
+                    screened = progress['results']
+                    yield self._progress_update('screening', progress, screened, top_n)
                 
-                # Parse this batch's results
-                batch_results = self._parse_expert_analysis(result_text, len(batch))
-                all_results.extend(batch_results)
+                promoted = self._promote_firms(firms, screened, promote_count, top_n)
+                self.logger.info(
+                    f"Screened {len(firms)} companies with {screening_model}; "
+                    f"promoting {len(promoted)} to {strong_model}"
+                )
+                firms = [firms[i] for i in promoted]
+            
+            all_results = []
+            progress = {'done': 0, 'total': 0}
+            for progress in self._iter_tier(firms, criteria, strong_model):
+                all_results = progress['results']
+                yield self._progress_update('analysis', progress, all_results, top_n)
             
-            # Sort all results by score and return top N
-            all_results.sort(key=lambda x: x.get('score', 0), reverse=True)
-            return all_results[:top_n]
+            if report is None:
+                self.last_report.finish()
+            summary = self.last_report.summary()
+            if summary['requests']:
+                self.logger.info(
+                    f"{summary['requests']} requests ({summary['retries']} retries), "
+                    f"{summary['prompt_tokens']} prompt + {summary['completion_tokens']} completion tokens, "
+                    f"~${summary['cost_usd']:.4f}; batch latency p50 {summary['latency_p50_seconds']}s "
+                    f"p95 {summary['latency_p95_seconds']}s; provider prompt cache served "
+                    f"{summary['cached_prompt_tokens']}/{summary['prompt_tokens']} prompt tokens"
+                )
+            yield self._progress_update('done', progress, all_results, top_n)
             
         except Exception as e:
             self.logger.error(f"VC Expert Agent error: {str(e)}")
             raise
     
+    def _progress_update(self, stage: str, progress: Dict, results: List[Dict], top_n: int) -> Dict[str, Any]:
+        """Progress update with the current top N"""
+        # Sort all results by score and keep top N (stable, so ties keep upload order)
+        ranking = sorted(results, key=lambda x: x.get('score', 0), reverse=True)[:top_n]
+        return {'stage': stage, 'done': progress['done'], 'total': progress['total'], 'ranking': ranking}
+    
+    def _promote_firms(self, firms: List[Dict], screened: List[Dict], promote_count: int, top_n: int) -> List[int]:
+        """Indices of the firms to promote, best screening score first"""
+        screened = sorted(screened, key=lambda x: x.get('score', 0), reverse=True)
+        min_score = self.config.get_promote_min_score()
+        
+        # Screening results carry the key of the firm their id pointed at, so equal or rewritten names can't mix up
+        indices_by_key = {}
+        for i, firm in enumerate(firms):
+            indices_by_key.setdefault(LLMResultCache.firm_key(firm), []).append(i)
+        
+        promoted = []
+        for result in screened:
+            # The score threshold never cuts the finalists below top_n
+            if len(promoted) >= promote_count or (len(promoted) >= top_n and result['score'] < min_score):
+                break
+            indices = indices_by_key.get(result.get('firm_key'))
+            if indices:
+                promoted.append(indices.pop(0))
+        
+        return promoted
+    
+    def _iter_tier(self, firms: List[Dict], criteria: str, model: str, screening: bool = False) -> Iterator[Dict]:
+        """
+        Analyze firms with one model: cached results first, then batched requests for the misses
+        
+        Yields {'done', 'total', 'results'} after the cache lookup and after every batch;
+        results are always in the same order (cache hits, then batches in batch order).
+        """
+        # Firms already analyzed against the same criteria and model are served from the cache
+        cache_model = f"{model}:screen" if screening else model
+        firm_keys = [LLMResultCache.firm_key(firm) for firm in firms]
+        cached = self.result_cache.get_many(cache_model, criteria, firm_keys)
+        # Identical firms are analyzed (and listed) once
+        unique_keys = {}
+        for i, key in enumerate(firm_keys):
+            unique_keys.setdefault(key, i)
+        cached_results = [dict(cached[key]) for key in unique_keys if key in cached]
+        misses = [i for key, i in unique_keys.items() if key not in cached]
+        self.last_report.add_cached(len(cached_results))
+        
+        batches, batch_keys = [], []
+        if misses:
+            # Fill each request up to the token budget instead of a fixed batch size
+            batches = self._pack_batches([firms[i] for i in misses], criteria, model, screening)
+            # Packing keeps order, so each batch covers the next slice of misses
+            start = 0
+            for batch in batches:
+                batch_keys.append([firm_keys[i] for i in misses[start:start + len(batch)]])
+                start += len(batch)
+        
+        yield {'done': 0, 'total': len(batches), 'results': cached_results}
+        
+        batch_results = {}
+        for index, results in self._iter_batches(batches, criteria, batch_keys, model, screening):
+            batch_results[index] = results
+            merged = cached_results + [
+                result for i in range(len(batches)) if i in batch_results for result in batch_results[i]
+            ]
+            yield {'done': len(batch_results), 'total': len(batches), 'results': merged}
+    
+    def _iter_batches(self, batches: List[List[Dict]], criteria: str, batch_keys: List[List[str]],
+                      model: str, screening: bool = False) -> Iterator[Tuple[int, List[Dict]]]:
+        """Analyze batches with a bounded number of requests in flight, yielding (index, results) as each completes"""
+        if not batches:
+            return
+        
+        max_workers = max(1, min(self.config.get_max_concurrent_batches(), len(batches)))
+        errors = []
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(self._analyze_batch, batch, criteria, batch_keys[index], model, screening): index
+                for index, batch in enumerate(batches)
+            }
+            try:
+                for completed, future in enumerate(as_completed(futures), 1):
+                    index = futures[future]
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        if is_fatal(e):
+                            # Bad key or no quota: every other batch would fail the same way
+                            raise
+                        # Keep the batches that succeeded; this one is reported as not analyzed
+                        self.logger.error(f"Batch {index + 1}/{len(batches)} failed: {type(e).__name__}: {e}")
+                        errors.append(e)
+                        self.last_failed_firms += len(batches[index])
+                        if len(errors) == len(batches):
+                            raise
+                        results = []
+                    else:
+                        self.logger.info(
+                            f"Completed {'screening ' if screening else ''}batch {index + 1}/{len(batches)} "
+                            f"({len(batches[index])} companies, {completed}/{len(batches)} done)"
+                        )
+                    yield index, results
+            finally:
+                # Don't start batches that haven't been sent yet (fatal error or the caller stopped)
+                for future in futures:
+                    future.cancel()
+    
+    def _analyze_batch(self, batch: List[Dict], criteria: str, firm_keys: List[str],
+                       model: str, screening: bool = False) -> List[Dict]:
+        """Send one batch to the model, parse its results and cache them per firm"""
+        # Build the screening or full expert analysis prompt for this batch
+        if screening:
+            system_prompt = self._get_screening_system_prompt()
+            prompt = self._build_screening_prompt(batch, criteria)
+        else:
+            system_prompt = self._get_vc_expert_system_prompt()
+            prompt = self._build_expert_prompt(batch, criteria)
+        
+        # Get analysis from AI with VC context
+        messages = [
+            {
+                "role": "system",
+                "content": system_prompt
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        record = self.last_report.new_batch(model, 'screening' if screening else 'analysis', len(batch))
+        try:
+            result_text = self._request_completion(model, messages, 0.0 if screening else 0.4, record)
+            
+            # Parse this batch's results
+            if screening:
+                results = self._parse_screening(result_text, batch, firm_keys)
+            else:
+                results = self._parse_expert_analysis(result_text, len(batch))
+            record['status'] = 'ok'
+        except Exception as e:
+            record['status'] = 'failed'
+            record['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self.last_report.add_batch(record)
+        self._cache_results(batch, firm_keys, results, criteria, f"{model}:screen" if screening else model)
+        return results
+    
+    def _request_completion(self, model: str, messages: List[Dict], temperature: float, record: Dict) -> str:
+        """Response text of a chat completion paced by the RPM/TPM limiter, retrying throttling and transient errors"""
+        max_tokens = self.config.get_max_completion_tokens()
+        # OpenAI counts max_tokens against the TPM budget up front
+        request_tokens = sum(count_tokens(m["content"], model) + TOKENS_PER_MESSAGE for m in messages) + max_tokens
+        limiter = self._get_rate_limiter(model)
+        max_retries = self.config.get_max_retries()
+        
+        attempt = 0
+        while True:
+            record['wait_seconds'] += limiter.acquire(request_tokens)
+            record['requests'] += 1
+            started = time.perf_counter()
+            try:
+                text = self._create_completion(model, messages, max_tokens, temperature, record)
+                record['latency_seconds'] += time.perf_counter() - started
+                return text
+            except JSONModeUnsupported:
+                # Resent in plain text through the limiter, without using up a retry
+                record['latency_seconds'] += time.perf_counter() - started
+                continue
+            except Exception as e:
+                record['latency_seconds'] += time.perf_counter() - started
+                if attempt >= max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, self.config.get_retry_base_delay(), RETRY_MAX_DELAY)
+                retry_after = retry_after_seconds(e)
+                if retry_after is not None:
+                    # The server knows best; hold back every batch, not just this one
+                    delay = retry_after + delay * 0.1
+                    limiter.pause(retry_after)
+                self.logger.warning(
+                    f"{type(e).__name__} from {model} (attempt {attempt + 1}/{max_retries + 1}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                record['retries'] += 1
+                record['wait_seconds'] += delay
+                time.sleep(delay)
+                attempt += 1
+    
+    def _create_completion(self, model: str, messages: List[Dict], max_tokens: int, temperature: float,
+                           record: Dict) -> str:
+        """Send one chat completion request (JSON mode and streaming when enabled) and return its text"""
+        kwargs = {
+            'model': model,
+            'messages': messages,
+            'max_tokens': max_tokens,
+            'temperature': temperature
+        }
+        if self.config.is_json_mode_enabled() and model not in self._plain_text_models:
+            kwargs['response_format'] = {'type': 'json_object'}
+        stream = self.config.is_streaming_enabled()
+        if stream:
+            kwargs['stream'] = True
+            if OPENAI_VERSION >= 1:
+                kwargs['stream_options'] = {'include_usage': True}
+        
+        try:
+            response = self._send_completion(kwargs)
+        except Exception as e:
+            if 'response_format' not in kwargs or 'response_format' not in str(e):
+                raise
+            # Model without JSON mode: the tolerant parser copes with free-form text
+            self.logger.warning(f"{model} does not support JSON mode - requesting plain text")
+            self._plain_text_models.add(model)
+            raise JSONModeUnsupported(str(e)) from e
+        
+        if stream:
+            return self._consume_stream(response, record)
+        
+        self._record_usage(_field(response, 'usage'), record)
+        return response.choices[0].message.content or ''
+    
+    def _send_completion(self, kwargs: Dict):
+        """Issue the request with whichever OpenAI client version is installed"""
+        if OPENAI_VERSION >= 1:
+            # New API (OpenAI 1.0+)
+            return self.client.chat.completions.create(**kwargs)
+        else:
+            # Old API (OpenAI 0.x)
+            return openai.ChatCompletion.create(request_timeout=self.config.get_request_timeout(), **kwargs)
+    
+    def _consume_stream(self, stream, record: Dict) -> str:
+        """Collect a streamed completion token by token; an interrupted stream keeps its complete results"""
+        parser = JSONArrayStreamParser()
+        parts = []
+        usage = None
+        try:
+            for chunk in stream:
+                choices = _field(chunk, 'choices') or []
+                delta = _field(_field(choices[0], 'delta'), 'content') if choices else None
+                if delta:
+                    parts.append(delta)
+                    parser.feed(delta)
+                usage = _field(chunk, 'usage') or usage
+        except Exception as e:
+            if not parser.items:
+                raise
+            self.logger.warning(
+                f"Stream interrupted ({type(e).__name__}) - keeping {len(parser.items)} complete results"
+            )
+        
+        self._record_usage(usage, record)
+        return ''.join(parts)
+    
+    def _record_usage(self, usage, record: Dict) -> None:
+        """Add a response's prompt, provider-cached prompt and completion tokens to its batch record"""
+        record['prompt_tokens'] += _field(usage, 'prompt_tokens') or 0
+        record['cached_prompt_tokens'] += _field(_field(usage, 'prompt_tokens_details'), 'cached_tokens') or 0
+        record['completion_tokens'] += _field(usage, 'completion_tokens') or 0
+    
+    def _get_rate_limiter(self, model: str) -> RateLimiter:
+        """One limiter per model, since provider limits are per model"""
+        with self._rate_limiter_lock:
+            if model not in self._rate_limiters:
+                self._rate_limiters[model] = RateLimiter(
+                    self.config.get_rate_limit_rpm(),
+                    self.config.get_rate_limit_tpm()
+                )
+            return self._rate_limiters[model]
+    
+    def _cache_results(self, batch: List[Dict], firm_keys: List[str], results: List[Dict],
+                       criteria: str, cache_model: str) -> None:
+        """Store each result under the key of its firm (screening ids, else names; unmatched names are not cached)"""
+        keys_by_name = {}
+        for firm, key in zip(batch, firm_keys):
+            keys_by_name.setdefault(str(firm.get('name', 'Unknown')), []).append(key)
+        
+        items = []
+        for result in results:
+            if 'firm_key' in result:
+                items.append((result['firm_key'], result))
+                continue
+            keys = keys_by_name.get(str(result['name']))
+            if keys:
+                items.append((keys.pop(0), result))
+        
+        self.result_cache.put_many(cache_model, criteria, items)
+    
     def _get_vc_expert_system_prompt(self) -> str:
         """System prompt defining the VC expert persona"""
         return """You are a seasoned venture capital analyst with 15+ years of experience in tech investments, specializing in AI/ML, B2B SaaS, and growth-stage companies.
@@ -143,43 +545,14 @@ Your analysis style:
 
 You analyze companies against specific investment criteria and explain matches like you would in a partner meeting or IC (Investment Committee) memo."""
     
-    def _build_expert_prompt(self, firms: List[Dict], criteria: str) -> str:
+    def _build_expert_prompt(self, firms: List[Dict], criteria: str, columns: Optional[List[str]] = None) -> str:
         """Build analysis prompt with ALL firm data and investment criteria"""
-        
-        # Format firm data with ALL available fields
-        firms_text = ""
-        for i, firm in enumerate(firms, 1):
-            firms_text += f"\n{'='*60}\nFIRM #{i}: {firm.get('name', 'Unknown')}\n{'='*60}\n"
-            
-            # Key fields first
-            priority_fields = ['name', 'description', 'industry', 'stage', 'revenue', 'location']
-            
-            for field in priority_fields:
-                if field in firm:
-                    label = field.replace('_', ' ').title()
-                    firms_text += f"{label}: {firm[field]}\n"
-            
-            # Then key investment fields only (to reduce token usage)
-            key_investment_fields = [
-                'Revenue', 'Growth Rate', 'Total Raised', 'Active Investors', 
-                'First Financing Valuation', 'Success Probability', 'Employees',
-                'Year Founded', 'Business Status', 'Primary Industry Sector'
-            ]
-            
-            for field in key_investment_fields:
-                if field in firm and firm[field] and str(firm[field]).strip() != '':
-                    value = str(firm[field])
-                    if len(value) > 50:  # Truncate long values
-                        value = value[:50] + "..."
-                    firms_text += f"  • {field}: {value}\n"
-        
-        return f"""Analyze these companies against the following investment criteria and rank them by fit.
-
-INVESTMENT CRITERIA:
-{criteria}
-
-COMPANIES TO ANALYZE:
-{firms_text}
+        # Firm data goes last so every batch of a run shares the same prefix (provider prompt caching)
+        return self._build_expert_prefix(criteria) + self._format_firms(firms, columns)
+    
+    def _build_expert_prefix(self, criteria: str) -> str:
+        """Static instructions, then the run's criteria - byte-identical for every batch"""
+        return f"""Analyze the companies listed at the end against the investment criteria and rank them by fit.
 
 INSTRUCTIONS:
 You are a senior VC analyst with access to comprehensive PitchBook data. Analyze each company using ALL available data fields including:
@@ -208,42 +581,188 @@ For each company, provide:
 
 Write as if presenting to an Investment Committee. Use SPECIFIC data points from all available fields.
 
-Return ONLY a JSON array with this exact format:
-[{{"name": "Company Name", "score": 87, "reason": "Strong B2B AI opportunity with $10M ARR (2x threshold) and 45% growth rate. $280M valuation (within target). Backed by Sequoia, a16z (tier-1 VCs). Series B with 82% success probability. 150 employees (3x YoY). Web traffic growth (75th percentile)."}}]
+Return ONLY a JSON object with this exact format, one entry per company:
+{{"results": [{{"name": "Company Name", "score": 87, "reason": "Strong B2B AI opportunity with $10M ARR (2x threshold) and 45% growth rate. $280M valuation (within target). Backed by Sequoia, a16z (tier-1 VCs). Series B with 82% success probability. 150 employees (3x YoY). Web traffic growth (75th percentile)."}}]}}
+
+Focus on investment merit using ALL available PitchBook data. Be specific and data-driven like a VC analyst.
 
-Focus on investment merit using ALL available PitchBook data. Be specific and data-driven like a VC analyst."""
+INVESTMENT CRITERIA:
+{criteria}
+
+COMPANIES TO ANALYZE:
+"""
+    
+    def _get_screening_system_prompt(self) -> str:
+        """System prompt for the cheap first-pass screen"""
+        return ("You are a venture capital analyst doing a fast first-pass screen of companies against an "
+                "investment thesis. Score strictly on fit with the stated criteria. Respond with JSON only.")
+    
+    def _build_screening_prompt(self, firms: List[Dict], criteria: str, columns: Optional[List[str]] = None) -> str:
+        """Build the terse score-only prompt used by the screening model (shared prefix, firms last)"""
+        return f"""Score each company's fit with the investment criteria from 0 to 100. No explanations.
+Return ONLY a JSON object with one entry per company, using its # as id:
+{{"results": [{{"id": 1, "score": 72}}]}}
+
+INVESTMENT CRITERIA:
+{criteria}
+
+COMPANIES:
+""" + self._format_firms(firms, columns)
+    
+    def _compact_columns(self, firms: List[Dict]) -> List[str]:
+        """Compact fields with a value for at least one of the firms (the name column always stays)"""
+        return [field for field in COMPACT_FIELDS
+                if field == 'name' or any(_firm_value(firm, field).strip() for firm in firms)]
+    
+    def _format_firms(self, firms: List[Dict], columns: Optional[List[str]] = None) -> str:
+        """Format the firm section of a prompt in the configured encoding"""
+        if self.config.get_prompt_format() == 'compact':
+            if columns is None:
+                columns = self._compact_columns(firms)
+            header = ' | '.join(['#'] + [COMPACT_LABELS[field] for field in columns])
+            return f"{COMPACT_LEGEND}\n{header}\n" + "".join(
+                self._format_firm(i, firm, columns) for i, firm in enumerate(firms, 1)
+            )
+        return "".join(self._format_firm(i, firm) for i, firm in enumerate(firms, 1))
+    
+    def _format_firm(self, i: int, firm: Dict, columns: Optional[List[str]] = None) -> str:
+        """Format one firm of the analysis prompt (a row in compact mode, a block otherwise)"""
+        if self.config.get_prompt_format() == 'compact':
+            return self._format_firm_row(i, firm, COMPACT_FIELDS if columns is None else columns)
+        return self._format_firm_block(i, firm)
+    
+    def _format_firm_row(self, i: int, firm: Dict, columns: List[str]) -> str:
+        """One delimited row per firm under the shared header"""
+        values = [str(i)]
+        for field in columns:
+            value = ' '.join(_firm_value(firm, field).split()).replace('|', '/')
+            limit = COMPACT_FIELD_LIMITS.get(field, COMPACT_DEFAULT_LIMIT)
+            if limit and len(value) > limit:
+                value = value[:limit].rstrip() + '…'
+            values.append(value or '-')
+        return ' | '.join(values) + '\n'
+    
+    def _format_firm_block(self, i: int, firm: Dict) -> str:
+        """Verbose block per firm with banners and labelled fields"""
+        firm_text = f"\n{'='*60}\nFIRM #{i}: {firm.get('name', 'Unknown')}\n{'='*60}\n"
+        
+        # Key fields first
+        for field in PRIORITY_FIELDS:
+            if field in firm:
+                label = field.replace('_', ' ').title()
+                firm_text += f"{label}: {firm[field]}\n"
+        
+        # Then key investment fields only (to reduce token usage)
+        for field in KEY_INVESTMENT_FIELDS:
+            if field.lower() in PRIORITY_FIELDS:
+                continue
+            value = _firm_value(firm, field)
+            if value.strip() != '':
+                if len(value) > 50:  # Truncate long values
+                    value = value[:50] + "..."
+                firm_text += f"  • {field}: {value}\n"
+        
+        return firm_text
+    
+    def _pack_batches(self, firms: List[Dict], criteria: str, model: str, screening: bool = False) -> List[List[Dict]]:
+        """Split firms into the fewest requests that fit the model's context budget"""
+        max_completion = self.config.get_max_completion_tokens()
+        # Rows are sized with every column any firm fills, an upper bound for each batch's columns
+        columns = self._compact_columns(firms)
+        if screening:
+            fixed_prompt = self._get_screening_system_prompt() + self._build_screening_prompt([], criteria, columns)
+        else:
+            fixed_prompt = self._get_vc_expert_system_prompt() + self._build_expert_prompt([], criteria, columns)
+        
+        # Prompt room = share of the context window minus the completion reserve and the fixed prompt parts
+        budget = int(context_window(model) * self.config.get_context_share()) - max_completion
+        overhead = count_tokens(fixed_prompt, model) + 2 * TOKENS_PER_MESSAGE
+        firm_budget = max(budget - overhead, 1)
+        # The JSON answer grows with the batch too
+        tokens_per_firm = SCREENING_TOKENS_PER_FIRM if screening else COMPLETION_TOKENS_PER_FIRM
+        max_firms = max(1, max_completion // tokens_per_firm)
+        
+        fitted, token_counts = [], []
+        for firm in firms:
+            tokens = count_tokens(self._format_firm(1, firm, columns), model)
+            if tokens > firm_budget:
+                firm, tokens = self._truncate_firm(firm, firm_budget, model, columns)
+            fitted.append(firm)
+            token_counts.append(tokens)
+        
+        batches = [[fitted[i] for i in batch] for batch in pack_batches(token_counts, firm_budget, max_firms)]
+        self.logger.info(
+            f"Packed {len(firms)} companies into {len(batches)} batches "
+            f"({firm_budget} prompt tokens, up to {max_firms} companies each)"
+        )
+        return batches
+    
+    def _truncate_firm(self, firm: Dict, budget: int, model: str, columns: Optional[List[str]] = None):
+        """Shorten a firm's longest text fields until its block fits in budget tokens"""
+        firm = dict(firm)
+        tokens = count_tokens(self._format_firm(1, firm, columns), model)
+        while tokens > budget:
+            field = max((f for f in PRIORITY_FIELDS if f in firm and f != 'name'),
+                        key=lambda f: len(str(firm[f])), default=None)
+            if field is None or len(str(firm[field])) <= 20:
+                break
+            value = str(firm[field])
+            firm[field] = value[:len(value) // 2] + "..."
+            tokens = count_tokens(self._format_firm(1, firm, columns), model)
+        
+        self.logger.warning(f"Truncated oversized row '{firm.get('name', 'Unknown')}' to {tokens} tokens")
+        return firm, tokens
     
     def _parse_expert_analysis(self, response_text: str, top_n: int) -> List[Dict]:
-        """Parse expert analysis response into structured results"""
-        try:
-            import json
-            
-            # Extract JSON from response
-            start_idx = response_text.find('[')
-            end_idx = response_text.rfind(']') + 1
-            
-            if start_idx != -1 and end_idx > start_idx:
-                json_text = response_text[start_idx:end_idx]
-                results = json.loads(json_text)
-                
-                # Sort by score and return top N
-                results_sorted = sorted(results, key=lambda x: x.get('score', 0), reverse=True)
-                
-                return [
-                    {
-                        'name': firm.get('name', 'Unknown'),
-                        'score': float(firm.get('score', 0)),
-                        'reason': firm.get('reason', 'No analysis provided')
-                    }
-                    for firm in results_sorted[:top_n]
-                ]
-            else:
-                raise ValueError("No valid JSON found in expert analysis")
-                
-        except Exception as e:
-            self.logger.error(f"Error parsing expert analysis: {str(e)}")
+        """Parse expert analysis response into structured results (every complete object is kept)"""
+        results = []
+        for firm in parse_json_objects(response_text or ''):
+            score = _to_score(firm.get('score'))
+            if score is None:
+                continue
+            results.append({
+                'name': firm.get('name', 'Unknown'),
+                'score': score,
+                'reason': firm.get('reason', 'No analysis provided')
+            })
+        
+        if not results:
+            self.logger.error("Error parsing expert analysis: no complete result objects")
             self.logger.debug(f"Raw response: {response_text}")
-            raise
+            raise ValueError("No valid JSON found in expert analysis")
+        
+        # Sort by score and return top N
+        results.sort(key=lambda x: x['score'], reverse=True)
+        return results[:top_n]
+    
+    def _parse_screening(self, response_text: str, batch: List[Dict], firm_keys: List[str]) -> List[Dict]:
+        """Parse a screening response ({"results": [{"id": n, "score": s}]}) into results for the batch firms
+        
+        Each result is named after the firm its id points at and carries that firm's key.
+        """
+        items = parse_json_objects(response_text or '')
+        if not items:
+            self.logger.debug(f"Raw response: {response_text}")
+            raise ValueError("No valid JSON found in screening response")
+        
+        results = []
+        seen = set()
+        for item in items:
+            try:
+                position = int(item.get('id')) - 1
+            except (TypeError, ValueError):
+                continue
+            score = _to_score(item.get('score'))
+            if score is not None and 0 <= position < len(batch) and position not in seen:
+                seen.add(position)
+                results.append({
+                    'name': batch[position].get('name', 'Unknown'),
+                    'score': score,
+                    'reason': 'Screening score only',
+                    'firm_key': firm_keys[position]
+                })
+        
+        return results
     
     def is_available(self) -> bool:
         """Check if VC expert agent can be used (requires API key and OpenAI module)"""